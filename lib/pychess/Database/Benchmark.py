@@ -0,0 +1,147 @@
+import os
+import shutil
+import sys
+import tempfile
+from time import time
+from types import SimpleNamespace
+
+from pychess.Database import model as dbmodel
+from pychess.Database.PgnImport import PgnImport, GAME, read_games, scan_headers
+from pychess.Savers.ChessFile import LoadingError
+from pychess.Savers.pgn import load
+from pychess.System.protoopen import protoopen
+
+
+def import_games(path, sqlite_path, workers=1, bulk=False):
+    """Imports the game headers of a .pgn file to a new .sqlite database.
+    Returns the number of imported games."""
+
+    engine = dbmodel.get_engine(sqlite_path)
+    chessfile = SimpleNamespace(
+        path=path,
+        handle=None,
+        engine=engine,
+        size=os.path.getsize(path),
+        scoutfish=None,
+    )
+    importer = PgnImport(chessfile, workers=workers, bulk=bulk)
+    importer.initialize()
+    importer.do_import(path)
+    importer.finalize()
+    importer.conn.close()
+    engine.dispose()
+    return importer.next_id[GAME] - 1
+
+
+def benchmark(path, maxworkers=None):
+    """Times header import of a .pgn file with 1..maxworkers scanner processes."""
+
+    if maxworkers is None:
+        maxworkers = os.cpu_count() or 1
+
+    for workers in range(1, maxworkers + 1):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            sqlite_path = os.path.join(tmpdir, "benchmark.sqlite")
+            start_time = time()
+            games = import_games(path, sqlite_path, workers)
+            ttime = time() - start_time
+            print(
+                "%2d workers %10d games %8.2f s %12.2f games/s"
+                % (workers, games, ttime, games / ttime if ttime > 0 else games)
+            )
+
+
+def benchmark_bulk(path):
+    """Times the default and the bulk load import path (indexes included).
+    Meant to be run on big (f.e. 1M games) .pgn files."""
+
+    for bulk in (False, True):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            sqlite_path = os.path.join(tmpdir, "benchmark.sqlite")
+            start_time = time()
+            games = import_games(path, sqlite_path, bulk=bulk)
+            ttime = time() - start_time
+            print(
+                "%8s %10d games %8.2f s %12.2f games/s"
+                % (
+                    "bulk" if bulk else "default",
+                    games,
+                    ttime,
+                    games / ttime if ttime > 0 else games,
+                )
+            )
+
+
+def benchmark_scan(path):
+    """Times the line by line and the memory mapped header scanner."""
+
+    for name, scan in (
+        ("read_games", lambda: read_games(protoopen(path))),
+        ("scan_headers", lambda: scan_headers(path)),
+    ):
+        start_time = time()
+        games = sum(1 for tags in scan())
+        ttime = time() - start_time
+        print(
+            "%12s %10d games %8.2f s %12.2f games/s"
+            % (name, games, ttime, games / ttime if ttime > 0 else games)
+        )
+
+
+def benchmark_parse(path):
+    """Times parse_movetext() and loadToModel() over all games of a .pgn file.
+    Meant to be run on heavily annotated files with deeply nested variations."""
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        # The .sqlite of the header tags is created next to the .pgn file
+        pgn_path = os.path.join(tmpdir, os.path.basename(path))
+        shutil.copy(path, pgn_path)
+        pgnfile = load(protoopen(pgn_path))
+        pgnfile.init_tag_database()
+        pgnfile.limit = pgnfile.get_count()
+        games, plys = pgnfile.get_records()
+
+        parse_movetext = pgnfile.parse_movetext
+        parse_time = 0
+
+        def timed_parse_movetext(string, board, position):
+            nonlocal parse_time
+            start_time = time()
+            try:
+                return parse_movetext(string, board, position)
+            finally:
+                parse_time += time() - start_time
+
+        pgnfile.parse_movetext = timed_parse_movetext
+
+        size = 0
+        errors = 0
+        start_time = time()
+        for rec in games:
+            size += len(pgnfile.get_movetext(rec))
+            try:
+                pgnfile.loadToModel(rec)
+            except LoadingError:
+                errors += 1
+        ttime = time() - start_time
+        pgnfile.close()
+
+    for name, ptime in (("parse_movetext", parse_time), ("loadToModel", ttime)):
+        print(
+            "%14s %10d games %6d errors %10d KB %8.2f s %10.2f KB/s"
+            % (
+                name,
+                len(games),
+                errors,
+                size // 1024,
+                ptime,
+                size / 1024 / ptime if ptime > 0 else size / 1024,
+            )
+        )
+
+
+if __name__ == "__main__":
+    benchmark_scan(sys.argv[1])
+    benchmark_parse(sys.argv[1])
+    benchmark_bulk(sys.argv[1])
+    benchmark(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else None)
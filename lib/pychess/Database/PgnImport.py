@@ -1,8 +1,14 @@
 import collections
+import hashlib
+import itertools
+import mmap
+import multiprocessing
 import os
 import re
 import subprocess
 import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from operator import itemgetter
 
 from gi.repository import GLib
 
@@ -15,6 +21,8 @@ from pychess.System.Log import log
 from pychess.System import download_file
 from pychess.System.protoopen import protoopen, protosave, PGN_ENCODING
 from pychess.Database.model import (
+    create_indexes,
+    drop_indexes,
     event,
     site,
     player,
@@ -52,6 +60,27 @@ other_game_tags = (
 )
 
 TAG_REGEX = re.compile(r"\[([a-zA-Z0-9_]+)\s+\"(.*)\"\]")
+TAG_BYTES_REGEX = re.compile(rb"\[([a-zA-Z0-9_]+)\s+\"(.*)\"\]")
+
+# Bytes level counterparts of TAG_REGEX used on whole memory mapped files.
+# A header block is a run of tag lines (with single line % comments in it),
+# the tag lines of a block are matched line by line with TAG_LINE_REGEX.
+# Blocks are searched by their leading new line, because a literal prefix
+# lets the regex engine skip movetext much faster than a ^ anchor.
+HEADER_BLOCK_REGEX = re.compile(
+    rb"""
+    \[[a-zA-Z0-9_]+[^\S\n]+\"[^\n]*\"\][^\n]*(?:\n|\Z)
+    (?:
+        (?:\[[a-zA-Z0-9_]+[^\S\n]+\"[^\n]*\"\]|%)[^\n]*(?:\n|\Z)
+    )*
+    """,
+    re.VERBOSE,
+)
+NEXT_HEADER_BLOCK_REGEX = re.compile(
+    b"\n(" + HEADER_BLOCK_REGEX.pattern + b")", re.VERBOSE
+)
+TAG_LINE_REGEX = re.compile(rb"^\[([a-zA-Z0-9_]+)[^\S\n]+\"(.*)\"\]", re.MULTILINE)
+TAG_LINE_TEXT_REGEX = re.compile(r"^\[([a-zA-Z0-9_]+)[^\S\n]+\"(.*)\"\]", re.MULTILINE)
 
 GAME, EVENT, SITE, PLAYER, ANNOTATOR, SOURCE, STAT = range(7)
 
@@ -73,17 +102,49 @@ pgn2Const = {
 }
 
 
+# Size of the byte ranges header scanner processes work on
+SCAN_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+# Connection settings used while bulk loading a .sqlite database
+# (durability is traded for speed, the saved values are restored at the end)
+BULK_PRAGMAS = (
+    ("synchronous", "OFF"),
+    ("journal_mode", "MEMORY"),
+    ("cache_size", "-262144"),
+    ("temp_store", "MEMORY"),
+)
+
+
 class PgnImport:
-    def __init__(self, chessfile, append_pgn=False):
+    def __init__(self, chessfile, append_pgn=False, workers=1, bulk=False):
         self.chessfile = chessfile
         self.append_pgn = append_pgn
+        # Number of header scanner processes (1 means scanning in this process)
+        self.workers = workers
+        # Bulk load mode: plain executemany() inserts, relaxed durability
+        # and indexes created once in finalize()
+        self.bulk = bulk
         self.cancel = False
+        self.progressbar = None
 
     def initialize(self):
         self.db_handle = self.chessfile.handle
         self.engine = self.chessfile.engine
         self.conn = self.engine.connect()
-        self.CHUNK = 1000
+        self.CHUNK = 10000 if self.bulk else 1000
+        self.bulk_sql = {}
+        self.saved_pragmas = []
+
+        # bulk loading is implemented for .sqlite databases only
+        self.bulk = self.bulk and self.engine.name == "sqlite"
+        if self.bulk:
+            drop_indexes(self.engine)
+            for name, value in BULK_PRAGMAS:
+                saved = self.conn.exec_driver_sql("PRAGMA %s" % name).scalar()
+                self.saved_pragmas.append((name, saved))
+                self.conn.exec_driver_sql(f"PRAGMA {name}={value}")
+            self.conn.commit()
 
         self.ins_event = event.insert()
         self.ins_site = site.insert()
@@ -143,10 +204,16 @@ class PgnImport:
 
     def ini_names(self, name_table, field):
         if field != GAME and field != STAT:
-            name_dict = {
-                n.name.title().translate(removeDic): n.id
-                for n in self.conn.execute(select(name_table))
-            }
+            # keys have to be the same get_id() looks up with
+            if field == PLAYER:
+                name_dict = {
+                    n.name.title().translate(removeDic): n.id
+                    for n in self.conn.execute(select(name_table))
+                }
+            else:
+                name_dict = {
+                    n.name: n.id for n in self.conn.execute(select(name_table))
+                }
 
             if field == EVENT:
                 self.event_dict = name_dict
@@ -169,12 +236,65 @@ class PgnImport:
 
         return next_id
 
+    def finalize(self, indexes=True):
+        """Restores safe database settings and creates indexes after a bulk load"""
+        if not self.bulk:
+            return
+
+        for name, value in self.saved_pragmas:
+            self.conn.exec_driver_sql(f"PRAGMA {name}={value}")
+        self.saved_pragmas = []
+        self.conn.commit()
+
+        if indexes:
+            create_indexes(self.engine)
+
+    def flush(self):
+        """Writes collected new names, games and extra tags to the database"""
+        for table, ins, rows in (
+            (event, self.ins_event, self.event_data),
+            (site, self.ins_site, self.site_data),
+            (player, self.ins_player, self.player_data),
+            (annotator, self.ins_annotator, self.annotator_data),
+            (source, self.ins_source, self.source_data),
+            (tag_game, self.ins_tag_game, self.tag_game_data),
+            (game, self.ins_game, self.game_data),
+        ):
+            if not rows:
+                continue
+
+            if self.bulk:
+                # Skip SQLAlchemy per row parameter processing and let
+                # the DBAPI cursor executemany() plain tuples
+                if table not in self.bulk_sql:
+                    compiled = ins.compile(
+                        dialect=self.engine.dialect, column_keys=list(rows[0])
+                    )
+                    keys = compiled.positiontup
+                    # itemgetter() returns a single value (not a tuple) for one key
+                    getter = itemgetter(*keys) if len(keys) > 1 else None
+                    self.bulk_sql[table] = (str(compiled), keys, getter)
+                sql, keys, getter = self.bulk_sql[table]
+                if getter is None:
+                    params = [(row[keys[0]],) for row in rows]
+                else:
+                    params = list(map(getter, rows))
+                self.conn.exec_driver_sql(sql, params)
+            else:
+                self.conn.execute(ins, rows)
+            rows.clear()
+
     def do_cancel(self):
-        GLib.idle_add(self.progressbar.set_text, "")
+        if self.progressbar is not None:
+            GLib.idle_add(self.progressbar.set_text, "")
         self.cancel = True
 
     # @profile_me
-    def do_import(self, filename, info=None, progressbar=None):
+    def do_import(self, filename, info=None, progressbar=None, start=0):
+        """Imports game headers of a .pgn (or .zip) file or url.
+        A start offset can be given to import only the new games
+        appended to an already imported local .pgn file."""
+
         self.progressbar = progressbar
 
         orig_filename = filename
@@ -183,7 +303,7 @@ class PgnImport:
             .select_from(source)
             .where(source.c.name == orig_filename)
         ).scalar()
-        if count_source > 0:
+        if count_source > 0 and start == 0:
             log.info("%s is already imported" % filename)
             return
 
@@ -232,162 +352,77 @@ class PgnImport:
             handle = protoopen(pgnfile)
 
             # estimated game count
-            all_games = max(size / 840, 1)
+            all_games = max((size - start) / 840, 1)
 
             get_id = self.get_id
 
             try:
+                if self.workers > 1 and size - start > SCAN_CHUNK_SIZE:
+                    headers = scan_games(
+                        pgnfile, basename, handle.pgn_encoding, self.workers, start
+                    )
+                else:
+                    headers = (
+                        parse_header(tags, basename)
+                        for tags in scan_headers(
+                            pgnfile, start, pgn_encoding=handle.pgn_encoding
+                        )
+                    )
+
                 i = 0
-                for tags in read_games(handle):
-                    if not tags:
-                        log.info("Empty game #%s" % (i + 1))
+                for header in headers:
+                    if header is None:
                         continue
 
                     if self.cancel:
+                        headers.close()
                         self.conn.rollback()
                         return
 
-                    fenstr = tags["FEN"]
-
-                    variant = tags["Variant"]
-                    if variant:
-                        if "fischer" in variant.lower() or "960" in variant:
-                            variant = "Fischerandom"
-                        else:
-                            variant = variant.lower().capitalize()
-
-                    # Fixes for some non statndard Chess960 .pgn
-                    if fenstr and variant == "Fischerandom":
-                        parts = fenstr.split()
-                        parts[0] = parts[0].replace(".", "/").replace("0", "")
-                        if len(parts) == 1:
-                            parts.append("w")
-                            parts.append("-")
-                            parts.append("-")
-                        fenstr = " ".join(parts)
-
-                    if variant:
-                        if variant not in name2variant:
-                            log.info("Unknown variant: %s" % variant)
-                            continue
-                        variant = name2variant[variant].variant
-                        if variant == NORMALCHESS:
-                            # lichess uses tag [Variant "Standard"]
-                            variant = 0
-                    else:
-                        variant = 0
-
-                    if basename == "eco.pgn":
-                        white = tags["Opening"]
-                        black = tags["Variation"]
-                    else:
-                        white = tags["White"]
-                        black = tags["Black"]
-
-                    event_id = get_id(tags["Event"], event, EVENT)
-
-                    site_id = get_id(tags["Site"], site, SITE)
-
-                    date = tags["Date"]
-
-                    game_round = tags["Round"]
-
-                    white_id = get_id(white, player, PLAYER)
-                    black_id = get_id(black, player, PLAYER)
-
-                    result = tags["Result"]
-                    if result in pgn2Const:
-                        result = pgn2Const[result]
-                    else:
-                        result = RUNNING
-
-                    white_elo = tags["WhiteElo"]
-                    black_elo = tags["BlackElo"]
-
-                    time_control = tags["TimeControl"]
-
-                    eco = tags["ECO"][:3]
-
-                    fen = tags["FEN"]
-
-                    board_tag = int(tags["Board"]) if "Board" in tags else 0
-
-                    annotator_id = get_id(tags["Annotator"], annotator, ANNOTATOR)
-
-                    source_id = get_id(orig_filename, source, SOURCE, info=info)
-
-                    ply_count = tags["PlyCount"] if "PlyCount" in tags else 0
-
-                    offset = base_offset + int(tags["offset"])
+                    offset = base_offset + header["offset"]
 
                     self.game_data.append(
                         {
                             "offset": offset,
                             "offset8": (offset >> 3) << 3,
-                            "event_id": event_id,
-                            "site_id": site_id,
-                            "date": date,
-                            "round": game_round,
-                            "white_id": white_id,
-                            "black_id": black_id,
-                            "result": result,
-                            "white_elo": white_elo,
-                            "black_elo": black_elo,
-                            "ply_count": ply_count,
-                            "eco": eco,
-                            "fen": fen,
-                            "variant": variant,
-                            "board": board_tag,
-                            "time_control": time_control,
-                            "annotator_id": annotator_id,
-                            "source_id": source_id,
+                            "event_id": get_id(header["event"], event, EVENT),
+                            "site_id": get_id(header["site"], site, SITE),
+                            "date": header["date"],
+                            "round": header["round"],
+                            "white_id": get_id(header["white"], player, PLAYER),
+                            "black_id": get_id(header["black"], player, PLAYER),
+                            "result": header["result"],
+                            "white_elo": header["white_elo"],
+                            "black_elo": header["black_elo"],
+                            "ply_count": header["ply_count"],
+                            "eco": header["eco"],
+                            "fen": header["fen"],
+                            "variant": header["variant"],
+                            "board": header["board"],
+                            "time_control": header["time_control"],
+                            "annotator_id": get_id(
+                                header["annotator"], annotator, ANNOTATOR
+                            ),
+                            "source_id": get_id(
+                                orig_filename, source, SOURCE, info=info
+                            ),
                         }
                     )
 
-                    for tag in tags:
-                        if (
-                            tag not in dedicated_tags
-                            and tag not in other_game_tags
-                            and tags[tag]
-                        ):
-                            self.tag_game_data.append(
-                                {
-                                    "game_id": self.next_id[GAME],
-                                    "tag_name": tag,
-                                    "tag_value": tags[tag],
-                                }
-                            )
+                    for tag_name, tag_value in header["tags"]:
+                        self.tag_game_data.append(
+                            {
+                                "game_id": self.next_id[GAME],
+                                "tag_name": tag_name,
+                                "tag_value": tag_value,
+                            }
+                        )
 
                     self.next_id[GAME] += 1
                     i += 1
 
                     if len(self.game_data) >= self.CHUNK:
-                        if self.event_data:
-                            self.conn.execute(self.ins_event, self.event_data)
-                            self.event_data = []
-
-                        if self.site_data:
-                            self.conn.execute(self.ins_site, self.site_data)
-                            self.site_data = []
-
-                        if self.player_data:
-                            self.conn.execute(self.ins_player, self.player_data)
-                            self.player_data = []
-
-                        if self.annotator_data:
-                            self.conn.execute(self.ins_annotator, self.annotator_data)
-                            self.annotator_data = []
-
-                        if self.source_data:
-                            self.conn.execute(self.ins_source, self.source_data)
-                            self.source_data = []
-
-                        if self.tag_game_data:
-                            self.conn.execute(self.ins_tag_game, self.tag_game_data)
-                            self.tag_game_data = []
-
-                        self.conn.execute(self.ins_game, self.game_data)
-                        self.game_data = []
+                        self.flush()
 
                         if progressbar is not None:
                             GLib.idle_add(
@@ -403,33 +438,7 @@ class PgnImport:
                         else:
                             log.info(f"From {pgnfile} imported {i}")
 
-                if self.event_data:
-                    self.conn.execute(self.ins_event, self.event_data)
-                    self.event_data = []
-
-                if self.site_data:
-                    self.conn.execute(self.ins_site, self.site_data)
-                    self.site_data = []
-
-                if self.player_data:
-                    self.conn.execute(self.ins_player, self.player_data)
-                    self.player_data = []
-
-                if self.annotator_data:
-                    self.conn.execute(self.ins_annotator, self.annotator_data)
-                    self.annotator_data = []
-
-                if self.source_data:
-                    self.conn.execute(self.ins_source, self.source_data)
-                    self.source_data = []
-
-                if self.tag_game_data:
-                    self.conn.execute(self.ins_tag_game, self.tag_game_data)
-                    self.tag_game_data = []
-
-                if self.game_data:
-                    self.conn.execute(self.ins_game, self.game_data)
-                    self.game_data = []
+                self.flush()
 
                 if progressbar is not None:
                     GLib.idle_add(progressbar.set_fraction, i / float(all_games))
@@ -481,19 +490,327 @@ class PgnImport:
                 self.conn.rollback()
 
 
-def read_games(handle):
-    """Based on chess.pgn.scan_headers() from Niklas Fiekas python-chess"""
+def parse_header(tags, basename):
+    """Converts the header tags of one game to game table column values.
+    Event, site, player and annotator are left as names, PgnImport.get_id()
+    turns them into ids later in the importing process.
+    Returns None if the game has to be skipped."""
+
+    if not tags:
+        log.info("Empty game at offset %s" % tags.get("offset"))
+        return None
+
+    fenstr = tags["FEN"]
+
+    variant = tags["Variant"]
+    if variant:
+        if "fischer" in variant.lower() or "960" in variant:
+            variant = "Fischerandom"
+        else:
+            variant = variant.lower().capitalize()
+
+    # Fixes for some non statndard Chess960 .pgn
+    if fenstr and variant == "Fischerandom":
+        parts = fenstr.split()
+        parts[0] = parts[0].replace(".", "/").replace("0", "")
+        if len(parts) == 1:
+            parts.append("w")
+            parts.append("-")
+            parts.append("-")
+        fenstr = " ".join(parts)
+
+    if variant:
+        if variant not in name2variant:
+            log.info("Unknown variant: %s" % variant)
+            return None
+        variant = name2variant[variant].variant
+        if variant == NORMALCHESS:
+            # lichess uses tag [Variant "Standard"]
+            variant = 0
+    else:
+        variant = 0
+
+    if basename == "eco.pgn":
+        white = tags["Opening"]
+        black = tags["Variation"]
+    else:
+        white = tags["White"]
+        black = tags["Black"]
+
+    result = tags["Result"]
+    if result in pgn2Const:
+        result = pgn2Const[result]
+    else:
+        result = RUNNING
+
+    return {
+        "offset": int(tags["offset"]),
+        "event": tags["Event"],
+        "site": tags["Site"],
+        "date": tags["Date"],
+        "round": tags["Round"],
+        "white": white,
+        "black": black,
+        "result": result,
+        "white_elo": tags["WhiteElo"],
+        "black_elo": tags["BlackElo"],
+        "ply_count": tags["PlyCount"] if "PlyCount" in tags else 0,
+        "eco": tags["ECO"][:3],
+        "fen": tags["FEN"],
+        "variant": variant,
+        "board": int(tags["Board"]) if "Board" in tags else 0,
+        "time_control": tags["TimeControl"],
+        "annotator": tags["Annotator"],
+        "tags": [
+            (tag, tags[tag])
+            for tag in tags
+            if tag not in dedicated_tags and tag not in other_game_tags and tags[tag]
+        ],
+    }
+
+
+def split_games(path, parts, start=0):
+    """Splits a .pgn file (from start) into at most parts (start, end) byte ranges.
+    Every range starts at the first header tag line of a game,
+    so the ranges can be scanned independently of each other."""
+
+    size = os.path.getsize(path)
+    bounds = [start]
+    with open(path, "rb") as f:
+        for i in range(1, parts):
+            f.seek(max(start + (size - start) * i // parts, bounds[-1]))
+            # skip the (maybe partial) line we landed in
+            f.readline()
+            in_tags = True
+            while True:
+                pos = f.tell()
+                line = f.readline()
+                if not line:
+                    break
+                if line.startswith(b"%"):
+                    continue
+                if TAG_BYTES_REGEX.match(line):
+                    if not in_tags:
+                        break
+                else:
+                    in_tags = False
+            if not line:
+                break
+            bounds.append(pos)
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def scan_range(args):
+    """Scans the headers of games in one byte range of a .pgn file.
+    Runs in the header scanner processes of scan_games()."""
+
+    path, start, end, basename, pgn_encoding, line_end_fix = args
+    return [
+        parse_header(tags, basename)
+        for tags in scan_headers(path, start, end, pgn_encoding, line_end_fix)
+    ]
+
+
+def scan_games(path, basename, pgn_encoding, workers, start=0):
+    """Scans game headers of a .pgn file in a pool of worker processes.
+    Yields parse_header() results in file order, exactly as the serial
+    scan_headers() + parse_header() combination does."""
+
+    with open(path, "rb") as f:
+        line = f.readline()
+    line_end_fix = 2 if line.endswith(b"\r\n") else 1
+
+    size = os.path.getsize(path)
+    ranges = split_games(path, max(workers, (size - start) // SCAN_CHUNK_SIZE), start)
+    tasks = (
+        (path, start, end, basename, pgn_encoding, line_end_fix)
+        for start, end in ranges
+    )
+
+    # Keep only a limited number of scanned ranges in flight, the importer
+    # writing to the database may be slower than the scanner processes.
+    # Forking the threaded GUI process may deadlock the children on locks
+    # held by other threads, so the scanners are spawned.
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        pending = collections.deque()
+        try:
+            for task in itertools.islice(tasks, 2 * workers):
+                pending.append(executor.submit(scan_range, task))
+            while pending:
+                headers = pending.popleft().result()
+                for task in itertools.islice(tasks, 1):
+                    pending.append(executor.submit(scan_range, task))
+                yield from headers
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def pgn_digest(path, size):
+    """Digest of the first size bytes of a .pgn file.
+    Used to recognize files changed only by appending new games."""
+
+    return pgn_digests(path, (size,))[size]
+
+
+def pgn_digests(path, sizes):
+    """{size: pgn_digest(path, size)} of all sizes, reading the file once"""
+
+    digests = {}
+    digest = hashlib.sha1()
+    pos = 0
+    with open(path, "rb") as f:
+        for size in sorted(set(sizes)):
+            while pos < size:
+                data = f.read(min(size - pos, 1024 * 1024))
+                if not data:
+                    break
+                digest.update(data)
+                pos += len(data)
+            digests[size] = digest.hexdigest()
+    return digests
+
+
+def header_blocks(buf, start, end):
+    """Yields (start, end) positions of header tag line blocks in buf[start:end]"""
+
+    pos = start
+    if start == 0 or buf[start - 1] == 10:
+        block = HEADER_BLOCK_REGEX.match(buf, start, end)
+        if block is not None:
+            yield block.span()
+            pos = block.end()
+
+    for block in NEXT_HEADER_BLOCK_REGEX.finditer(buf, pos, end):
+        yield block.span(1)
+
+
+def scan_headers(path, start=0, end=None, pgn_encoding=PGN_ENCODING, line_end_fix=None):
+    """Memory mapped, bytes level counterpart of read_games().
+    Yields the same header tag dicts with the same game offsets, but the
+    movetext between header blocks is skipped by the regex engine instead of
+    decoding and examining every line of it. Only tag values are decoded.
+
+    Arguments:
+    path - str (.pgn file path)
+    start, end - int (byte range of the file to scan, whole file by default)
+    pgn_encoding - str (encoding of tag values)
+    line_end_fix - int (line ending length of the .pgn file,
+                        detected from the first line if None)"""
+
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            if end is None:
+                end = len(buf)
+
+            if line_end_fix is None:
+                line_end = buf.find(b"\n")
+                line_end_fix = 2 if line_end > 0 and buf[line_end - 1] == 13 else 1
+
+            # end of the last header block, the comment state is "not in
+            # comment" there and movetext after it decides the state
+            last_pos = start
+            for game_pos, block_end in header_blocks(buf, start, end):
+                # tag lines inside a {} comment are just comment text
+                if buf.rfind(b"{", last_pos, game_pos) > buf.rfind(
+                    b"}", last_pos, game_pos
+                ):
+                    continue
+                last_pos = block_end
+
+                block = buf[game_pos:last_pos]
+                if b"\\" in block:
+                    game_headers = collections.defaultdict(str)
+                    for tag_name, tag_value in TAG_LINE_REGEX.findall(block):
+                        tag_value = tag_value.replace(b'\\"', b'"')
+                        tag_value = tag_value.replace(b"\\\\", b"\\")
+                        game_headers[tag_name.decode()] = tag_value.decode(pgn_encoding)
+                else:
+                    game_headers = collections.defaultdict(
+                        str, TAG_LINE_TEXT_REGEX.findall(block.decode(pgn_encoding))
+                    )
+                game_headers["offset"] = max(0, game_pos - line_end_fix)
+                yield game_headers
+
+
+def read_movetext(buf, offset, pgn_encoding=PGN_ENCODING):
+    """Returns the movetext of the game starting at offset in buf.
+    Bytes level counterpart of PGNFile.get_movetext() working on
+    a memory mapped .pgn file.
+
+    Arguments:
+    buf - bytes like object (whole .pgn file)
+    offset - int (game offset as stored in .sqlite database)
+    pgn_encoding - str (encoding of the .pgn file)"""
+
+    size = len(buf)
+    in_comment = False
+    lines = []
+
+    def next_line(pos):
+        line_end = buf.find(b"\n", pos)
+        return size if line_end < 0 else line_end + 1
+
+    pos = offset
+    line_end = next_line(pos)
+    if not buf[pos:line_end].strip():
+        pos = line_end
+        line_end = next_line(pos)
+
+    while pos < size:
+        line = buf[pos:line_end]
+        pos = line_end
+        line_end = next_line(pos)
+
+        # escape non-PGN data line
+        if line.startswith(b"%"):
+            continue
+
+        # header tag line
+        if not in_comment and line.startswith(b"["):
+            continue
+
+        # update in_comment state
+        if (not in_comment and b"{" in line) or (in_comment and b"}" in line):
+            in_comment = line.rfind(b"{") > line.rfind(b"}")
+
+        # if there is something add it
+        if line.strip():
+            lines.append(line)
+        # if line is empty it should be the game separator line except...
+        elif len(lines) == 0 or in_comment:
+            if in_comment:
+                lines.append(line)
+        else:
+            break
+    return b"".join(lines).decode(pgn_encoding)
+
+
+def read_games(handle, offset=0, line_end_fix=None):
+    """Based on chess.pgn.scan_headers() from Niklas Fiekas python-chess
+
+    Arguments:
+    handle - file like object opened with protoopen()
+    offset - int (position of the handle start in the .pgn file)
+    line_end_fix - int (line ending length of the .pgn file,
+                        detected from the first line if None)"""
 
     in_comment = False
 
     game_headers = None
     game_pos = None
 
-    last_pos = 0
+    last_pos = offset
     line = handle.readline()
 
     # scoutfish creates game offsets at previous game end
-    line_end_fix = 2 if line.endswith("\r\n") else 1
+    if line_end_fix is None:
+        line_end_fix = 2 if line.endswith("\r\n") else 1
 
     while line:
         # Skip single line comments.
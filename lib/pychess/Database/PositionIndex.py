@@ -0,0 +1,203 @@
+import heapq
+import mmap
+import os
+import struct
+import tempfile
+from collections import defaultdict
+
+from pychess.Utils.const import WHITEWON, BLACKWON, DRAW
+
+MAGIC = b"PCPOS\x00\x00\x02"
+
+# size and digest of the .pgn content the index was built from,
+# and the offset of its last game
+STATE = struct.Struct("<QQ40s")
+HEADER_SIZE = len(MAGIC) + STATE.size
+
+# position hash, game offset, ply, move played from the position
+# (0 at the end of the game), game result
+RECORD = struct.Struct("<QQHHBxxx")
+HASH = struct.Struct("<Q")
+
+# records sorted in memory at once while building the index
+RUN_SIZE = 1000000
+
+
+def sorted_runs(records, tmpdir):
+    """Sorts records in RUN_SIZE long runs written to temporary files
+    and returns the list of run file paths"""
+
+    runs = []
+    run = []
+    for rec in records:
+        run.append(rec)
+        if len(run) >= RUN_SIZE:
+            runs.append(write_run(run, tmpdir))
+            run = []
+    if run:
+        runs.append(write_run(run, tmpdir))
+    return runs
+
+
+def write_run(run, tmpdir):
+    run.sort()
+    fd, path = tempfile.mkstemp(dir=tmpdir, suffix=".run")
+    with os.fdopen(fd, "wb") as f:
+        pack = RECORD.pack
+        f.write(b"".join([pack(*rec) for rec in run]))
+    return path
+
+
+def read_run(path):
+    with open(path, "rb") as f:
+        while True:
+            data = f.read(RECORD.size * 4096)
+            if not data:
+                break
+            yield from RECORD.iter_unpack(data)
+
+
+def read_state(path):
+    """Returns (pgn size, last game offset, pgn digest) of a position index
+    file, or None if there is no index file of the current format"""
+    try:
+        with open(path, "rb") as f:
+            header = f.read(HEADER_SIZE)
+    except OSError:
+        return None
+    if len(header) < HEADER_SIZE or header[: len(MAGIC)] != MAGIC:
+        return None
+    size, last_offset, digest = STATE.unpack_from(header, len(MAGIC))
+    return size, last_offset, digest.decode("ascii")
+
+
+def read_records(path):
+    """Yields the records of a position index file in sorted order"""
+    with open(path, "rb") as f:
+        f.seek(HEADER_SIZE)
+        while True:
+            data = f.read(RECORD.size * 4096)
+            if not data:
+                break
+            yield from RECORD.iter_unpack(data)
+
+
+def write_index(path, records, state=(0, 0, ""), merge=()):
+    """Writes a position index file from (hash, offset, ply, move, result) tuples.
+    The records are sorted by an external merge sort, so they don't have to
+    fit into memory at once, and merged with the already sorted records of
+    merge. The file is written next to its final place and renamed, so
+    readers never see a half written index.
+    The state may also be given by a function called once the records are
+    read. If it returns None, the index file isn't written."""
+
+    dirname = os.path.dirname(os.path.abspath(path))
+    with tempfile.TemporaryDirectory(dir=dirname) as tmpdir:
+        runs = sorted_runs(records, tmpdir)
+        if callable(state):
+            state = state()
+            if state is None:
+                return
+        tmp_path = os.path.join(tmpdir, "index.pos")
+        size, last_offset, digest = state
+        with open(tmp_path, "wb") as f:
+            f.write(MAGIC)
+            f.write(STATE.pack(size, last_offset, digest.encode("ascii")))
+            pack = RECORD.pack
+            chunk = []
+            for rec in heapq.merge(merge, *[read_run(run) for run in runs]):
+                chunk.append(pack(*rec))
+                if len(chunk) >= 4096:
+                    f.write(b"".join(chunk))
+                    chunk = []
+            f.write(b"".join(chunk))
+        os.replace(tmp_path, path)
+
+
+class PositionIndex:
+    """Memory mapped, sorted (position hash, game offset, ply) index of a .pgn
+    file. Lookups are binary searches over the fixed size records."""
+
+    def __init__(self, path):
+        self.path = path
+        self.map = None
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError("%s is not a position index file" % path)
+            if os.path.getsize(path) > HEADER_SIZE:
+                self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self):
+        if self.map is None:
+            return 0
+        return (len(self.map) - HEADER_SIZE) // RECORD.size
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+
+    def bisect(self, key, right=False):
+        """Index of the first record with hash >= key (> key if right)"""
+        lo, hi = 0, len(self)
+        unpack_from = HASH.unpack_from
+        buf = self.map
+        base = HEADER_SIZE
+        size = RECORD.size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            value = unpack_from(buf, base + mid * size)[0]
+            if value < key or (right and value == key):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def find(self, key):
+        """Returns the records of a position hash as
+        (hash, offset, ply, move, result) tuples in game offset order"""
+        lo = self.bisect(key)
+        hi = self.bisect(key, right=True)
+        if lo == hi:
+            return []
+        base = HEADER_SIZE
+        return list(
+            RECORD.iter_unpack(
+                self.map[base + lo * RECORD.size : base + hi * RECORD.size]
+            )
+        )
+
+    def has_position(self, key):
+        lo = self.bisect(key)
+        return (
+            lo < len(self)
+            and HASH.unpack_from(self.map, HEADER_SIZE + lo * RECORD.size)[0] == key
+        )
+
+    def get_offsets(self, key):
+        """Returns {offset: ply} of games reaching the position hash.
+        The ply is the first one where the game reached the position."""
+        offs_ply = {}
+        for rec in self.find(key):
+            if rec[1] not in offs_ply:
+                offs_ply[rec[1]] = rec[2]
+        return offs_ply
+
+    def get_move_stats(self, key):
+        """Returns {move: [games, white won, black won, draw]} of moves
+        played from the position hash"""
+        stats = defaultdict(lambda: [0, 0, 0, 0])
+        for rec in self.find(key):
+            move = rec[3]
+            if move == 0:
+                continue
+            stat = stats[move]
+            stat[0] += 1
+            result = rec[4]
+            if result == WHITEWON:
+                stat[1] += 1
+            elif result == BLACKWON:
+                stat[2] += 1
+            elif result == DRAW:
+                stat[3] += 1
+        return stats
@@ -1,8 +1,12 @@
 from pychess.Utils.const import DROP
+from pychess.Utils.lutils.LBoard import LBoard
 from pychess.Utils.lutils.lmovegen import newMove
 
+# Drop moves use the piece as from cord, so moves with DROP flag and
+# from cord >= 32 are free to use as markers and still fit into 2 bytes
 MAXMOVE = newMove(63, 63, DROP)
-COMMENT, VARI_START, VARI_END, NAG = (MAXMOVE + i + 1 for i in range(4))
+COMMENT, VARI_START, VARI_END = (MAXMOVE - i for i in range(3))
+NAG = newMove(32, 0, DROP)
 
 
 def walk(node, arr, txt):
@@ -32,7 +36,10 @@ def walk(node, arr, txt):
 
         for nag in node.nags:
             if nag:
-                arr_append(NAG + int(nag[1:]))
+                nag = int(nag[1:])
+                if nag >= VARI_END - NAG:
+                    raise ValueError("NAG $%s can't be stored" % nag)
+                arr_append(NAG + nag)
 
         for child in node.children:
             if isinstance(child, str):
@@ -49,3 +56,63 @@ def walk(node, arr, txt):
             node = node.next
         else:
             break
+
+
+def unwalk(board, arr, txt, position=-1):
+    """Rebuilds the tree of lboards walk() collected the moves and comments from.
+    Returns the same list of lboards the pgn parser returns.
+    Arguments:
+    board - lboard (initial position)
+    arr - array("H") (created by walk())
+    txt - list (comment strings)
+    position - int (maximum ply of the mainline)"""
+
+    return _unwalk(board, iter(arr), iter(txt), position, False)
+
+
+def _unwalk(board, codes, comments, position, variation):
+    boards = []
+    boards_append = boards.append
+    if variation:
+        # this board used only to hold initial variation comments
+        boards_append(LBoard(board.variant))
+    else:
+        boards_append(board)
+
+    last_board = board
+    for code in codes:
+        if code == VARI_END:
+            break
+
+        elif code == COMMENT:
+            comment = next(comments)
+            if last_board is board:
+                boards[0].children.append(comment)
+            else:
+                last_board.children.append(comment)
+
+        elif code == VARI_START:
+            last_board.children.append(
+                _unwalk(last_board.prev, codes, comments, position, True)
+            )
+
+        elif code >= NAG:
+            last_board.nags.append("$%d" % (code - NAG))
+
+        else:
+            if not variation and position != -1 and last_board.plyCount >= position:
+                break
+
+            new_board = last_board.clone()
+            new_board.applyMove(code)
+            new_board.prev = last_board
+
+            if variation and last_board is board:
+                boards[0].next = new_board
+            else:
+                last_board.next = new_board
+
+            boards_append(new_board)
+            last_board = new_board
+
+    return boards
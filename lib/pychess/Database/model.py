@@ -10,6 +10,8 @@ from sqlalchemy import (
     Integer,
     String,
     SmallInteger,
+    LargeBinary,
+    Text,
     ForeignKey,
     event,
     select,
@@ -83,7 +85,7 @@ def insert_or_ignore(engine, stmt):
 engines = {}
 
 # PyChess database schema version
-SCHEMA_VERSION = "20180221"
+SCHEMA_VERSION = "20261020"
 
 
 def get_schema_version(engine):
@@ -202,6 +204,53 @@ tag_game = Table(
     Column("tag_value", String(128), default=""),
 )
 
+# Moves, NAGs and variations of already parsed games as dbwalk array("H")
+# bytes (little endian) and their comments joined by "\0"
+game_moves = Table(
+    "game_moves",
+    metadata,
+    Column("offset", Integer, primary_key=True, autoincrement=False),
+    Column("moves", LargeBinary),
+    Column("comments", Text),
+)
+
+# Size and digest of the .pgn file content the game table was imported from
+pgn_state = Table(
+    "pgn_state",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("size", Integer),
+    Column("digest", String(40)),
+)
+
+# Opening tree: stats of the moves played in the first plies of the games
+# Position hashes are stored as signed 64 bit integers
+# Year is the latest game year, removing games doesn't lower it
+book_move = Table(
+    "book_move",
+    metadata,
+    Column("hash", Integer, primary_key=True, autoincrement=False),
+    Column("move", Integer, primary_key=True, autoincrement=False),
+    Column("games", Integer, default=0),
+    Column("white_won", Integer, default=0),
+    Column("black_won", Integer, default=0),
+    Column("draw", Integer, default=0),
+    Column("elo_sum", Integer, default=0),
+    Column("elo_games", Integer, default=0),
+    Column("year", SmallInteger, default=0),
+)
+
+# Size and digest of the .pgn file content the opening tree was built from
+# and the offset of the last game added
+book_state = Table(
+    "book_state",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("size", Integer),
+    Column("digest", String(40)),
+    Column("last_offset", Integer),
+)
+
 schema_version = Table(
     "schema_version",
     metadata,
@@ -31,6 +31,7 @@ from pychess.widgets.TaskerManager import internet_game_tasker
 from pychess.widgets.RecentChooser import recent_menu, recent_manager
 from pychess.widgets.prompttext import getUserTextDialog
 from pychess.Players.engineNest import discoverer
+from pychess.Players.EnginePool import enginePool
 from pychess.Savers import chesspastebin
 from pychess.Savers.pgn import PGNFile
 from pychess.Savers.remotegame import get_internet_game
@@ -387,6 +388,7 @@ class GladeHandlers:
             Gtk.ResponseType.YES,
         ):
             ICLogon.stop()
+            enginePool.clear()
             asyncio.get_running_loop().stop()
             self.app.quit()
         else:
@@ -523,6 +525,10 @@ class GladeHandlers:
         perspective = perspective_manager.get_perspective("database")
         perspective.create_book()
 
+    def on_create_position_index_activate(self, widget):
+        perspective = perspective_manager.get_perspective("database")
+        perspective.create_position_index()
+
     def on_import_endgame_nl_activate(self, widget):
         perspective = perspective_manager.get_perspective("database")
         perspective.on_import_endgame_nl()
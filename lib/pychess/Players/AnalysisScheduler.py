@@ -0,0 +1,144 @@
+import asyncio
+
+from pychess.Players.Player import PlayerIsDead
+from pychess.System.Log import log
+from pychess.Utils.const import HINT, KILLED, UNKNOWN_REASON
+from pychess.Utils.lutils.ldata import MATE_VALUE, MATE_DEPTH
+
+
+def safe_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+async def startAnalyzers(analyzer_type, gamemodel, count):
+    """Starts up to count analyzers of analyzer_type (HINT or SPY) for
+    gamemodel. The analyzers aren't added to the spectators of the game."""
+
+    from pychess.Players.engineNest import init_engine
+
+    mode = "hint" if analyzer_type == HINT else "spy"
+    analyzers = []
+    for i in range(count):
+        try:
+            analyzer = await asyncio.wait_for(
+                init_engine(analyzer_type, gamemodel), 5.0
+            )
+        except asyncio.TimeoutError:
+            log.error("Got timeout error while starting %s analyzer" % mode)
+            break
+        except PlayerIsDead:
+            log.error("Engine died while starting %s analyzer" % mode)
+            break
+        except Exception:
+            log.error("Unknown error while starting %s analyzer" % mode)
+            break
+        if analyzer is None:
+            break
+        analyzer.setOptionInitialBoard(gamemodel)
+        analyzers.append(analyzer)
+    return analyzers
+
+
+class AnalysisScheduler:
+    """Analyzes the positions of a game with a pool of analyzers of the
+    same mode.
+
+    The positions are put in a work queue shared by the analyzers. An
+    analyzer takes the next one as soon as it reported the target depth, or
+    a mate score, for its current position, or when move_time is over. The
+    analysis is merged into the scores of the game model, keeping the deepest
+    result of every ply."""
+
+    def __init__(self, gamemodel, analyzers, move_time, depth=None):
+        self.gamemodel = gamemodel
+        self.analyzers = analyzers
+        self.move_time = move_time
+        self.depth = depth
+        self.stop_event = asyncio.Event()
+
+    async def run(self, boards):
+        """Analyzes the boards, and ends the analyzers when done or stopped"""
+        queue = asyncio.Queue()
+        for board in boards:
+            queue.put_nowait(board)
+        try:
+            await asyncio.gather(
+                *(self.__work(analyzer, queue) for analyzer in self.analyzers)
+            )
+        finally:
+            for analyzer in self.analyzers:
+                analyzer.end(KILLED, UNKNOWN_REASON)
+
+    def stop(self):
+        self.stop_event.set()
+
+    async def __work(self, analyzer, queue):
+        if not await self.waitReady(analyzer):
+            return
+
+        while not self.stop_event.is_set():
+            try:
+                board = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            analysis = await self.analyze(analyzer, board)
+            if analysis is not None:
+                self.gamemodel.on_analyze(analyzer, [analysis])
+
+    async def waitReady(self, analyzer, timeout=10.0):
+        """Waits until the analyzer is ready to get positions. Returns False
+        if it didn't get ready in time, or the scheduler was stopped."""
+        if not analyzer.readyMoves:
+            ready = asyncio.Event()
+            cid = analyzer.connect_after("readyForMoves", lambda analyzer: ready.set())
+            try:
+                await self.__wait(ready, timeout)
+            finally:
+                analyzer.disconnect(cid)
+            if not ready.is_set():
+                if not self.stop_event.is_set():
+                    log.warning("%s didn't get ready for analyzing" % repr(analyzer))
+                return False
+        return True
+
+    async def analyze(self, analyzer, board):
+        """Analyzes board with one of the analyzers. Returns the last
+        analysis line the analyzer reported for it, or None."""
+        result = []
+        done = asyncio.Event()
+
+        def on_analyze(analyzer, analysis):
+            if not analysis or analysis[0] is None:
+                return
+            ply, pv, score, depth, nps = analysis[0]
+            # Lines of the previous position may still come in
+            if ply != board.ply or score is None or not depth:
+                return
+            result[:] = [analysis[0]]
+            if abs(score) >= MATE_VALUE - MATE_DEPTH:
+                done.set()
+            elif self.depth is not None and safe_int(depth) >= self.depth:
+                done.set()
+
+        cid = analyzer.connect("analyze", on_analyze)
+        try:
+            analyzer.setBoard(board)
+            await self.__wait(done, self.move_time + 0.1)
+        finally:
+            analyzer.disconnect(cid)
+        return result[0] if result else None
+
+    async def __wait(self, event, timeout):
+        """Waits for event until timeout, or until the scheduler is stopped"""
+        waiters = [
+            asyncio.ensure_future(event.wait()),
+            asyncio.ensure_future(self.stop_event.wait()),
+        ]
+        await asyncio.wait(
+            waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+        )
+        for waiter in waiters:
+            waiter.cancel()
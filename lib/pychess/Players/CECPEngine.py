@@ -37,6 +37,7 @@ from pychess.Utils.lutils.ldata import MATE_VALUE
 from pychess.Utils.lutils.lmove import ParsingError
 from pychess.Variants import variants
 from pychess.Players.Player import PlayerIsDead, TurnInterrupt, InvalidMove
+from .EnginePool import enginePool
 from .ProtocolEngine import ProtocolEngine, TIME_OUT_SECOND
 
 
@@ -291,15 +292,17 @@ class CECPEngine(ProtocolEngine):
     def kill(self, reason):
         """Kills the engine, starting with the 'quit' command, then sigterm and
         eventually sigkill.
+        Engines that ended normally are given back to the engine pool instead.
         Returns the exitcode, or if engine have already been killed, returns
         None"""
         if self.connected:
             self.connected = False
             try:
                 try:
-                    print("quit", file=self.engine)
+                    if reason == WON_ADJUDICATION or not enginePool.release(self):
+                        print("quit", file=self.engine)
+                        self.engine.terminate()
                     self.queue.put_nowait("del")
-                    self.engine.terminate()
 
                 except OSError as err:
                     # No need to raise on a hang up error, as the engine is dead
@@ -326,7 +329,7 @@ class CECPEngine(ProtocolEngine):
                 await asyncio.sleep(0.1)
 
             self.setBoardList([board], [])
-            if search:
+            if search and not self._answerFromCache():
                 self.__sendAnalyze(self.mode == INVERSE_ANALYZING)
 
         asyncio.create_task(coro())
@@ -344,7 +347,7 @@ class CECPEngine(ProtocolEngine):
                 await asyncio.sleep(0.1)
 
             self.setBoardList([board1], [])
-            if not self.analyzing_paused:
+            if not self.analyzing_paused and not self._answerFromCache():
                 self.__sendAnalyze(self.mode == INVERSE_ANALYZING)
 
         asyncio.create_task(coro())
@@ -531,6 +534,38 @@ class CECPEngine(ProtocolEngine):
         else:
             self.optionQueue.append(f"option {key}={value}")
 
+    def poolReset(self, options, ping):
+        """The commands resetting the engine to a new game, and the line the
+        engine answers when done. Engines not supporting ping can't tell, and
+        aren't reused.
+
+        new resets the variant, the depth limit and the time control. Other
+        settings last, so engines which got any option or strength command
+        besides the configured options of the pool key aren't reused."""
+        if not self.features["ping"]:
+            return None
+        configured = set()
+        for key, value in options.items():
+            if key in ("cores", "memory"):
+                configured.add("%s %s" % (key, value))
+            else:
+                configured.add(f"option {key}={value}")
+        for command in self.optionQueue:
+            if (
+                command.split()[0] in ("skill", "egtpath", "cores", "memory", "option")
+                and command not in configured
+            ):
+                return None
+        commands = []
+        if self.engineIsAnalyzing:
+            commands.append("exit")
+        commands += ["force", "new", "easy"]
+        # random toggles the randomization of the engine
+        if self.optionQueue.count("random") % 2:
+            commands.append("random")
+        commands.append("ping %d" % ping)
+        return commands, "pong %d" % ping
+
     # Interacting with the player
 
     def pause(self):
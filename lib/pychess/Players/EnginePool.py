@@ -0,0 +1,182 @@
+import asyncio
+import itertools
+
+from pychess.System import conf
+from pychess.System.Log import log
+
+# Seconds an idle engine process is kept before it is quit
+IDLE_TIMEOUT = 600
+
+# Seconds a released engine has to answer after it was reset
+RESET_TIMEOUT = 5
+
+
+def isAlive(subprocess):
+    return not subprocess.terminated and subprocess.proc.returncode is None
+
+
+def quitProcess(subprocess):
+    try:
+        print("quit", file=subprocess)
+    except OSError:
+        pass
+    subprocess.terminate()
+
+
+class EnginePool:
+    """Engine processes of finished games and analyzers, kept running to be
+    reused by the next game or analyzer of the same engine.
+
+    When a protocol engine ends, its process is reset to a new game state
+    (ucinewgame for UCI, new for CECP engines) and kept idle, keyed by the
+    command line of the engine, the options the user configured for it and
+    the variant played.
+    initEngine() takes a matching idle process instead of starting a new one,
+    so the engine doesn't have to load again. The protocol handshake is
+    still done by every new protocol engine, as it is fast.
+
+    At most size processes are kept, the ones idle the longest are quit
+    first. A size of 0 disables the pool."""
+
+    def __init__(self, size=None):
+        self._size = size
+        # [key, subprocess, died_cid, timer] entries, in the order the
+        # processes got idle
+        self.idle = []
+        # {subprocess: (key, options)} of the processes handed out
+        self.keys = {}
+        # {subprocess: task} of the processes being reset
+        self.resetting = {}
+        self.pings = itertools.count(1)
+
+    @property
+    def size(self):
+        return conf.get("engine_pool_size") if self._size is None else self._size
+
+    @staticmethod
+    def key(engine, lowPriority, variant=None):
+        """The pool key of an engine dict, and its configured options. Engines
+        keep state of the variant played, like cached evaluations, so it is
+        part of the key."""
+        options = {}
+        for option in engine.get("options") or ():
+            value = option.get("value")
+            if value is not None and option["default"] != value:
+                if engine["protocol"] == "xboard" and option["type"] == "check":
+                    value = int(bool(value))
+                options[option["name"]] = value
+        key = (
+            engine["protocol"],
+            engine["command"],
+            tuple(engine.get("args") or ()),
+            engine.get("vm_command"),
+            tuple(engine.get("vm_args") or ()),
+            engine.get("workingDirectory"),
+            engine.get("md5"),
+            lowPriority,
+            variant,
+            tuple(sorted((name, str(value)) for name, value in options.items())),
+        )
+        return key, options
+
+    def acquire(self, key):
+        """An idle process of key, or None"""
+        for i in range(len(self.idle) - 1, -1, -1):
+            if self.idle[i][0] != key:
+                continue
+            key, subprocess, died_cid, timer = self.idle.pop(i)
+            timer.cancel()
+            subprocess.disconnect(died_cid)
+            if isAlive(subprocess):
+                log.debug("Reusing engine process", extra={"task": subprocess.defname})
+                return subprocess
+        return None
+
+    def register(self, subprocess, key, options):
+        """Marks subprocess as a process the pool may take back"""
+        self.keys[subprocess] = (key, options)
+
+    def release(self, engine):
+        """Takes back the process of a protocol engine being ended. Returns
+        False if it can't be reused, and should be quit by the engine."""
+        subprocess = engine.engine
+        key, options = self.keys.pop(subprocess, (None, None))
+        if key is None or not self.size or not engine.readyMoves:
+            return False
+        if not isAlive(subprocess):
+            return False
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+        reset = engine.poolReset(options, next(self.pings))
+        if reset is None:
+            return False
+
+        commands, answer = reset
+        self.resetting[subprocess] = asyncio.create_task(
+            self.__reset(subprocess, key, commands, answer)
+        )
+        return True
+
+    async def __reset(self, subprocess, key, commands, answer):
+        ready = asyncio.Event()
+
+        def on_line(subprocess, line):
+            if line.strip() == answer:
+                ready.set()
+
+        cid = subprocess.connect("line", on_line)
+        try:
+            for command in commands:
+                print(command, file=subprocess)
+            await asyncio.wait_for(ready.wait(), RESET_TIMEOUT)
+        except (OSError, asyncio.TimeoutError):
+            log.warning(
+                "Engine didn't get ready after reset",
+                extra={"task": subprocess.defname},
+            )
+        finally:
+            subprocess.disconnect(cid)
+            self.resetting.pop(subprocess, None)
+
+        if not ready.is_set() or not isAlive(subprocess) or not self.size:
+            quitProcess(subprocess)
+            return
+
+        while self.idle and len(self.idle) >= self.size:
+            self.__quit(self.idle[0])
+
+        entry = []
+        died_cid = subprocess.connect("died", lambda subprocess: self.__quit(entry))
+        timer = asyncio.get_running_loop().call_later(
+            IDLE_TIMEOUT, lambda: self.__quit(entry)
+        )
+        entry[:] = [key, subprocess, died_cid, timer]
+        self.idle.append(entry)
+
+    def __quit(self, entry):
+        if entry not in self.idle:
+            return
+        self.idle.remove(entry)
+        key, subprocess, died_cid, timer = entry
+        timer.cancel()
+        subprocess.disconnect(died_cid)
+        if isAlive(subprocess):
+            quitProcess(subprocess)
+
+    def clear(self):
+        """Quits the idle processes. Returns the asyncio processes of the
+        quit ones, and of the ones being reset."""
+        processes = [entry[1].proc for entry in self.idle]
+        processes += [subprocess.proc for subprocess in self.resetting]
+        while self.idle:
+            self.__quit(self.idle[0])
+        for subprocess, task in list(self.resetting.items()):
+            task.cancel()
+            quitProcess(subprocess)
+        self.resetting.clear()
+        return processes
+
+
+enginePool = EnginePool()
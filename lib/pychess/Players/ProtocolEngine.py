@@ -1,7 +1,12 @@
 from gi.repository import GObject
 
 from pychess.Players.Engine import Engine
+from pychess.System import conf
+from pychess.Utils.AnalysisCache import analysisCache
 from pychess.Utils.const import NORMAL, ANALYZING, INVERSE_ANALYZING
+from pychess.Utils.logic import validate
+from pychess.Utils.lutils.lmove import ParsingError
+from pychess.Utils.Move import parseAny
 
 TIME_OUT_SECOND = 60
 
@@ -28,6 +33,53 @@ class ProtocolEngine(Engine):
         self.connected = True
         self.mode = NORMAL
         self.analyzing_paused = False
+        self.analysis_depth = None
 
     def isAnalyzing(self):
         return self.mode in (ANALYZING, INVERSE_ANALYZING)
+
+    # Analysis cache
+
+    def on_analysis(self, engine, analysis):
+        Engine.on_analysis(self, engine, analysis)
+        # Without the md5 sum of the engine we don't know whose analysis it is
+        if not self.md5 or not self.isAnalyzing():
+            return
+        if not analysis or analysis[0] is None:
+            return
+        ply, pv, score, depth, nps = analysis[0]
+        board = self.board
+        if board is None or ply != board.ply or score is None or not pv:
+            return
+        try:
+            depth = int(depth)
+        except (TypeError, ValueError):
+            return
+        if not analysisCache.wants(board, self.md5, depth):
+            return
+        # Lines of the previous position may still come in
+        try:
+            if not validate(board, parseAny(board, pv[0])):
+                return
+        except ParsingError:
+            return
+        analysisCache.put(board, self.md5, depth, score, pv)
+
+    def _answerFromCache(self):
+        """Emits the cached analysis line of the board, if any. Returns True
+        if it is as deep as the analysis would go, so no search is needed."""
+        if not self.md5 or not self.isAnalyzing() or self.board is None:
+            return False
+        entry = analysisCache.get(self.board, self.md5)
+        if entry is None:
+            return False
+        depth, score, pv = entry
+        self.emit("analyze", [(self.board.ply, pv, score, str(depth), "")])
+
+        if self.analysis_depth is not None:
+            target = int(self.analysis_depth)
+        elif not conf.get("infinite_depth"):
+            target = int(conf.get("max_depth_spin"))
+        else:
+            return False
+        return depth >= target and self.getAnalysisLines() == 1
@@ -11,6 +11,7 @@ try:
     from pychess.Utils.book import getOpenings  # nopep8
     from pychess.Utils.const import (
         WHITE,
+        NORMALCHESS,
         ASEANCHESS,
         SITTUYINCHESS,
         ATOMICCHESS,
@@ -30,8 +31,11 @@ try:
         PLACEMENTCHESS,
     )  # nopep8
     from pychess.Utils.lutils import lsearch  # nopep8
+    from pychess.Utils.lutils.leval import evaltable  # nopep8
+    from pychess.Utils.lutils.lsmp import SearchPool  # nopep8
+    from pychess.Utils.lutils.TranspositionTable import TranspositionTable  # nopep8
     from pychess.Utils.lutils.ldata import MAXPLY  # nopep8
-    from pychess.Utils.lutils.lsearch import alphaBeta  # nopep8
+    from pychess.Utils.lutils.lsearch import aspirationSearch  # nopep8
     from pychess.Utils.lutils.lmove import listToSan, toSAN  # nopep8
     from pychess.System.Log import log  # nopep8
 except ImportError:
@@ -55,6 +59,12 @@ class PyChess:
         self.post = False
         self.debug = True
         self.outOfBook = False
+        self.cores = 1
+        self.pool = None
+        # file the transposition table is saved to between sessions, and the
+        # variant of the positions in the table
+        self.hashPath = None
+        self.hashVariant = NORMALCHESS
 
     def print(self, text):
         try:
@@ -63,6 +73,68 @@ class PyChess:
         except BrokenPipeError:
             sys.exit(0)
 
+    def setCores(self, cores):
+        """Uses cores - 1 Lazy SMP helper processes in searches"""
+        self.cores = cores
+        if cores > 1 and not lsearch.table.shared:
+            lsearch.table = TranspositionTable(lsearch.table.size, shared=True)
+            self.loadHash()
+        self.__restartPool()
+
+    def setHashSize(self, size):
+        """Resizes the transposition table to size bytes"""
+        lsearch.table.resize(size)
+        self.loadHash()
+        self.__restartPool()
+
+    def setHashPath(self, path):
+        """Sets the file the transposition tables are saved to by saveHash()
+        and loads the table saved there, if any. Each variant has its own
+        file next to it."""
+        self.hashPath = path
+        self.loadHash()
+
+    def setHashVariant(self, variant):
+        """Replaces the transposition table with the saved one of variant"""
+        if variant != self.hashVariant:
+            self.saveHash()
+            lsearch.table.clear()
+            self.hashVariant = variant
+            self.loadHash()
+
+    def hashFile(self):
+        if self.hashVariant == NORMALCHESS:
+            return self.hashPath
+        root, ext = os.path.splitext(self.hashPath)
+        return "%s-%d%s" % (root, self.hashVariant, ext)
+
+    def loadHash(self):
+        if self.hashPath is not None and lsearch.table.load(
+            self.hashFile(), self.hashVariant
+        ):
+            self.print("# Loaded transposition table from %s" % self.hashFile())
+
+    def saveHash(self):
+        if self.hashPath is not None:
+            try:
+                lsearch.table.save(self.hashFile(), self.hashVariant)
+            except OSError as err:
+                log.warning("Can't save transposition table: %s" % err)
+
+    def __restartPool(self):
+        # helper processes have to be started with the actual table
+        if self.pool is not None:
+            self.pool.close()
+            self.pool = None
+        if self.cores > 1:
+            self.pool = SearchPool(self.cores, lsearch.table)
+
+    def __nodes(self):
+        """Nodes searched by the main search and the helper processes"""
+        if self.pool is None:
+            return lsearch.nodes
+        return lsearch.nodes + self.pool.nodes
+
     # Play related
 
     def __remainingMovesA(self):
@@ -147,6 +219,8 @@ class PyChess:
 
             prevtime = 0
             starttime = time()
+            lsearch.table.resetStats()
+            evaltable.resetStats()
             lsearch.endtime = starttime + usetime if timed else sys.maxsize
             if self.debug:
                 if timed:
@@ -157,6 +231,9 @@ class PyChess:
                 else:
                     self.print("# Searching to depth %d without timelimit" % self.sd)
 
+            if self.pool is not None:
+                self.pool.start(self.board, self.sd)
+            score = None
             for depth in range(1, self.sd + 1):
                 # Heuristic time saving
                 # Don't waste time, if the estimated isn't enough to complete
@@ -164,9 +241,10 @@ class PyChess:
                 if depth > 1 and timed and usetime <= prevtime * 4 and usetime > 1:
                     break
                 lsearch.timecheck_counter = lsearch.TIMECHECK_FREQ
-                search_result = alphaBeta(self.board, depth)
+                search_result = aspirationSearch(self.board, depth, score)
                 if lsearch.searching:
                     mvs, self.scr = search_result
+                    score = self.scr
                     if time() > lsearch.endtime:
                         break
                     if self.post:
@@ -174,7 +252,7 @@ class PyChess:
                         time_cs = int(100 * (time() - starttime))
                         self.print(
                             "{} {} {} {} {}".format(
-                                depth, self.scr, time_cs, lsearch.nodes, pv1
+                                depth, self.scr, time_cs, self.__nodes(), pv1
                             )
                         )
                 else:
@@ -185,6 +263,14 @@ class PyChess:
                 prevtime = time() - starttime - prevtime
 
                 self.clock[self.playingAs] -= time() - starttime - self.increment
+            if self.pool is not None:
+                self.pool.stop()
+            if self.debug:
+                self.print(
+                    "# hashfull %d, hits %d, collisions %d permille"
+                    % lsearch.table.stats()
+                )
+                self.print("# eval hash hits %d permille" % evaltable.hitRate())
 
             if not mvs:
                 if not lsearch.searching:
@@ -225,17 +311,27 @@ class PyChess:
         lsearch.endtime = sys.maxsize
         lsearch.searching = True
 
+        if self.pool is not None:
+            self.pool.start(self.board, self.sd)
+        pool_nodes = 0
+        scr = None
         for depth in range(1, self.sd):
             if not lsearch.searching:
                 break
             board = self.board.clone()
-            mvs, scr = alphaBeta(board, depth)
+            mvs, scr = aspirationSearch(board, depth, scr)
 
             pv1 = " ".join(listToSan(board, mvs))
             time_cs = int(100 * (time() - start))
-            self.print(f"{depth} {scr} {time_cs} {lsearch.nodes} {pv1}")
+            # helper nodes are counted since the start of the analysis
+            helper_nodes = self.pool.nodes if self.pool is not None else 0
+            nodes = lsearch.nodes + helper_nodes - pool_nodes
+            self.print(f"{depth} {scr} {time_cs} {nodes} {pv1}")
 
             lsearch.nodes = 0
+            pool_nodes = helper_nodes
+        if self.pool is not None:
+            self.pool.stop()
 
 
 if __name__ == "__main__":
@@ -6,6 +6,7 @@ from threading import Thread
 import pychess
 from pychess.Players.PyChess import PyChess
 from pychess.System import conf, fident
+from pychess.System.prefix import addUserCachePrefix
 from pychess.Utils.book import getOpenings
 from pychess.Utils.const import (
     NORMALCHESS,
@@ -96,10 +97,19 @@ class PyChessCECP(PyChess):
             "pause": 0,  # Unimplemented
             "nps": 0,  # Unimplemented
             "debug": 1,
-            "memory": 0,  # Unimplemented
-            "smp": 0,  # Unimplemented
+            "memory": 1,
+            "smp": 1,
             "egt": "gaviota",
-            "option": "skipPruneChance -slider 0 0 100",
+            "option": [
+                "skipPruneChance -slider 0 0 100",
+                "persistentHash -check 0",
+                "nullMovePruning -check 1",
+                "lateMoveReductions -check 1",
+                "futilityPruning -check 1",
+                "aspirationWindows -check 1",
+                "evalHashSize -spin %d 0 1048576" % (leval.EVAL_TABLE_SIZE // 1024),
+                "pawnHashSize -spin %d 1 1048576" % (leval.PAWN_TABLE_SIZE // 1024),
+            ],
         }
         python = sys.executable.split("/")[-1]
         python_version = "%s.%s.%s" % sys.version_info[0:3]
@@ -138,7 +148,8 @@ class PyChessCECP(PyChess):
                 elif lines[0] == "protover":
                     stringPairs = [
                         "=".join([k, '"%s"' % v if isinstance(v, str) else str(v)])
-                        for k, v in self.features.items()
+                        for k, values in self.features.items()
+                        for v in (values if isinstance(values, list) else [values])
                     ]
                     self.print("feature %s" % " ".join(stringPairs))
                     self.print("feature done=1")
@@ -158,6 +169,10 @@ class PyChessCECP(PyChess):
                     self.clock[:] = self.basetime, self.basetime
                     self.searchtime = 0
                     self.sd = MAXPLY
+                    # Cached evaluations don't carry the variant they were
+                    # made in
+                    leval.evaltable.clear()
+                    self.setHashVariant(NORMALCHESS)
                     if self.analyzing:
                         self.__analyze()
 
@@ -210,10 +225,14 @@ class PyChessCECP(PyChess):
                         elif lines[1] == "light-brigade":
                             self.board = LBoard(LIGHTBRIGADECHESS)
                             self.board.applyFen(LIGHTBRIGADESTART)
+                        self.board.iniMaterial()
+                        leval.evaltable.clear()
+                        self.setHashVariant(self.board.variant)
 
                 elif lines[0] == "quit":
                     self.forced = True
                     self.__stopSearching()
+                    self.saveHash()
                     sys.exit(0)
 
                 elif lines[0] == "random":
@@ -364,18 +383,23 @@ class PyChessCECP(PyChess):
                 elif lines[0] == "memory":
                     # FIXME: this is supposed to control the *total* memory use.
                     if lsearch.searching:
-                        self.print("Error (already searching):", line)
+                        self.print("Error (already searching): %s" % line)
                     else:
                         limit = int(lines[1])
                         if limit < 1:
-                            self.print("Error (limit too low):", line)
-                        else:
-                            pass
-                            # TODO implement
-                            # lsearch.setHashSize(limit)
+                            self.print("Error (limit too low): %s" % line)
+                        elif limit * 1024 * 1024 != lsearch.table.size:
+                            self.setHashSize(limit * 1024 * 1024)
 
                 elif lines[0] == "cores":
-                    pass  # We aren't SMP-capable.
+                    if lsearch.searching:
+                        self.print("Error (already searching): %s" % line)
+                    else:
+                        cores = int(lines[1])
+                        if cores < 1:
+                            self.print("Error (cores too low): %s" % line)
+                        elif cores != self.cores:
+                            self.setCores(cores)
 
                 elif lines[0] == "egtpath":
                     if len(lines) >= 3 and lines[1] == "gaviota":
@@ -400,6 +424,20 @@ class PyChessCECP(PyChess):
                             self.print(
                                 "Error (argument must be an integer 0..100): %s" % line
                             )
+                    elif name == "persistentHash":
+                        self.setHashPath(
+                            addUserCachePrefix("pychess_engine.hash") if value else None
+                        )
+                    elif name in lsearch.SEARCH_OPTIONS:
+                        setattr(lsearch, name, bool(value))
+                    elif name in ("evalHashSize", "pawnHashSize"):
+                        # sizes are given in kB
+                        if lsearch.searching:
+                            self.print("Error (already searching): %s" % line)
+                        elif name == "evalHashSize":
+                            leval.evaltable.resize(value * 1024)
+                        else:
+                            leval.resizePawnTable(value * 1024)
 
                 # CECP analyze mode commands
                 # See http://www.gnu.org/software/xboard/engine-intf.html#11
@@ -434,11 +472,24 @@ class PyChessCECP(PyChess):
                         ]
                     )
 
+                elif lines[0] == "hashstats":
+                    self.print(
+                        "# size %d MB, hashfull %d, hits %d, collisions %d permille"
+                        % (
+                            (lsearch.table.size // (1024 * 1024),)
+                            + lsearch.table.stats()
+                        )
+                    )
+                    self.print(
+                        "# eval hash size %d kB, hits %d permille"
+                        % (leval.evaltable.size // 1024, leval.evaltable.hitRate())
+                    )
+
                 elif lines[0] == "benchmark":
                     if len(lines) > 1:
-                        benchmark(int(lines[1]))
+                        benchmark(int(lines[1]), self.cores)
                     else:
-                        benchmark()
+                        benchmark(cores=self.cores)
 
                 elif lines[0] == "profile":
                     if len(lines) > 1:
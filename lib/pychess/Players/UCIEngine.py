@@ -29,6 +29,7 @@ from pychess.System import conf
 from pychess.System.Log import log
 from pychess.Variants.fischerandom import FischerandomBoard
 
+from .EnginePool import enginePool
 from .ProtocolEngine import ProtocolEngine, TIME_OUT_SECOND
 from pychess.Players.Player import PlayerIsDead, TurnInterrupt, InvalidMove
 
@@ -70,7 +71,6 @@ class UCIEngine(ProtocolEngine):
         self.uciPosition = "startpos"
         self.uciPositionListsMoves = False
         self.analysis = [None]
-        self.analysis_depth = None
 
         self.queue = asyncio.Queue()
         self.parse_line_task = asyncio.create_task(self.parseLine(self.engine))
@@ -161,17 +161,19 @@ class UCIEngine(ProtocolEngine):
 
     def kill(self, reason):
         """Kills the engine, starting with the 'stop' and 'quit' commands, then
-        trying sigterm and eventually sigkill.
+        trying sigterm and eventually sigkill. Engines that ended normally
+        are given back to the engine pool instead.
         Returns the exitcode, or if engine have already been killed, the
         method returns None"""
         if self.connected:
             self.connected = False
             try:
                 try:
-                    print("stop", file=self.engine)
-                    print("quit", file=self.engine)
+                    if reason == WON_ADJUDICATION or not enginePool.release(self):
+                        print("stop", file=self.engine)
+                        print("quit", file=self.engine)
+                        self.engine.terminate()
                     self.queue.put_nowait("del")
-                    self.engine.terminate()
 
                 except OSError as e:
                     # No need to raise on a hang up error, as the engine is dead
@@ -237,7 +239,7 @@ class UCIEngine(ProtocolEngine):
                 await self.bestmove_event.wait()
 
             self._recordMove(board, None, None)
-            if search:
+            if search and not self._answerFromCache():
                 self._searchNow()
 
         asyncio.create_task(coro())
@@ -259,7 +261,7 @@ class UCIEngine(ProtocolEngine):
                 await self.bestmove_event.wait()
 
             self._recordMove(board1, move, board2)
-            if not self.analyzing_paused:
+            if not self.analyzing_paused and not self._answerFromCache():
                 self._searchNow()
 
         asyncio.create_task(coro())
@@ -485,6 +487,23 @@ class UCIEngine(ProtocolEngine):
     def hasOption(self, key):
         return key in self.options
 
+    def poolReset(self, options, ping):
+        """The commands resetting the engine to a new game, with the options
+        changed for this game set back to the configured ones, and the line
+        the engine answers when done"""
+        commands = ["stop"]
+        for option, value in self.optionsToBeSent.items():
+            if option not in self.options:
+                continue
+            default = options.get(option, self.options[option].get("default"))
+            if default is None or default == value:
+                continue
+            if isinstance(default, bool):
+                default = str(default).lower()
+            commands.append(f"setoption name {option} value {str(default)}")
+        commands += ["ucinewgame", "isready"]
+        return commands, "readyok"
+
     # Internal
 
     def _newGame(self):
@@ -32,6 +32,7 @@ from pychess.Utils.const import (
     NORMALCHESS,
 )
 from pychess.Players.CECPEngine import CECPEngine
+from pychess.Players.EnginePool import enginePool
 from pychess.Players.UCIEngine import UCIEngine
 from pychess.Players.engineList import PYTHONBIN, VM_LIST, ENGINES_LIST
 from pychess.Variants import variants
@@ -40,6 +41,9 @@ attrToProtocol = {"uci": UCIEngine, "xboard": CECPEngine}
 
 ENGINE_DEFAULT_LEVEL = 20
 
+# Number of engines started at the same time to discover their options
+DISCOVERY_LIMIT = min(8, max(4, os.cpu_count() or 1))
+
 
 class SubProcessError(Exception):
     pass
@@ -191,15 +195,16 @@ class EngineDiscoverer(GObject.GObject):
         return engine
 
     async def __discoverE(self, engine):
-        subproc = await self.initEngine(engine, BLACK, False)
-        subproc.connect("readyForOptions", self.__discoverE2, engine)
-        subproc.prestart()  # Sends the 'start line'
+        async with self.discoverySlots:
+            subproc = await self.initEngine(engine, BLACK, False)
+            subproc.connect("readyForOptions", self.__discoverE2, engine)
+            subproc.prestart()  # Sends the 'start line'
 
-        event = asyncio.Event()
-        is_dead = set()
-        subproc.start(event, is_dead)
+            event = asyncio.Event()
+            is_dead = set()
+            subproc.start(event, is_dead)
 
-        await event.wait()
+            await event.wait()
 
         if is_dead:
             # Check if the player died after engine_discovered by our own hands
@@ -245,10 +250,20 @@ class EngineDiscoverer(GObject.GObject):
         if engine.get("md5") is None:
             return True
 
+        # Binaries of the same size and modification time are not hashed again
+        stat = os.stat(path)
+        if (
+            engine.get("size") == stat.st_size
+            and engine.get("mtime") == stat.st_mtime_ns
+        ):
+            return False
+
         md5sum = md5_sum(path)
         if engine.get("md5") != md5sum:
             return True
 
+        engine["size"] = stat.st_size
+        engine["mtime"] = stat.st_mtime_ns
         return False
 
     def __clean(self, rundata, engine):
@@ -257,6 +272,7 @@ class EngineDiscoverer(GObject.GObject):
         """
         vmpath, path = rundata
         md5sum = md5_sum(path)
+        stat = os.stat(path)
 
         # Find the referenced engine
         refeng = self.getReferencedEngine(engine["name"])
@@ -272,6 +288,8 @@ class EngineDiscoverer(GObject.GObject):
         # Clean it
         engine["command"] = path
         engine["md5"] = md5sum
+        engine["size"] = stat.st_size
+        engine["mtime"] = stat.st_mtime_ns
         if vmpath is not None:
             engine["vm_command"] = vmpath
         if "variants" in engine:
@@ -354,10 +372,15 @@ class EngineDiscoverer(GObject.GObject):
         if self.toBeRechecked:
             self.emit("discovering_started", self.toBeRechecked.keys())
             self.connect("all_engines_discovered", self.save)
+            # Limit the number of engines probed at the same time
+            self.discoverySlots = asyncio.Semaphore(DISCOVERY_LIMIT)
             for engine, done in self.toBeRechecked.values():
                 if not done:
                     asyncio.create_task(self.__discoverE(engine))
         else:
+            # Keep the sizes and modification times of newly hashed binaries
+            if self.hasChanged():
+                self.save()
             self.emit("all_engines_discovered")
             createStoryTextAppEvent("all_engines_discovered")
 
@@ -544,7 +567,7 @@ class EngineDiscoverer(GObject.GObject):
     def getCountry(self, engine):
         return engine.get("country")
 
-    async def initEngine(self, engine, color, lowPriority):
+    async def initEngine(self, engine, color, lowPriority, variant=None):
         name = engine["name"]
         protocol = engine["protocol"]
         protover = 2 if engine.get("protover") is None else engine.get("protover")
@@ -565,23 +588,29 @@ class EngineDiscoverer(GObject.GObject):
         else:
             workdir = getEngineDataPrefix()
         warnwords = ("illegal", "error", "exception")
-        try:
-            subprocess = SubProcess(
-                path,
-                args=args,
-                warnwords=warnwords,
-                cwd=workdir,
-                lowPriority=lowPriority,
-            )
-            await subprocess.start()
-        except OSError:
-            raise PlayerIsDead
-        except asyncio.TimeoutError:
-            raise PlayerIsDead
-        except GLib.GError:
-            raise PlayerIsDead
-        except Exception:
-            raise PlayerIsDead
+
+        # Reuse an engine process of a finished game, if there is one
+        key, options = enginePool.key(engine, lowPriority, variant)
+        subprocess = enginePool.acquire(key)
+        if subprocess is None:
+            try:
+                subprocess = SubProcess(
+                    path,
+                    args=args,
+                    warnwords=warnwords,
+                    cwd=workdir,
+                    lowPriority=lowPriority,
+                )
+                await subprocess.start()
+            except OSError:
+                raise PlayerIsDead
+            except asyncio.TimeoutError:
+                raise PlayerIsDead
+            except GLib.GError:
+                raise PlayerIsDead
+            except Exception:
+                raise PlayerIsDead
+        enginePool.register(subprocess, key, options)
 
         engine_proc = attrToProtocol[protocol](subprocess, color, protover, md5_engine)
         engine_proc.setName(name)
@@ -590,14 +619,8 @@ class EngineDiscoverer(GObject.GObject):
         # where they should be set.
 
         def optionsCallback(set_option):
-            if engine.get("options"):
-                for option in engine["options"]:
-                    key = option["name"]
-                    value = option.get("value")
-                    if (value is not None) and option["default"] != value:
-                        if protocol == "xboard" and option["type"] == "check":
-                            value = int(bool(value))
-                        set_option.setOption(key, value)
+            for key, value in options.items():
+                set_option.setOption(key, value)
 
         engine_proc.connect("readyForOptions", optionsCallback)
 
@@ -614,7 +637,7 @@ class EngineDiscoverer(GObject.GObject):
         moves=0,
         forcePonderOff=False,
     ):
-        engine = await self.initEngine(engine, color, False)
+        engine = await self.initEngine(engine, color, False, variant)
 
         def optionsCallback(engine):
             engine.setOptionStrength(diffi, forcePonderOff)
@@ -627,7 +650,7 @@ class EngineDiscoverer(GObject.GObject):
         return engine
 
     async def initAnalyzerEngine(self, engine, mode, variant):
-        engine = await self.initEngine(engine, WHITE, True)
+        engine = await self.initEngine(engine, WHITE, True, variant)
 
         def optionsCallback(engine):
             engine.setOptionAnalyzing(mode)
@@ -1,5 +1,5 @@
 import datetime
-from pychess.Utils.const import RUNNING
+from pychess.Utils.const import NORMALCHESS, RUNNING
 
 
 class LoadingError(Exception):
@@ -91,7 +91,7 @@ class ChessFile:
     def get_variant(self, gameno):
         return 0
 
-    def get_book_moves(self, fen=None):
+    def get_book_moves(self, fen=None, variant=NORMALCHESS):
         return []
 
     def get_info(self, gameno):
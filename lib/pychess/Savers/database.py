@@ -1,6 +1,7 @@
 import re
 
 from sqlalchemy import select, func, and_, or_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 from pychess.Utils.const import FEN_START, WHITE, BLACK, reprResult
 from pychess.Database import model as dbmodel
@@ -14,6 +15,10 @@ from pychess.Database.model import (
     annotator,
     source,
     tag_game,
+    pgn_state,
+    book_move,
+    book_state,
+    game_moves,
 )
 
 
@@ -38,6 +43,11 @@ def parseDateTag(tag):
     return y, m, d
 
 
+def signed_hash(hash):
+    """Converts an unsigned 64 bit position hash to fit sqlite INTEGER"""
+    return hash - (1 << 64) if hash >= (1 << 63) else hash
+
+
 def save(path, model, offset, flip=False):
     game_event = model.tags["Event"]
     game_site = model.tags["Site"]
@@ -191,11 +201,194 @@ class TagDatabase:
     def close(self):
         self.engine.dispose()
 
+    def get_pgn_state(self):
+        """Returns (size, digest) of the .pgn content imported last time or None"""
+        with self.engine.connect() as connection:
+            return connection.execute(
+                select(pgn_state.c.size, pgn_state.c.digest)
+            ).first()
+
+    def set_pgn_state(self, size, digest):
+        with self.engine.begin() as connection:
+            connection.execute(pgn_state.delete())
+            connection.execute(
+                pgn_state.insert().values(id=1, size=size, digest=digest)
+            )
+
+    def delete_last_game(self):
+        """Deletes the game with the biggest offset and returns its offset"""
+        with self.engine.begin() as connection:
+            last = connection.execute(
+                select(game.c.id, game.c.offset).order_by(game.c.offset.desc()).limit(1)
+            ).first()
+            if last is None:
+                return 0
+            connection.execute(tag_game.delete().where(tag_game.c.game_id == last.id))
+            connection.execute(game.delete().where(game.c.id == last.id))
+            connection.execute(
+                game_moves.delete().where(game_moves.c.offset == last.offset)
+            )
+        return last.offset
+
+    def get_last_offset(self):
+        """Returns the biggest game offset, or 0 if there are no games"""
+        with self.engine.connect() as connection:
+            last = connection.execute(select(func.max(game.c.offset))).scalar()
+        return last or 0
+
+    def get_game_moves(self, offset):
+        """Returns (moves, comments) of a game stored by set_game_moves() or None"""
+        with self.engine.connect() as connection:
+            return connection.execute(
+                select(game_moves.c.moves, game_moves.c.comments).where(
+                    game_moves.c.offset == offset
+                )
+            ).first()
+
+    def set_game_moves(self, offset, moves, comments):
+        stmt = sqlite_insert(game_moves).on_conflict_do_nothing()
+        with self.engine.begin() as connection:
+            connection.execute(
+                stmt, {"offset": offset, "moves": moves, "comments": comments}
+            )
+
+    def get_index_games(self, start=0, chunk=1000):
+        """Yields the columns of games needed to replay them in offset order
+        starting from the game at offset start. Games are fetched in chunks,
+        so the database isn't kept locked while the caller works."""
+        while True:
+            with self.engine.connect() as connection:
+                rows = connection.execute(
+                    select(
+                        game.c.offset,
+                        game.c.result,
+                        game.c.variant,
+                        game.c.fen,
+                        game.c.white_elo,
+                        game.c.black_elo,
+                        game.c.date,
+                    )
+                    .where(game.c.offset >= start)
+                    .order_by(game.c.offset)
+                    .limit(chunk)
+                ).fetchall()
+            yield from rows
+            if len(rows) < chunk:
+                return
+            start = rows[-1].offset + 1
+
+    def iter_games(self, tag_query=None, chunk=1000):
+        """Yields the header tag records of games in offset order.
+        Unlike get_records() it doesn't change the filter and order state
+        used by the database perspective. Records are fetched in chunks,
+        so the database isn't kept locked while the caller works."""
+        query = self.select
+        where = self.tags_clause(tag_query)
+        if where is not None:
+            query = query.where(where)
+        query = query.order_by(game.c.offset).limit(chunk)
+
+        last_offset = -1
+        while True:
+            with self.engine.connect() as connection:
+                records = (
+                    connection.execute(query.where(game.c.offset > last_offset))
+                    .mappings()
+                    .fetchall()
+                )
+            yield from records
+            if len(records) < chunk:
+                break
+            last_offset = records[-1]["Offset"]
+
+    def get_book_state(self):
+        """Returns (size, digest, last_offset) of the .pgn content
+        the opening tree was built from or None"""
+        with self.engine.connect() as connection:
+            return connection.execute(
+                select(book_state.c.size, book_state.c.digest, book_state.c.last_offset)
+            ).first()
+
+    def set_book_state(self, size, digest, last_offset):
+        with self.engine.begin() as connection:
+            connection.execute(book_state.delete())
+            connection.execute(
+                book_state.insert().values(
+                    id=1, size=size, digest=digest, last_offset=last_offset
+                )
+            )
+
+    def clear_book(self):
+        with self.engine.begin() as connection:
+            connection.execute(book_move.delete())
+            connection.execute(book_state.delete())
+
+    def add_book_moves(self, stats):
+        """Adds {(hash, move): [games, white_won, black_won, draw, elo_sum,
+        elo_games, year]} stats to the opening tree. Negative counts remove
+        the stats of games added earlier.
+        The year is the latest year of the games added, it is kept when
+        games are removed, so afterwards it is only an upper bound."""
+        if not stats:
+            return
+        stmt = sqlite_insert(book_move)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[book_move.c.hash, book_move.c.move],
+            set_={
+                "games": book_move.c.games + stmt.excluded.games,
+                "white_won": book_move.c.white_won + stmt.excluded.white_won,
+                "black_won": book_move.c.black_won + stmt.excluded.black_won,
+                "draw": book_move.c.draw + stmt.excluded.draw,
+                "elo_sum": book_move.c.elo_sum + stmt.excluded.elo_sum,
+                "elo_games": book_move.c.elo_games + stmt.excluded.elo_games,
+                "year": func.max(book_move.c.year, stmt.excluded.year),
+            },
+        )
+        rows = [
+            {
+                "hash": signed_hash(key[0]),
+                "move": key[1],
+                "games": stat[0],
+                "white_won": stat[1],
+                "black_won": stat[2],
+                "draw": stat[3],
+                "elo_sum": stat[4],
+                "elo_games": stat[5],
+                "year": stat[6],
+            }
+            for key, stat in stats.items()
+        ]
+        with self.engine.begin() as connection:
+            connection.execute(stmt, rows)
+            connection.execute(book_move.delete().where(book_move.c.games <= 0))
+
+    def get_book_moves(self, hash):
+        """Returns the opening tree rows of a position hash"""
+        with self.engine.connect() as connection:
+            return connection.execute(
+                select(
+                    book_move.c.move,
+                    book_move.c.games,
+                    book_move.c.white_won,
+                    book_move.c.black_won,
+                    book_move.c.draw,
+                    book_move.c.elo_sum,
+                    book_move.c.elo_games,
+                    book_move.c.year,
+                )
+                .where(book_move.c.hash == signed_hash(hash))
+                .order_by(book_move.c.games.desc())
+            ).fetchall()
+
     def build_order_by(self, order_col, is_desc):
         self.is_desc = is_desc
         self.order_cols = (order_col, game.c.offset)
 
     def build_where_tags(self, tag_query):
+        self.where_tags = self.tags_clause(tag_query)
+
+    def tags_clause(self, tag_query):
+        """Where clause of a tag filter query dict or None"""
         if tag_query is not None:
             tags = []
             if "white" in tag_query:
@@ -271,9 +464,9 @@ class TagDatabase:
                 tags.append(game.c.white_elo <= tag_query["elo_to"])
                 tags.append(game.c.black_elo <= tag_query["elo_to"])
 
-            self.where_tags = and_(*tags)
+            return and_(*tags)
         else:
-            self.where_tags = None
+            return None
 
     def build_where_offs8(self, offset_list):
         if offset_list is not None and len(offset_list) > 0:
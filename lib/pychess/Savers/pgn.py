@@ -1,5 +1,7 @@
 import shutil
 import collections
+from array import array
+import mmap
 import os
 from io import StringIO
 from os.path import getmtime
@@ -39,6 +41,7 @@ from pychess.Utils.const import (
     TOOL_NONE,
     TOOL_CHESSDB,
     TOOL_SCOUTFISH,
+    TOOL_POSITION_INDEX,
 )
 from pychess.System import conf
 from pychess.System.Log import log
@@ -46,7 +49,7 @@ from pychess.System.protoopen import PGN_ENCODING
 from pychess.System.prefix import getEngineDataPrefix
 from pychess.Utils.lutils.LBoard import LBoard
 from pychess.Utils.GameModel import GameModel
-from pychess.Utils.lutils.lmove import toSAN, parseAny, ParsingError
+from pychess.Utils.lutils.lmove import toSAN, toAN, parseAny, ParsingError
 from pychess.Utils.Move import Move
 from pychess.Utils.elo import get_elo_rating_change_pgn
 from pychess.Utils.logic import getStatus
@@ -56,11 +59,22 @@ from pychess.Savers.ChessFile import ChessFile, LoadingError
 from pychess.Savers.database import col2label, TagDatabase, parseDateTag
 from pychess.System.cpu import get_cpu
 from pychess.Database import model as dbmodel
-from pychess.Database.PgnImport import TAG_REGEX, pgn2Const, PgnImport
+from pychess.Database import dbwalk
+from pychess.Database.PgnImport import (
+    TAG_REGEX,
+    pgn2Const,
+    PgnImport,
+    pgn_digests,
+    read_movetext,
+)
+from pychess.Database.PositionIndex import (
+    PositionIndex,
+    read_records,
+    read_state,
+    write_index,
+)
 from pychess.Database.model import (
     game,
-    create_indexes,
-    drop_indexes,
     metadata,
     ini_schema_version,
 )
@@ -454,6 +468,121 @@ else:
     parser = "parser_x{}{}{}".format(cpuinfo["bitness"], MODERN, cpuinfo["binext"])
 chess_db_path = shutil.which(parser, mode=os.X_OK, path=altpath)
 
+# The opening tree contains the moves of the first plies of the games
+OPENING_TREE_PLIES = 30
+# Write the collected opening tree stats to .sqlite after this many moves
+OPENING_TREE_FLUSH = 200000
+
+
+def game_board(variant, fenstr):
+    """Initial LBoard of a game record or None if its FEN is invalid"""
+    board = LBoard(variant) if variant else LBoard()
+    try:
+        board.applyFen(fenstr if fenstr else FEN_START)
+    except SyntaxError:
+        return None
+    return board
+
+
+def add_opening_tree_stats(stats, rec, positions, sign=1):
+    """Adds (or removes if sign is -1) the opening tree move stats of the
+    (hash, ply, move, color) positions of a game record to stats"""
+    won = (
+        sign if rec.result == WHITEWON else 0,
+        sign if rec.result == BLACKWON else 0,
+        sign if rec.result == DRAW else 0,
+    )
+    elos = [
+        int(elo) if elo and elo.isdigit() else 0
+        for elo in (rec.white_elo, rec.black_elo)
+    ]
+    date = rec.date or ""
+    year = int(date[:4]) if date[:4].isdigit() else 0
+
+    for hash, ply, lmove, color in positions:
+        if not lmove:
+            break
+        key = (hash, lmove)
+        stat = stats.get(key)
+        if stat is None:
+            stat = stats[key] = [0, 0, 0, 0, 0, 0, 0]
+        stat[0] += sign
+        stat[1] += won[0]
+        stat[2] += won[1]
+        stat[3] += won[2]
+        elo = elos[color]
+        if elo:
+            stat[4] += sign * elo
+            stat[5] += sign
+        if year > stat[6]:
+            stat[6] = year
+
+
+def mainline(board, movetext, plies=-1, comments=None):
+    """Yields the mainline lmoves of a movetext. Every move is applied to
+    the board after it was yielded, so the caller sees the position the
+    move was played from. Stops after plies moves (-1 for all) or at the
+    first move which can't be parsed.
+    If a comments dict is given, the mainline comments are collected into it
+    as {n: [comment, ...]} where n is the number of moves before them."""
+    parenthesis = 0
+    moves = 0
+    for m in pattern.finditer(movetext):
+        group = m.lastindex
+        if group == VARIATION_START:
+            parenthesis += 1
+        elif group == VARIATION_END:
+            parenthesis -= 1
+        elif parenthesis == 0:
+            if group == FULL_MOVE:
+                if plies == 0:
+                    break
+                try:
+                    lmove = parseAny(board, m.group(MOVE))
+                except Exception:
+                    break
+                yield lmove
+                board.applyMove(lmove)
+                plies -= 1
+                moves += 1
+            elif group == RESULT:
+                break
+            elif comments is not None:
+                text = m.group(group)
+                if group == COMMENT_BRACE:
+                    lines = text[1:-1].splitlines()
+                    comments.setdefault(moves, []).append(
+                        " ".join([line.strip() for line in lines])
+                    )
+                elif group == COMMENT_REST:
+                    comments.setdefault(moves, []).append(text[1:])
+
+
+def parse_eval(comment):
+    """Returns (centipawns from white's point of view, depth) of the
+    [%eval] command of a comment or None"""
+    match = move_eval_re.search(comment)
+    if match is None:
+        return None
+    sign, num, fraction, depth = match.groups()
+    sign = 1 if sign is None or sign == "+" else -1
+    num = int(num)
+    fraction = 0 if fraction is None else int(fraction)
+    value = sign * (num * 100 + fraction)
+    depth = "" if depth is None else depth
+    return value, depth
+
+
+# Game record yielded by PGNFile.iter_games()
+# tags - header tags dict (same keys as get_records() rows)
+# board - LBoard of the initial position
+# moves - list of mainline lmoves
+# comments - {n: [comment, ...]} mainline comments after n moves
+# evals - {n: (centipawns from white's point of view, depth)} after n moves
+GameRecord = collections.namedtuple(
+    "GameRecord", ("tags", "board", "moves", "comments", "evals")
+)
+
 
 class PGNFile(ChessFile):
     def __init__(self, handle, progressbar=None):
@@ -461,6 +590,7 @@ class PGNFile(ChessFile):
         self.handle = handle
         self.progressbar = progressbar
         self.pgn_is_string = isinstance(handle, StringIO)
+        self.pgn_map = None
 
         if self.pgn_is_string:
             self.games = [
@@ -476,12 +606,20 @@ class PGNFile(ChessFile):
             # filter expressions to .sqlite .bin .scout
             self.tag_query = None
             self.fen = None
+            self.fen_variant = NORMALCHESS
             self.scout_query = None
 
             self.scoutfish = None
             self.chess_db = None
+            self.position_index = None
+            self.opening_tree = False
+
+            # .pgn file digests of this open, see get_digest()
+            self.digests = {}
+            self.digests_stat = None
 
             self.sqlite_path = os.path.splitext(self.path)[0] + ".sqlite"
+            self.pos_path = os.path.splitext(self.path)[0] + ".pos"
             self.engine = dbmodel.get_engine(self.sqlite_path)
             self.tag_database = TagDatabase(self.engine)
 
@@ -507,6 +645,12 @@ class PGNFile(ChessFile):
     size = property(get_size)
 
     def close(self):
+        if self.pgn_map is not None:
+            self.pgn_map.close()
+            self.pgn_map = None
+        if self.position_index is not None:
+            self.position_index.close()
+            self.position_index = None
         self.tag_database.close()
         ChessFile.close(self)
 
@@ -515,32 +659,89 @@ class PGNFile(ChessFile):
         # Import .pgn header tags to .sqlite database
 
         sqlite_path = self.path.replace(".pgn", ".sqlite")
-        if (
+        size = self.size
+        start = 0
+        changed = (
             os.path.isfile(self.path)
             and os.path.isfile(sqlite_path)
             and getmtime(self.path) > getmtime(sqlite_path)
-        ):
-            metadata.drop_all(self.engine)
-            metadata.create_all(self.engine)
-            ini_schema_version(self.engine)
-
-        size = self.size
-        if size > 0 and self.tag_database.count == 0:
-            if size > 10000000:
-                drop_indexes(self.engine)
+        )
+        if changed:
+            start = self.get_append_offset(size)
+            if start is None:
+                metadata.drop_all(self.engine)
+                metadata.create_all(self.engine)
+                ini_schema_version(self.engine)
+                start = 0
+
+        imported = False
+        if size > 0 and (self.tag_database.count == 0 or 0 < start < size):
             if self.progressbar is not None:
                 from gi.repository import GLib
 
                 GLib.idle_add(self.progressbar.set_text, _("Importing game headers..."))
             if importer is None:
-                importer = PgnImport(self)
+                # scan headers of big files in parallel and bulk load them,
+                # but don't rebuild all indexes just to add some new games
+                big = size - start > 10000000
+                workers = (os.cpu_count() or 1) if big else 1
+                importer = PgnImport(self, workers=workers, bulk=big and start == 0)
             importer.initialize()
-            importer.do_import(self.path, progressbar=self.progressbar)
-            if size > 10000000 and not importer.cancel:
-                create_indexes(self.engine)
+            importer.do_import(self.path, progressbar=self.progressbar, start=start)
+            # a cancelled import will be deleted, don't waste time on indexes
+            importer.finalize(indexes=not importer.cancel)
+            if importer.cancel:
+                return importer
+            imported = True
+
+        if changed or imported:
+            self.tag_database.set_pgn_state(size, self.get_digest(size))
 
         return importer
 
+    def get_digest(self, size):
+        """Digest of the first size bytes of the .pgn file. The digests the
+        .sqlite and .pos states need are computed together and kept until
+        the file changes, so it is read only once per open."""
+        stat = os.stat(self.path)
+        if self.digests_stat != (stat.st_size, stat.st_mtime_ns):
+            self.digests = {}
+            self.digests_stat = (stat.st_size, stat.st_mtime_ns)
+
+        if size not in self.digests:
+            sizes = {size, stat.st_size}
+            for state in (
+                self.tag_database.get_pgn_state(),
+                self.tag_database.get_book_state(),
+            ):
+                if state is not None:
+                    sizes.add(state.size)
+            pos_state = read_state(self.pos_path)
+            if pos_state is not None:
+                sizes.add(pos_state[0])
+            self.digests.update(pgn_digests(self.path, sizes))
+        return self.digests[size]
+
+    def get_append_offset(self, size):
+        """Returns the offset to continue importing the changed .pgn file from,
+        if it was changed only by appending new games since the last import.
+        Returns None if earlier content changed and a full import is needed."""
+
+        state = self.tag_database.get_pgn_state()
+        if (
+            state is None
+            or size < state.size
+            or self.get_digest(state.size) != state.digest
+        ):
+            return None
+
+        if size == state.size:
+            return size
+
+        # The last imported game may have been incomplete, so import it again
+        offset = self.tag_database.delete_last_game()
+        return offset if offset > 0 else None
+
     def init_chess_db(self):
         """Create/open polyglot .bin file with extra win/loss/draw stats
         using chess_db parser from https://github.com/mcostalba/chess_db
@@ -606,10 +807,323 @@ class PGNFile(ChessFile):
                 self.scoutfish = None
                 log.warning("scoutfish failed (pexpect.EOF)")
 
-    def get_book_moves(self, fen):
-        """Get move-games-win-loss-draw stat of fen position"""
+    def init_position_index(self):
+        """Open the .pos position index file of the mainline positions of
+        all games, if it is up to date. Replaying all games to create it
+        takes long for big files, so it's only created and updated on
+        request, by create_position_index()."""
+        if self.position_index is not None:
+            self.position_index.close()
+            self.position_index = None
+
+        size = self.size
+        state = read_state(self.pos_path)
+        if not self.path or size == 0 or state is None or state[0] != size:
+            return
+
+        try:
+            if getmtime(self.pos_path) < getmtime(self.path):
+                if self.get_digest(size) != state[2]:
+                    return
+                # Don't check the digest of the unchanged file again
+                os.utime(self.pos_path)
+            self.position_index = PositionIndex(self.pos_path)
+        except (OSError, ValueError) as err:
+            log.warning("Failed to open position index %s: %s" % (self.pos_path, err))
+
+    def create_position_index(self, importer=None):
+        """Create/update .pos position index file of the mainline positions
+        of all games to find games and move stats of a position, and the
+        opening tree move stats of their first OPENING_TREE_PLIES plies in
+        the .sqlite database. Both are fed by the same replay of the games.
+        When games were only appended to the .pgn file since they were
+        written, only the new games are replayed and added.
+        Setting importer.cancel stops replaying the games. The games added
+        until then are kept, and the next call continues from there.
+        Returns True if both are complete."""
+        size = self.size
+        if not self.path or size == 0:
+            return False
+
+        pos_path = self.pos_path
+        pos_start = 0
+        state = read_state(pos_path)
+        if state is not None:
+            pos_size, last_offset, digest = state
+            if pos_size <= size and self.get_digest(pos_size) == digest:
+                # The last indexed game may have been incomplete,
+                # so index it again
+                pos_start = None if pos_size == size else last_offset
+
+        # Stats of the opening tree to add, written every OPENING_TREE_FLUSH
+        stats = {}
+        tree_start = 0
+        state = self.tag_database.get_book_state()
+        if state is not None:
+            if state.size <= size and self.get_digest(state.size) == state.digest:
+                tree_start = None if state.size == size else state.last_offset
+            else:
+                self.tag_database.clear_book()
+        if tree_start:
+            # The last game we added may have been incomplete, so replace
+            # its stats
+            last = next(iter(self.tag_database.get_index_games(tree_start)), None)
+            if last is not None and last.offset == tree_start:
+                board = game_board(last.variant, last.fen)
+                if board is not None:
+                    movetext = read_movetext(
+                        self.get_pgn_map()[tree_start : state.size],
+                        0,
+                        self.handle.pgn_encoding,
+                    )
+                    positions = [
+                        (board.hash, board.plyCount, lmove, board.color)
+                        for lmove in mainline(board, movetext, OPENING_TREE_PLIES)
+                    ]
+                    add_opening_tree_stats(stats, last, positions, sign=-1)
+
+        if pos_start is None and tree_start is None:
+            self.init_position_index()
+            self.init_opening_tree()
+            return self.position_index is not None and self.opening_tree
+
+        if self.progressbar is not None:
+            from gi.repository import GLib
+
+            GLib.idle_add(self.progressbar.set_text, _("Creating .pos index file..."))
+
+        if self.position_index is not None:
+            self.position_index.close()
+            self.position_index = None
+
+        last = None
+        end_state = None
+        replayed = False
+
+        def positions():
+            nonlocal last, stats, replayed
+            start = min(s for s in (pos_start, tree_start) if s is not None)
+            for rec, game_positions in self.replay_games(start, importer):
+                last = offset = rec.offset
+                if tree_start is not None and offset >= tree_start:
+                    add_opening_tree_stats(
+                        stats, rec, game_positions[:OPENING_TREE_PLIES]
+                    )
+                    if len(stats) >= OPENING_TREE_FLUSH:
+                        self.tag_database.add_book_moves(stats)
+                        stats = {}
+                if pos_start is not None and offset >= pos_start:
+                    result = RUNNING if rec.result is None else rec.result
+                    for hash, ply, lmove, color in game_positions:
+                        yield (hash, offset, ply, lmove, result)
+            replayed = True
+
+        def replayed_state(start):
+            """(size, last offset, digest) of the games replayed, if they
+            include the game at offset start, else None"""
+            nonlocal end_state
+            if end_state is None:
+                if importer is None or not importer.cancel:
+                    last_offset = self.tag_database.get_last_offset()
+                    end_state = (size, last_offset, self.get_digest(size))
+                elif last is not None:
+                    # Stopped after the game at offset last
+                    following = next(
+                        iter(self.tag_database.get_index_games(last + 1)), None
+                    )
+                    end = size if following is None else following.offset
+                    end_state = (end, last, self.get_digest(end))
+            if end_state is None or (end_state[0] < size and last < start):
+                return None
+            return end_state
+
+        try:
+            if pos_start is None:
+                for rec in positions():
+                    pass
+            else:
+                merge = ()
+                if pos_start > 0:
+                    merge = (
+                        rec for rec in read_records(pos_path) if rec[1] < pos_start
+                    )
+                write_index(
+                    pos_path, positions(), lambda: replayed_state(pos_start), merge
+                )
+        except (OSError, ValueError) as err:
+            log.warning("Failed to create position index %s: %s" % (pos_path, err))
+            if not replayed and tree_start is not None:
+                # Stats of some games may have been written already
+                self.tag_database.clear_book()
+                tree_start = None
+
+        if tree_start is not None:
+            state = replayed_state(tree_start)
+            if state is not None:
+                self.tag_database.add_book_moves(stats)
+                self.tag_database.set_book_state(state[0], state[2], state[1])
+
+        self.init_position_index()
+        self.init_opening_tree()
+        return self.position_index is not None and self.opening_tree
+
+    def replay_games(self, start=0, importer=None):
+        """Yields (game record, positions) of the games starting from the game
+        at offset start. Positions are the (hash, ply, move, color) of the
+        mainline positions, move is the one played from the position or 0 at
+        the end of the game. Stops after the game being replayed when
+        importer.cancel is set."""
+        pgn_map = self.get_pgn_map()
+        encoding = self.handle.pgn_encoding
+        progressbar = self.progressbar
+        if progressbar is not None:
+            from gi.repository import GLib
+        size = self.size
+
+        for i, rec in enumerate(self.tag_database.get_index_games(start)):
+            if importer is not None and importer.cancel:
+                return
+            offset = rec.offset
+            if progressbar is not None and i % 1000 == 0:
+                GLib.idle_add(progressbar.set_fraction, offset / float(size))
+
+            board = game_board(rec.variant, rec.fen)
+            if board is None:
+                continue
+
+            movetext = read_movetext(pgn_map, offset, encoding)
+            positions = [
+                (board.hash, board.plyCount, lmove, board.color)
+                for lmove in mainline(board, movetext)
+            ]
+            positions.append((board.hash, board.plyCount, 0, board.color))
+            yield rec, positions
+
+    def iter_positions(self, start=0, importer=None):
+        """Yields (hash, offset, ply, move, result) records of the mainline
+        positions of the games starting from the game at offset start.
+        Move is the one played from the position or 0 at the end of the game.
+        Stops after the game being replayed when importer.cancel is set."""
+        for rec, positions in self.replay_games(start, importer):
+            result = RUNNING if rec.result is None else rec.result
+            for hash, ply, lmove, color in positions:
+                yield (hash, rec.offset, ply, lmove, result)
+
+    def iter_games(self, query=None, fields=("moves",)):
+        """Yields GameRecord tuples of the games satisfying a tag filter
+        query (see set_tag_filter()) without creating GameModel objects.
+        Games are read sequentially in .pgn file offset order.
+        Fields not listed in fields ("moves", "comments", "evals") are None.
+        Games with invalid FEN are skipped."""
+        want_moves = "moves" in fields
+        want_comments = "comments" in fields or "evals" in fields
+
+        if self.pgn_is_string:
+            records = self.games
+        else:
+            records = self.tag_database.iter_games(query)
+            pgn_map = self.get_pgn_map()
+            encoding = self.handle.pgn_encoding
+
+        for rec in records:
+            tags = dict(rec)
+            if self.pgn_is_string:
+                variant = name2variant.get(rec["Variant"].capitalize())
+                variant = variant.variant if variant is not None else None
+                movetext = self.get_movetext(rec)
+            else:
+                variant = rec["Variant"]
+                movetext = read_movetext(pgn_map, rec["Offset"], encoding)
+
+            board = game_board(variant, rec["FEN"])
+            if board is None:
+                continue
+
+            moves = comments = evals = None
+            if want_moves or want_comments:
+                comments = {} if want_comments else None
+                moves = list(mainline(board.clone(), movetext, comments=comments))
+                if not want_moves:
+                    moves = None
+
+            if "evals" in fields:
+                evals = {}
+                for n, texts in comments.items():
+                    for text in texts:
+                        score = parse_eval(text)
+                        if score is not None:
+                            evals[n] = score
+                if "comments" not in fields:
+                    comments = None
+
+            yield GameRecord(tags, board, moves, comments, evals)
+
+    def init_opening_tree(self):
+        """Use the opening tree move stats in .sqlite database if they are
+        up to date. They are created and updated by create_position_index()"""
+        size = self.size
+        state = self.tag_database.get_book_state()
+        if not self.path or size == 0 or state is None or state.size != size:
+            self.opening_tree = False
+            return
+
+        # The .pgn file was checked against the state of its last import
+        # by init_tag_database()
+        pgn_state = self.tag_database.get_pgn_state()
+        if pgn_state is not None and pgn_state.size == size:
+            self.opening_tree = pgn_state.digest == state.digest
+        else:
+            self.opening_tree = self.get_digest(size) == state.digest
+
+    def use_position_index(self, variant):
+        """Whether to look up positions of variant in the .pos position
+        index. chess_db is used for chess positions when it is available."""
+        return self.position_index is not None and (
+            self.chess_db is None or variant != NORMALCHESS
+        )
+
+    def get_position_board(self, fen, variant=NORMALCHESS):
+        """LBoard of a fen to look up its hash in the position index,
+        or None if the fen is invalid"""
+        return game_board(variant, fen)
+
+    def get_book_moves(self, fen, variant=NORMALCHESS):
+        """Get move-games-win-loss-draw-elo-year stat of fen position.
+        Average elo and last year are None if not known. The last year
+        may be that of a removed incomplete last game of the file."""
         rows = []
-        if self.chess_db is not None:
+        if self.pgn_is_string:
+            return rows
+
+        board = self.get_position_board(fen, variant)
+        if board is None:
+            return rows
+        if self.opening_tree and board.plyCount < OPENING_TREE_PLIES:
+            for row in self.tag_database.get_book_moves(board.hash):
+                elo = row.elo_sum // row.elo_games if row.elo_games else None
+                rows.append(
+                    (
+                        toAN(board, row.move),
+                        row.games,
+                        row.white_won,
+                        row.black_won,
+                        row.draw,
+                        elo,
+                        row.year or None,
+                    )
+                )
+        if rows:
+            return rows
+
+        if self.use_position_index(variant):
+            stats = self.position_index.get_move_stats(board.hash)
+            for move, (games, white_won, black_won, draw) in sorted(
+                stats.items(), key=lambda item: -item[1][0]
+            ):
+                rows.append(
+                    (toAN(board, move), games, white_won, black_won, draw, None, None)
+                )
+        elif self.chess_db is not None:
             move_stat = self.chess_db.find(f"limit {1} skip {0} {fen}")
             for mstat in move_stat["moves"]:
                 rows.append(
@@ -619,13 +1133,20 @@ class PGNFile(ChessFile):
                         int(mstat["wins"]),
                         int(mstat["losses"]),
                         int(mstat["draws"]),
+                        None,
+                        None,
                     )
                 )
         return rows
 
-    def has_position(self, fen):
-        # ChessDB (prioritary)
-        if self.chess_db is not None:
+    def has_position(self, fen, variant=NORMALCHESS):
+        # Position index
+        if self.use_position_index(variant):
+            board = self.get_position_board(fen, variant)
+            if board is not None and self.position_index.has_position(board.hash):
+                return TOOL_POSITION_INDEX, True
+        # ChessDB
+        elif self.chess_db is not None:
             ret = self.chess_db.find(f"limit {1} skip {0} {fen}")
             if len(ret["moves"]) > 0:
                 return TOOL_CHESSDB, True
@@ -657,10 +1178,15 @@ class PGNFile(ChessFile):
         self.tag_query = query
         self.tag_database.build_where_tags(self.tag_query)
 
-    def set_fen_filter(self, fen):
-        """Set fen string we will use to get game offsets from .bin database"""
-        if self.chess_db is not None and fen is not None and fen != FEN_START:
+    def set_fen_filter(self, fen, variant=NORMALCHESS):
+        """Set fen string we will use to get game offsets from .pos or .bin database"""
+        if (
+            (self.position_index is not None or self.chess_db is not None)
+            and fen is not None
+            and fen != FEN_START
+        ):
             self.fen = fen
+            self.fen_variant = variant
         else:
             self.fen = None
             self.tag_database.build_where_offs8(None)
@@ -717,10 +1243,24 @@ class PGNFile(ChessFile):
                 self.tag_database.build_where_offs(offsets)
 
     def get_offs8(self, skip, filtered_offs_list=None):
-        """Get offsets from .bin database and
+        """Get offsets from .pos or .bin database and
         create where clause we will use to query header tag .sqlite database
         """
-        if self.fen:
+        if self.fen and self.use_position_index(self.fen_variant):
+            board = self.get_position_board(self.fen, self.fen_variant)
+            offs_ply = {}
+            if board is not None:
+                offs_ply = self.position_index.get_offsets(board.hash)
+            offsets = sorted(offs_ply)
+            if filtered_offs_list is not None:
+                filtered = set(filtered_offs_list)
+                offsets = [offs for offs in offsets if offs in filtered]
+            offsets = offsets[skip : skip + self.limit]
+            for offs in offsets:
+                self.offs_ply[offs] = offs_ply[offs]
+            # offset8 is exact here, games are always longer than 8 bytes
+            self.tag_database.build_where_offs8([(offs >> 3) << 3 for offs in offsets])
+        elif self.fen:
             move_stat = self.chess_db.find(f"limit {self.limit} skip {skip} {self.fen}")
 
             offsets = []
@@ -764,6 +1304,9 @@ class PGNFile(ChessFile):
 
         if self.fen:
             self.get_offs8(self.skip, filtered_offs_list=filtered_offs_list)
+            # No game reached the position
+            if self.tag_database.where_offs8 is None:
+                return [], {}
 
         if self.scout_query:
             self.get_offs(self.skip, filtered_offs_list=filtered_offs_list)
@@ -899,8 +1442,17 @@ class PGNFile(ChessFile):
         del model.variations[:]
 
         self.error = None
-        movetext = self.get_movetext(rec)
-        boards = self.parse_movetext(movetext, boards[0], position)
+        stored = None
+        if not self.pgn_is_string:
+            stored = self.load_game_moves(rec, boards[0], position)
+
+        if stored is None:
+            movetext = self.get_movetext(rec)
+            boards = self.parse_movetext(movetext, boards[0], position)
+            if not self.pgn_is_string and position == -1 and self.error is None:
+                self.store_game_moves(rec, boards)
+        else:
+            boards = stored
 
         # The parser built a tree of lboard objects, now we have to
         # create the high level Board and Move lists...
@@ -919,7 +1471,7 @@ class PGNFile(ChessFile):
             else:
                 move = Move(node.lastMove)
                 try:
-                    board = node.prev.pieceBoard.move(move, lboard=node)
+                    board = node.prev.pieceBoard.lazy_move(move, lboard=node)
                 except Exception:
                     raise LoadingError(
                         _("Invalid move."),
@@ -995,14 +1547,9 @@ class PGNFile(ChessFile):
                                 )
 
                         if self.has_eval:
-                            match = move_eval_re.search(child)
-                            if match:
-                                sign, num, fraction, depth = match.groups()
-                                sign = 1 if sign is None or sign == "+" else -1
-                                num = int(num)
-                                fraction = 0 if fraction is None else int(fraction)
-                                value = sign * (num * 100 + fraction)
-                                depth = "" if depth is None else depth
+                            score = parse_eval(child)
+                            if score is not None:
+                                value, depth = score
                                 if board.color == BLACK:
                                     value = -value
                                 model.scores[ply] = ("", value, depth)
@@ -1039,144 +1586,237 @@ class PGNFile(ChessFile):
 
         return model
 
-    def parse_movetext(self, string, board, position, variation=False):
-        """Recursive parses a movelist part of one game.
+    def load_game_moves(self, rec, board, position):
+        """Rebuilds the lboard tree of a game from its moves stored
+        in .sqlite database. Returns None if the game wasn't stored yet."""
+        row = self.tag_database.get_game_moves(rec["Offset"])
+        if row is None:
+            return None
+
+        arr = array("H")
+        arr.frombytes(row.moves)
+        if sys.byteorder == "big":
+            arr.byteswap()
+        return dbwalk.unwalk(board, arr, row.comments.split("\0"), position)
+
+    def store_game_moves(self, rec, boards):
+        """Stores the moves of a parsed game to .sqlite database,
+        so next time it can be loaded without parsing its movetext"""
+        arr = array("H")
+        txt = []
+        try:
+            dbwalk.walk(boards[0], arr, txt)
+        except (ValueError, OverflowError):
+            return
+        if any("\0" in comment for comment in txt):
+            return
+
+        if sys.byteorder == "big":
+            arr.byteswap()
+        self.tag_database.set_game_moves(rec["Offset"], arr.tobytes(), "\0".join(txt))
+
+    def parse_movetext(self, string, board, position):
+        """Parses a movelist part of one game in a single pass.
+        Variations are parsed on an explicit stack, so the text of nested
+        variations is tokenized only once.
 
         Arguments:
         srting - str (movelist)
         board - lboard (initial position)
-        position - int (maximum ply to parse)
-        variation- boolean (True if the string is a variation)"""
+        position - int (maximum ply to parse)"""
 
-        boards = []
+        # initial game board
+        boards = [board]
         boards_append = boards.append
 
         last_board = board
-        if variation:
-            # this board used only to hold initial variation comments
-            boards_append(LBoard(board.variant))
-        else:
-            # initial game board
-            boards_append(board)
+        variation = False
+        # the board the current variation branches from
+        v_last_board = None
+        # enclosing variations
+        stack = []
+        # the rest of current variation is skipped after an error or result
+        done = False
+        # depth of parenthesis inside skipped text
+        skipped = 0
+        # depth of parenthesis inside a variation which can't be parsed
+        invalid = 0
 
         # status = None
-        parenthesis = 0
-        v_string = ""
-        v_last_board = None
         for m in re.finditer(pattern, string):
             group, text = m.lastindex, m.group(m.lastindex)
-            if parenthesis > 0:
-                v_string += " " + text
 
-            if group == VARIATION_END:
-                parenthesis -= 1
-                if parenthesis == 0:
-                    if last_board.prev is None:
+            if invalid > 0:
+                if group == VARIATION_START:
+                    invalid += 1
+                elif group == VARIATION_END:
+                    invalid -= 1
+                    if invalid == 0:
                         errstr1 = _("Error parsing %(mstr)s") % {"mstr": string}
                         self.error = LoadingError(errstr1, "")
-                        return boards  # , status
+                        if not variation:
+                            return boards  # , status
+                        done = True
+                continue
 
-                    v_last_board.children.append(
-                        self.parse_movetext(
-                            v_string[:-1], last_board.prev, position, variation=True
-                        )
-                    )
-                    v_string = ""
+            if done:
+                if group == VARIATION_START:
+                    skipped += 1
                     continue
+                elif group != VARIATION_END:
+                    continue
+                elif skipped > 0:
+                    skipped -= 1
+                    continue
+
+            if group == VARIATION_END:
+                if not variation:
+                    # unbalanced parenthesis, ignore the rest
+                    break
+                v_boards = boards
+                v_last_board.children.append(v_boards)
+                (
+                    board,
+                    boards,
+                    last_board,
+                    variation,
+                    v_last_board,
+                ) = stack.pop()
+                boards_append = boards.append
+                done = False
+                skipped = 0
 
             elif group == VARIATION_START:
-                parenthesis += 1
-                if parenthesis == 1:
-                    v_last_board = last_board
+                if last_board.prev is None:
+                    invalid = 1
+                    continue
+
+                stack.append((board, boards, last_board, variation, v_last_board))
+                v_last_board = last_board
+                board = last_board.prev
+                # this board used only to hold initial variation comments
+                boards = [LBoard(board.variant)]
+                boards_append = boards.append
+                last_board = board
+                variation = True
+
+            elif group == FULL_MOVE:
+                if not variation:
+                    if position != -1 and last_board.plyCount >= position:
+                        break
 
-            if parenthesis == 0:
-                if group == FULL_MOVE:
+                mstr = m.group(MOVE)
+                try:
+                    lmove = parseAny(last_board, mstr)
+                except ParsingError as err:
+                    # TODO: save the rest as comment
+                    # last_board.children.append(string[m.start():])
+                    notation, reason, boardfen = err.args
+                    ply = last_board.plyCount
+                    if ply % 2 == 0:
+                        moveno = "%d." % (ply // 2 + 1)
+                    else:
+                        moveno = "%d..." % (ply // 2 + 1)
+                    errstr1 = _(
+                        "The game can't be read to end, because of an error parsing move %(moveno)s '%(notation)s'."
+                    ) % {"moveno": moveno, "notation": notation}
+                    errstr2 = _("The move failed because %s.") % reason
+                    self.error = LoadingError(errstr1, errstr2)
                     if not variation:
-                        if position != -1 and last_board.plyCount >= position:
-                            break
-
-                    mstr = m.group(MOVE)
-                    try:
-                        lmove = parseAny(last_board, mstr)
-                    except ParsingError as err:
-                        # TODO: save the rest as comment
-                        # last_board.children.append(string[m.start():])
-                        notation, reason, boardfen = err.args
-                        ply = last_board.plyCount
-                        if ply % 2 == 0:
-                            moveno = "%d." % (ply // 2 + 1)
-                        else:
-                            moveno = "%d..." % (ply // 2 + 1)
-                        errstr1 = _(
-                            "The game can't be read to end, because of an error parsing move %(moveno)s '%(notation)s'."
-                        ) % {"moveno": moveno, "notation": notation}
-                        errstr2 = _("The move failed because %s.") % reason
-                        self.error = LoadingError(errstr1, errstr2)
                         break
-                    except Exception:
-                        ply = last_board.plyCount
-                        if ply % 2 == 0:
-                            moveno = "%d." % (ply // 2 + 1)
-                        else:
-                            moveno = "%d..." % (ply // 2 + 1)
-                        errstr1 = _("Error parsing move %(moveno)s %(mstr)s") % {
-                            "moveno": moveno,
-                            "mstr": mstr,
-                        }
-                        self.error = LoadingError(errstr1, "")
+                    done = True
+                    continue
+                except Exception:
+                    ply = last_board.plyCount
+                    if ply % 2 == 0:
+                        moveno = "%d." % (ply // 2 + 1)
+                    else:
+                        moveno = "%d..." % (ply // 2 + 1)
+                    errstr1 = _("Error parsing move %(moveno)s %(mstr)s") % {
+                        "moveno": moveno,
+                        "mstr": mstr,
+                    }
+                    self.error = LoadingError(errstr1, "")
+                    if not variation:
                         break
+                    done = True
+                    continue
 
-                    new_board = last_board.clone()
-                    new_board.applyMove(lmove)
-
-                    if m.group(MOVE_COMMENT):
-                        new_board.nags.append(symbol2nag(m.group(MOVE_COMMENT)))
-
-                    new_board.prev = last_board
+                new_board = last_board.clone()
+                new_board.applyMove(lmove)
 
-                    # set last_board next, except starting a new variation
-                    if variation and last_board == board:
-                        boards[0].next = new_board
-                    else:
-                        last_board.next = new_board
+                if m.group(MOVE_COMMENT):
+                    new_board.nags.append(symbol2nag(m.group(MOVE_COMMENT)))
 
-                    boards_append(new_board)
-                    last_board = new_board
+                new_board.prev = last_board
 
-                elif group == COMMENT_REST:
-                    last_board.children.append(text[1:])
+                # set last_board next, except starting a new variation
+                if variation and last_board == board:
+                    boards[0].next = new_board
+                else:
+                    last_board.next = new_board
 
-                elif group == COMMENT_BRACE:
-                    comm = text.replace("{\r\n", "{").replace("\r\n}", "}")
-                    # Preserve new lines of lichess study comments
-                    if self.path is not None and "lichess_study_" in self.path:
-                        comment = comm[1:-1]
-                    else:
-                        comm = comm[1:-1].splitlines()
-                        comment = " ".join([line.strip() for line in comm])
-                    if variation and last_board == board:
-                        # initial variation comment
-                        boards[0].children.append(comment)
-                    else:
-                        last_board.children.append(comment)
+                boards_append(new_board)
+                last_board = new_board
 
-                elif group == COMMENT_NAG:
-                    last_board.nags.append(text)
+            elif group == COMMENT_REST:
+                last_board.children.append(text[1:])
 
-                # TODO
-                elif group == RESULT:
-                    # if text == "1/2":
-                    #    status = reprResult.index("1/2-1/2")
-                    # else:
-                    #    status = reprResult.index(text)
+            elif group == COMMENT_BRACE:
+                comm = text.replace("{\r\n", "{").replace("\r\n}", "}")
+                # Preserve new lines of lichess study comments
+                if self.path is not None and "lichess_study_" in self.path:
+                    comment = comm[1:-1]
+                else:
+                    comm = comm[1:-1].splitlines()
+                    comment = " ".join([line.strip() for line in comm])
+                if variation and last_board == board:
+                    # initial variation comment
+                    boards[0].children.append(comment)
+                else:
+                    last_board.children.append(comment)
+
+            elif group == COMMENT_NAG:
+                last_board.nags.append(text)
+
+            # TODO
+            elif group == RESULT:
+                # if text == "1/2":
+                #    status = reprResult.index("1/2-1/2")
+                # else:
+                #    status = reprResult.index(text)
+                if not variation:
                     break
+                done = True
 
-                else:
-                    print("Unknown:", text)
+            else:
+                print("Unknown:", text)
+
+        # unclosed variations are dropped
+        while stack:
+            board, boards, last_board, variation, v_last_board = stack.pop()
 
         return boards  # , status
 
+    def get_pgn_map(self):
+        """Memory mapped .pgn file, mapped again when the file size changed"""
+        size = self.size
+        if self.pgn_map is None or len(self.pgn_map) != size:
+            if self.pgn_map is not None:
+                self.pgn_map.close()
+                self.pgn_map = None
+            if size == 0:
+                return b""
+            with open(self.path, "rb") as f:
+                self.pgn_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self.pgn_map
+
     def get_movetext(self, rec):
+        if not self.pgn_is_string:
+            return read_movetext(
+                self.get_pgn_map(), rec["Offset"], self.handle.pgn_encoding
+            )
+
         self.handle.seek(rec["Offset"])
         in_comment = False
         lines = []
@@ -1201,8 +1841,6 @@ class PGNFile(ChessFile):
 
             # if there is something add it
             if line.strip():
-                if not self.pgn_is_string and self.handle.pgn_encoding != PGN_ENCODING:
-                    line = line.encode(PGN_ENCODING).decode(self.handle.pgn_encoding)
                 lines.append(line)
                 line = self.handle.readline()
             # if line is empty it should be the game separator line except...
@@ -128,6 +128,9 @@ DEFAULTS = {
         "dont_show_externals_at_startup": False,
         "max_analysis_spin": 3,
         "max_depth_spin": 20,
+        "analyzer_pool_spin": max(1, min(4, (os.cpu_count() or 2) // 2)),
+        "analysis_cache_size": 200000,
+        "engine_pool_size": 2,
         "variation_threshold_spin": 50,
         "fromCurrent": True,
         "shouldWhite": True,
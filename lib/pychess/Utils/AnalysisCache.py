@@ -0,0 +1,161 @@
+import atexit
+import sqlite3
+
+from pychess.System import conf
+from pychess.System.Log import log
+from pychess.System.prefix import addUserCachePrefix
+
+# Number of new results kept in memory before they are written to disk
+FLUSH_SIZE = 100
+
+# Part of the entries dropped at once when the cache is full
+EVICT_FRACTION = 0.1
+
+
+class AnalysisCache:
+    """Deepest analysis line engines reported for positions, kept on disk.
+
+    Entries are keyed by the zobrist hash and variant of the position and
+    the md5 sum of the engine, and hold the depth, score and pv of the
+    line. When there are more than size entries, the least recently used
+    ones are dropped. A size of 0 disables the cache."""
+
+    def __init__(self, path, size=None):
+        self.path = path
+        self._size = size
+        self.conn = None
+        self.count = 0
+        # Number of the last flush, the entries are stamped with the number
+        # of the flush they were last written or read in
+        self.clock = 0
+        # {key: (depth, score, pv)} not yet written to disk
+        self.pending = {}
+        # keys read since the last flush
+        self.touched = set()
+
+    @property
+    def size(self):
+        return conf.get("analysis_cache_size") if self._size is None else self._size
+
+    def connect(self):
+        if self.conn is None:
+            self.conn = sqlite3.connect(self.path, check_same_thread=False)
+            self.conn.execute(
+                "create table if not exists analysis ("
+                "hash integer, variant integer, engine text, "
+                "depth integer, score integer, pv text, used integer, "
+                "primary key (hash, variant, engine))"
+            )
+            self.conn.execute(
+                "create index if not exists analysis_used on analysis (used)"
+            )
+            cursor = self.conn.execute("select count(*), max(used) from analysis")
+            self.count, clock = cursor.fetchone()
+            self.clock = clock or 0
+        return self.conn
+
+    @staticmethod
+    def key(board, md5):
+        lboard = board.board
+        # sqlite integers are signed 64 bit
+        hash = lboard.hash & 0xFFFFFFFFFFFFFFFF
+        if hash >= 1 << 63:
+            hash -= 1 << 64
+        return hash, lboard.variant, md5 or ""
+
+    def get(self, board, md5):
+        """Returns (depth, score, pv) of the cached line of board, or None"""
+        if not self.size:
+            return None
+        key = self.key(board, md5)
+        entry = self.pending.get(key)
+        if entry is not None:
+            return entry
+        try:
+            row = (
+                self.connect()
+                .execute(
+                    "select depth, score, pv from analysis "
+                    "where hash=? and variant=? and engine=?",
+                    key,
+                )
+                .fetchone()
+            )
+        except sqlite3.Error as err:
+            log.warning("Reading the analysis cache failed: %s" % err)
+            return None
+        if row is None:
+            return None
+        self.touched.add(key)
+        depth, score, pv = row
+        return depth, score, pv.split()
+
+    def wants(self, board, md5, depth):
+        """True if a line of depth would be deeper than the cached one"""
+        if not self.size:
+            return False
+        entry = self.get(board, md5)
+        return entry is None or entry[0] < depth
+
+    def put(self, board, md5, depth, score, pv):
+        """Caches the line, unless there is a line of the same depth or
+        deeper already"""
+        if not self.wants(board, md5, depth):
+            return
+        self.pending[self.key(board, md5)] = (depth, score, list(pv))
+        if len(self.pending) >= FLUSH_SIZE:
+            self.flush()
+
+    def flush(self):
+        if not self.pending and not self.touched:
+            return
+        try:
+            conn = self.connect()
+            self.clock += 1
+            used = self.clock
+            with conn:
+                conn.executemany(
+                    "update analysis set used=? "
+                    "where hash=? and variant=? and engine=?",
+                    [(used,) + key for key in self.touched],
+                )
+                for key, (depth, score, pv) in self.pending.items():
+                    cursor = conn.execute(
+                        "update analysis set depth=?, score=?, pv=?, used=? "
+                        "where hash=? and variant=? and engine=?",
+                        (depth, score, " ".join(pv), used) + key,
+                    )
+                    if cursor.rowcount == 0:
+                        conn.execute(
+                            "insert into analysis values (?, ?, ?, ?, ?, ?, ?)",
+                            key + (depth, score, " ".join(pv), used),
+                        )
+                        self.count += 1
+                if self.count > self.size:
+                    self.count -= conn.execute(
+                        "delete from analysis where rowid in "
+                        "(select rowid from analysis order by used limit ?)",
+                        (self.count - int(self.size * (1 - EVICT_FRACTION)),),
+                    ).rowcount
+        except sqlite3.Error as err:
+            log.warning("Writing the analysis cache failed: %s" % err)
+        self.pending.clear()
+        self.touched.clear()
+
+    def clear(self):
+        self.pending.clear()
+        self.touched.clear()
+        conn = self.connect()
+        with conn:
+            conn.execute("delete from analysis")
+        self.count = 0
+
+    def close(self):
+        self.flush()
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+analysisCache = AnalysisCache(addUserCachePrefix("analysis.sqlite"))
+atexit.register(analysisCache.close)
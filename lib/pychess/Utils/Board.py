@@ -1,3 +1,7 @@
+import threading
+import weakref
+from collections import OrderedDict
+
 from .lutils.bitboard import iterBits
 from .lutils.LBoard import LBoard
 from .lutils.lmove import RANK, FILE, FCORD, FLAG, PROMOTE_PIECE
@@ -56,6 +60,31 @@ from .const import (
 )
 
 
+# Max number of lazy boards keeping their Piece objects at once
+LAZY_BOARD_CACHE_SIZE = 1024
+
+_lazy_boards = OrderedDict()
+
+# Games are loaded in a thread, while the GUI shows their boards
+_lazy_lock = threading.RLock()
+
+
+def remember_lazy_board(board):
+    """Registers a materialized lazy board. When there are too many of them
+    the Piece objects of the least recently materialized ones are dropped,
+    they will be recreated from their previous board when needed again.
+    Recreated boards get the same Piece objects they had before, so their
+    next boards still share them."""
+
+    with _lazy_lock:
+        _lazy_boards[id(board)] = weakref.ref(board)
+        _lazy_boards.move_to_end(id(board))
+        while len(_lazy_boards) > LAZY_BOARD_CACHE_SIZE:
+            old_board = _lazy_boards.popitem(last=False)[1]()
+            if old_board is not None and old_board._lazy is not None:
+                old_board._data = None
+
+
 def reverse_enum(L):
     for index in reversed(range(len(L))):
         yield index, L[index]
@@ -80,7 +109,10 @@ class Board:
     PROMOTIONS = (QUEEN_PROMOTION, ROOK_PROMOTION, BISHOP_PROMOTION, KNIGHT_PROMOTION)
 
     def __init__(self, setup=False, lboard=None):
-        self.data = [dict(enumerate([None] * self.FILES)) for i in range(self.RANKS)]
+        self._data = [dict(enumerate([None] * self.FILES)) for i in range(self.RANKS)]
+        # (previous board, move, Piece objects created by the move)
+        # of boards created by lazy_move()
+        self._lazy = None
         if lboard is None:
             self.board = LBoard(self.variant)
         else:
@@ -110,6 +142,18 @@ class Board:
                         for i in range(holding[piece]):
                             self[self.newHoldingCord(color, 1)] = Piece(color, piece)
 
+    def _get_data(self):
+        data = self._data
+        if data is None:
+            data = self._materialize()
+        return data
+
+    def _set_data(self, data):
+        self._data = data
+        self._lazy = None
+
+    data = property(_get_data, _set_data)
+
     def getHoldingCord(self, color, piece, piece_color=None):
         """Get the chord of first occurrence of piece in given color holding"""
 
@@ -404,9 +448,6 @@ class Board:
         and move will not be applyed, just the high level Piece
         objects will be adjusted."""
 
-        # Sequence nubers of next newHoldingCord of WHITE and BLACK
-        nth = [0, 0]
-
         flag = FLAG(move.move)
         if flag != DROP:
             assert self[move.cord0], f"{move} {self.asFen()}"
@@ -414,6 +455,59 @@ class Board:
         newBoard = self.clone(lboard=lboard)
         if lboard is None:
             newBoard.board.applyMove(move.move)
+        self._move_pieces(newBoard, move)
+        return newBoard
+
+    def lazy_move(self, move, lboard):
+        """Like move(move, lboard=lboard), but the Piece objects of the new
+        Board are only created when they are first needed.
+        Used when loading games from database files, where most of the
+        boards are never shown in BoardView."""
+
+        newBoard = self.__class__.__new__(self.__class__)
+        newBoard._data = None
+        newBoard._lazy = (self, move, [])
+        newBoard.board = lboard
+        newBoard.board.pieceBoard = newBoard
+        newBoard.played = False
+        return newBoard
+
+    def _materialize(self):
+        with _lazy_lock:
+            # Walk back to the nearest board having its Piece objects
+            # and replay the moves from there
+            chain = []
+            board = self
+            while board._data is None:
+                chain.append(board)
+                board = board._lazy[0]
+
+            for board in reversed(chain):
+                prev, move, created = board._lazy
+                # Pieces created when the board was materialized before
+                replayed = iter(created[:])
+
+                def create_piece(color, piece, captured=False):
+                    obj = next(replayed, None)
+                    if obj is None:
+                        obj = Piece(color, piece, captured=captured)
+                        created.append(obj)
+                    return obj
+
+                board._data = [row.copy() for row in prev.data]
+                prev._move_pieces(board, move, create_piece)
+                board._lazy = (prev, move, created)
+                remember_lazy_board(board)
+            return self._data
+
+    def _move_pieces(self, newBoard, move, create_piece=Piece):
+        """Adjusts the Piece objects of newBoard (a clone of self)
+        after applying the move. New Piece objects are created by create_piece."""
+
+        # Sequence nubers of next newHoldingCord of WHITE and BLACK
+        nth = [0, 0]
+
+        flag = FLAG(move.move)
         cord0, cord1 = move.cords
 
         kcastle = flag == KING_CASTLE or (
@@ -452,10 +546,10 @@ class Board:
                     if flag == ENPASSANT or self[move.cord1].promoted
                     else self[move.cord1].piece
                 )
-                new_piece = Piece(self.color, piece, captured=True)
+                new_piece = create_piece(self.color, piece, captured=True)
             else:
                 piece = PAWN if flag == ENPASSANT else self[move.cord1].piece
-                new_piece = Piece(1 - self.color, piece, captured=True)
+                new_piece = create_piece(1 - self.color, piece, captured=True)
             nth[self.color] += 1
             newBoard[self.newHoldingCord(self.color, nth[self.color])] = new_piece
 
@@ -465,7 +559,9 @@ class Board:
                 for acord in cordsAround(move.cord1):
                     piece = self[acord]
                     if piece and piece.piece != PAWN and acord != cord0:
-                        new_piece = Piece(piece.color, piece.piece, captured=True)
+                        new_piece = create_piece(
+                            piece.color, piece.piece, captured=True
+                        )
                         nth[1 - piece.color] += 1
                         newBoard[
                             self.newHoldingCord(1 - piece.color, nth[1 - piece.color])
@@ -476,7 +572,7 @@ class Board:
             piece = FCORD(move.move)
             holding_coord = self.getHoldingCord(self.color, piece)
             if holding_coord is None:
-                newBoard[cord1] = Piece(self.color, piece)
+                newBoard[cord1] = create_piece(self.color, piece)
             else:
                 newBoard[cord1] = newBoard[holding_coord]
                 newBoard[cord1].captured = False
@@ -488,7 +584,7 @@ class Board:
                 and (flag not in (QUEEN_CASTLE, KING_CASTLE))
             ):
                 piece = self[move.cord0].piece
-                new_piece = Piece(self.color, piece, captured=True)
+                new_piece = create_piece(self.color, piece, captured=True)
                 nth[1 - self.color] += 1
                 newBoard[self.newHoldingCord(1 - self.color, nth[1 - self.color])] = (
                     new_piece
@@ -537,7 +633,7 @@ class Board:
             newBoard[holding_coord] = None
 
         if flag in PROMOTIONS:
-            new_piece = Piece(self.color, PROMOTE_PIECE(flag))
+            new_piece = create_piece(self.color, PROMOTE_PIECE(flag))
             new_piece.promoted = True
             newBoard[cord1] = new_piece
 
@@ -547,8 +643,6 @@ class Board:
         if flag == DROP or flag == ENPASSANT or self[move.cord1] is not None:
             newBoard.reorderHolding(self.color)
 
-        return newBoard
-
     def switchColor(self):
         """Switches the current color to move and unsets the enpassant cord.
         Mostly to be used by inversed analyzers"""
@@ -590,6 +684,8 @@ class Board:
 
     def __setitem__(self, cord, piece):
         self.data[cord.y][cord.x] = piece
+        # changed boards can't be recreated from their previous board
+        self._lazy = None
 
     def clone(self, lboard=None):
         if lboard is None:
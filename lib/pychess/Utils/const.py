@@ -7,7 +7,7 @@ LOCAL, ARTIFICIAL, REMOTE = range(3)
 EASY, INTERMEDIATE, EXPERT = range(3)
 
 # Tools
-TOOL_NONE, TOOL_CHESSDB, TOOL_SCOUTFISH = range(3)
+TOOL_NONE, TOOL_CHESSDB, TOOL_SCOUTFISH, TOOL_POSITION_INDEX = range(4)
 
 # Player colors
 WHITE, BLACK = range(2)
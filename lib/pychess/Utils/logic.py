@@ -146,8 +146,8 @@ def getStatus(board):
             return DRAW, DRAW_INSUFFICIENT
 
     hasMove = False
-    for move in lmovegen.genAllMoves(lboard):
-        if board.variant == ATOMICCHESS:
+    if board.variant == ATOMICCHESS:
+        for move in lmovegen.genAllMoves(lboard):
             if kingExplode(lboard, move, 1 - board.color) and not kingExplode(
                 lboard, move, board.color
             ):
@@ -155,13 +155,17 @@ def getStatus(board):
                 break
             elif kingExplode(lboard, move, board.color):
                 continue
-        lboard.applyMove(move)
-        if lboard.opIsChecked():
+            lboard.applyMove(move)
+            if lboard.opIsChecked():
+                lboard.popMove()
+                continue
+            hasMove = True
             lboard.popMove()
-            continue
-        hasMove = True
-        lboard.popMove()
-        break
+            break
+    else:
+        for move in lmovegen.genLegalMoves(lboard):
+            hasMove = True
+            break
 
     if not hasMove:
         if lboard.isChecked():
@@ -207,8 +211,8 @@ def getStatus(board):
 
 
 def standard_validate(board, move):
-    return validateMove(board.board, move.move) and not board.board.willLeaveInCheck(
-        move.move
+    return validateMove(board.board, move.move) and lmovegen.isLegalMove(
+        board.board, move.move
     )
 
 
@@ -287,8 +291,4 @@ def genCastles(board):
 
 
 def legalMoveCount(board):
-    moves = 0
-    for move in lmovegen.genAllMoves(board.board):
-        if not board.board.willLeaveInCheck(move):
-            moves += 1
-    return moves
+    return sum(1 for move in lmovegen.genLegalMoves(board.board))
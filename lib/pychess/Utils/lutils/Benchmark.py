@@ -1,7 +1,9 @@
 from pychess.Utils.lutils.LBoard import LBoard
-from pychess.Utils.lutils.leval import clearPawnTable
+from pychess.Utils.lutils.leval import clearPawnTable, evaltable
 from pychess.Utils.lutils.lmove import listToSan
 from pychess.Utils.lutils import lsearch
+from pychess.Utils.lutils.lsmp import SearchPool
+from pychess.Utils.lutils.TranspositionTable import TranspositionTable
 from pychess.Utils.const import NORMALCHESS
 import sys
 from time import time
@@ -27,42 +29,64 @@ benchmarkPositions = [
 ]
 
 
-def benchmark(maxdepth=6):
-    """Times a search of a static list of positions."""
+def benchmark(maxdepth=6, cores=1):
+    """Times a search of a static list of positions.
+    With cores > 1 Lazy SMP helper processes search with the main search
+    and their nodes are counted too."""
+
+    table = lsearch.table
+    pool = None
+    if cores > 1:
+        lsearch.table = TranspositionTable(table.size, shared=True)
+        pool = SearchPool(cores, lsearch.table)
 
     suite_time = time()
-    suite_nodes = lsearch.nodes
+    suite_nodes = 0
     lsearch.endtime = sys.maxsize
     lsearch.searching = True
-    for i, fen in enumerate(benchmarkPositions):
-        lsearch.table.clear()
-        clearPawnTable()
-        board = LBoard(NORMALCHESS)
-        board.applyFen(fen)
-        pos_start_time = time()
-        pos_start_nodes = lsearch.nodes
-        for depth in range(1, maxdepth):
-            mvs, scr = lsearch.alphaBeta(board, depth)
-            pos_time = time() - pos_start_time
-            pos_nodes = lsearch.nodes - pos_start_nodes
-            pv = " ".join(listToSan(board, mvs))
-            time_cs = int(100 * pos_time)
-            print(depth, scr, time_cs, pos_nodes, pv)
-        print(
-            "Searched position",
-            i,
-            "at",
-            int(pos_nodes / pos_time) if pos_time > 0 else pos_nodes,
-            "n/s",
-        )
+    try:
+        for i, fen in enumerate(benchmarkPositions):
+            lsearch.table.clear()
+            clearPawnTable()
+            evaltable.clear()
+            board = LBoard(NORMALCHESS)
+            board.applyFen(fen)
+            pos_start_time = time()
+            pos_start_nodes = lsearch.nodes
+            if pool is not None:
+                pool.start(board, maxdepth)
+            scr = None
+            for depth in range(1, maxdepth):
+                mvs, scr = lsearch.aspirationSearch(board, depth, scr)
+                pos_time = time() - pos_start_time
+                pos_nodes = lsearch.nodes - pos_start_nodes
+                if pool is not None:
+                    pos_nodes += pool.nodes
+                pv = " ".join(listToSan(board, mvs))
+                time_cs = int(100 * pos_time)
+                print(depth, scr, time_cs, pos_nodes, pv)
+            if pool is not None:
+                pool.stop()
+                pos_nodes = lsearch.nodes - pos_start_nodes + pool.nodes
+            suite_nodes += pos_nodes
+            print(
+                "Searched position",
+                i,
+                "at",
+                int(pos_nodes / pos_time) if pos_time > 0 else pos_nodes,
+                "n/s",
+            )
+    finally:
+        if pool is not None:
+            pool.close()
+            lsearch.table = table
     suite_time = time() - suite_time
-    suite_nodes = lsearch.nodes - suite_nodes
     print(
         "Total:",
         suite_nodes,
         "nodes in",
         suite_time,
-        "s: ",
+        "s using %s core(s): " % cores,
         suite_nodes / suite_time,
         "n/s",
     )
@@ -70,7 +70,7 @@ from pychess.Utils.const import (
     QUEEN_PROMOTION,
 )
 from pychess.Utils.repr import reprColor
-from .ldata import FILE, fileBits
+from .ldata import FILE, fileBits, materialValues, pawnScoreBoard
 from .attack import isAttacked
 from .bitboard import clearBit, iterBits, setBit, bitPosArray
 from .PolyglotHash import (
@@ -97,41 +97,102 @@ STRICT_FEN = False
 ################################################################################
 
 
+# Initial and final (castled) positions of kings and rooks
+INI_KINGS = (E1, E8)
+INI_ROOKS = ((A1, H1), (A8, H8))
+FIN_KINGS = ((C1, G1), (C8, G8))
+FIN_ROOKS = ((D1, F1), (D8, F8))
+
+NO_HOLDING = (
+    {
+        PAWN: 0,
+        KNIGHT: 0,
+        BISHOP: 0,
+        ROOK: 0,
+        QUEEN: 0,
+        HAWK: 0,
+        ELEPHANT: 0,
+        KING: 0,
+    },
+    {
+        PAWN: 0,
+        KNIGHT: 0,
+        BISHOP: 0,
+        ROOK: 0,
+        QUEEN: 0,
+        HAWK: 0,
+        ELEPHANT: 0,
+        KING: 0,
+    },
+)
+
+# The history of a board is a chain of tuples, one for every applied move,
+# holding what popMove() needs to restore the position before the move:
+# (move, captured piece, enpassant, castling, hash, fifty, checked, opchecked,
+#  variant state, history before the move)
+# The variant state is capture_promoting in drop variants, is_first_move in
+# cambodian, virgin in seirawan, and the exploded pieces in atomic chess.
+# The tuples are never changed, so clones share the history they start with.
+HIST_MOVE = 0
+HIST_TPIECE = 1
+HIST_HASH = 4
+HIST_VARIANT = 8
+HIST_PREV = 9
+
+
 class LBoard:
     __hash__ = None
 
-    ini_kings = (E1, E8)
-    ini_rooks = ((A1, H1), (A8, H8))
-
-    # Final positions of castled kings and rooks
-    fin_kings = ((C1, G1), (C8, G8))
-    fin_rooks = ((D1, F1), (D8, F8))
-
-    holding = (
-        {
-            PAWN: 0,
-            KNIGHT: 0,
-            BISHOP: 0,
-            ROOK: 0,
-            QUEEN: 0,
-            HAWK: 0,
-            ELEPHANT: 0,
-            KING: 0,
-        },
-        {
-            PAWN: 0,
-            KNIGHT: 0,
-            BISHOP: 0,
-            ROOK: 0,
-            QUEEN: 0,
-            HAWK: 0,
-            ELEPHANT: 0,
-            KING: 0,
-        },
+    __slots__ = (
+        "variant",
+        "materialValues",
+        "nags",
+        "children",
+        "next",
+        "prev",
+        "pieceBoard",
+        "fen_was_applied",
+        "plyCount",
+        "blocker",
+        "friends",
+        "kings",
+        "boards",
+        "enpassant",
+        "color",
+        "castling",
+        "hasCastled",
+        "fifty",
+        "checked",
+        "opchecked",
+        "arBoard",
+        "hash",
+        "pawnhash",
+        "material",
+        "psq",
+        "pieceCount",
+        "history",
+        "ini_kings",
+        "ini_rooks",
+        "fin_kings",
+        "fin_rooks",
+        "ini_queens",
+        "is_first_move",
+        "remaining_checks",
+        "virgin",
+        "holding",
+        "promoted",
+        "capture_promoting",
     )
 
     def __init__(self, variant=NORMALCHESS):
         self.variant = variant
+        self.materialValues = materialValues(variant)
+
+        self.ini_kings = INI_KINGS
+        self.ini_rooks = INI_ROOKS
+        self.fin_kings = FIN_KINGS
+        self.fin_rooks = FIN_ROOKS
+        self.holding = NO_HOLDING
 
         self.nags = []
         # children can contain comments and variations
@@ -154,27 +215,85 @@ class LBoard:
     @property
     def lastMove(self):
         return (
-            self.hist_move[-1]
-            if self.fen_was_applied and len(self.hist_move) > 0
+            self.history[HIST_MOVE]
+            if self.fen_was_applied and self.history is not None
             else None
         )
 
+    def _historyItems(self, index):
+        """The index item of the history records, oldest first"""
+        items = []
+        record = self.history
+        while record is not None:
+            items.append(record[index])
+            record = record[HIST_PREV]
+        items.reverse()
+        return items
+
+    # Lists of the history, mainly for tests. Don't use them in loops.
+
+    @property
+    def hist_move(self):
+        return self._historyItems(HIST_MOVE)
+
+    @property
+    def hist_hash(self):
+        return self._historyItems(HIST_HASH)
+
+    @property
+    def hist_capture_promoting(self):
+        return self._historyItems(HIST_VARIANT)
+
+    @property
+    def hist_exploding_around(self):
+        return [a for a in self._historyItems(HIST_VARIANT) if a is not None]
+
+    def __getstate__(self):
+        # The history chain is pickled as a flat list, as deeply nested
+        # tuples would exceed the recursion limit of pickle in long games
+        state = {
+            name: getattr(self, name)
+            for name in self.__slots__
+            if hasattr(self, name) and name != "history"
+        }
+        if hasattr(self, "history"):
+            records = []
+            record = self.history
+            while record is not None:
+                records.append(record[:HIST_PREV])
+                record = record[HIST_PREV]
+            records.reverse()
+            state["history"] = records
+        return state
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            if name == "history":
+                history = None
+                for record in value:
+                    history = record + (history,)
+                value = history
+            setattr(self, name, value)
+
     def repetitionCount(self, draw_threshold=3):
         rc = 1
-        for ply in range(4, 1 + min(len(self.hist_hash), self.fifty), 2):
-            if self.hist_hash[-ply] == self.hash:
+        record = self.history
+        for ply in range(1, self.fifty + 1):
+            if record is None:
+                break
+            if ply >= 4 and not ply & 1 and record[HIST_HASH] == self.hash:
                 rc += 1
                 if rc >= draw_threshold:
                     break
+            record = record[HIST_PREV]
         return rc
 
     def iniAtomic(self):
-        self.hist_exploding_around = []
+        pass
 
     def iniHouse(self):
         self.promoted = [0] * 64
         self.capture_promoting = False
-        self.hist_capture_promoting = []
         self.holding = (
             {
                 PAWN: 0,
@@ -202,11 +321,22 @@ class LBoard:
         self.ini_kings = (D1, E8)
         self.ini_queens = (E1, D8)
         self.is_first_move = {KING: [True, True], QUEEN: [True, True]}
-        self.hist_is_first_move = []
+
+    def iniMaterial(self):
+        """Sums up material and pawn square tables from scratch, needed when
+        the variant of the board changes"""
+        self.materialValues = materialValues(self.variant)
+        self.material = [0, 0]
+        self.psq = [0, 0]
+        for color in (WHITE, BLACK):
+            boards = self.boards[color]
+            for piece, value in enumerate(self.materialValues):
+                self.material[color] += value * bin(boards[piece]).count("1")
+            for cord in iterBits(boards[PAWN]):
+                self.psq[color] += pawnScoreBoard[color][cord]
 
     def iniSchess(self):
         self.virgin = [0, 0]
-        self.hist_virgin = []
 
     def applyFen(self, fenstr):
         """Applies the fenstring to the board.
@@ -245,16 +375,13 @@ class LBoard:
         self.hash = 0
         self.pawnhash = 0
 
-        #  Data from the position's history:
-        self.hist_move = []  # The move that was applied to get the position
-        self.hist_tpiece = []
-        # The piece the move captured, == EMPTY for normal moves
-        self.hist_enpassant = []
-        self.hist_castling = []
-        self.hist_hash = []
-        self.hist_fifty = []
-        self.hist_checked = []
-        self.hist_opchecked = []
+        # Material and pawn square table sums of the pieces on the board, kept
+        # up to date like the hashes, so evaluation doesn't have to add them up
+        self.material = [0, 0]
+        self.psq = [0, 0]
+
+        # The moves applied to get the position, see HIST_MOVE
+        self.history = None
 
         # piece counts
         self.pieceCount = ([0] * 9, [0] * 9)
@@ -572,9 +699,11 @@ class LBoard:
 
         if piece == PAWN:
             self.pawnhash ^= pieceHashes[color][PAWN][cord]
+            self.psq[color] += pawnScoreBoard[color][cord]
         elif piece == KING:
             self.kings[color] = cord
         self.hash ^= pieceHashes[color][piece][cord]
+        self.material[color] += self.materialValues[piece]
         self.arBoard[cord] = piece
 
     def _removePiece(self, cord, piece, color):
@@ -585,8 +714,10 @@ class LBoard:
 
         if piece == PAWN:
             self.pawnhash ^= pieceHashes[color][PAWN][cord]
+            self.psq[color] -= pawnScoreBoard[color][cord]
 
         self.hash ^= pieceHashes[color][piece][cord]
+        self.material[color] -= self.materialValues[piece]
         self.arBoard[cord] = EMPTY
 
     def setColor(self, color):
@@ -667,29 +798,44 @@ class LBoard:
             )
         )
 
-        self.hist_move.append(move)
-        self.hist_enpassant.append(self.enpassant)
-        self.hist_castling.append(self.castling)
-        self.hist_hash.append(self.hash)
-        self.hist_fifty.append(self.fifty)
-        self.hist_checked.append(self.checked)
-        self.hist_opchecked.append(self.opchecked)
+        # The state popMove() restores
+        hist_enpassant = self.enpassant
+        hist_castling = self.castling
+        hist_hash = self.hash
+        hist_fifty = self.fifty
+        hist_checked = self.checked
+        hist_opchecked = self.opchecked
+        variantState = None
         if self.variant in DROP_VARIANTS and self.variant != SCHESS:
-            self.hist_capture_promoting.append(self.capture_promoting)
-        if self.variant == CAMBODIANCHESS:
-            self.hist_is_first_move.append(
-                {KING: self.is_first_move[KING][:], QUEEN: self.is_first_move[QUEEN][:]}
-            )
+            variantState = self.capture_promoting
+        elif self.variant == CAMBODIANCHESS:
+            variantState = {
+                KING: self.is_first_move[KING][:],
+                QUEEN: self.is_first_move[QUEEN][:],
+            }
         elif self.variant == SCHESS:
-            self.hist_virgin.append(self.virgin[:])
+            variantState = self.virgin[:]
 
         self.opchecked = None
         self.checked = None
 
         # null move
         if fcord == tcord and flag != DROP and flag != QUEEN_PROMOTION:
+            self.setEnpassant(None)
             self.setColor(opcolor)
             self.plyCount += 1
+            self.history = (
+                move,
+                EMPTY,
+                hist_enpassant,
+                hist_castling,
+                hist_hash,
+                hist_fifty,
+                hist_checked,
+                hist_opchecked,
+                variantState,
+                self.history,
+            )
             return move
 
         if self.variant == CAMBODIANCHESS:
@@ -760,15 +906,14 @@ class LBoard:
                             castling &= ~CAS_FLAGS[opcolor][0]
                         elif acord == self.ini_rooks[opcolor][1]:
                             castling &= ~CAS_FLAGS[opcolor][1]
-                self.hist_exploding_around.append(apieces)
-        self.hist_tpiece.append(tpiece)
+                variantState = apieces
 
         # Remove moving piece(s), then add them at their destination.
         if flag == DROP:
             if self.variant in DROP_VARIANTS:
                 assert self.holding[color][fpiece] > 0
-            self.holding[color][fpiece] -= 1
             self.hash ^= holdingHash[color][fpiece][self.holding[color][fpiece]]
+            self.holding[color][fpiece] -= 1
             self.pieceCount[color][fpiece] += 1
         else:
             self._removePiece(fcord, fpiece, color)
@@ -796,7 +941,7 @@ class LBoard:
                         self._removePiece(acord, apiece, acolor)
                         self.pieceCount[acolor][apiece] -= 1
                         apieces.append((acord, apiece, acolor))
-                self.hist_exploding_around.append(apieces)
+                variantState = apieces
         elif flag in PROMOTIONS:
             # Pretend the pawn changes into a piece before reaching its destination.
             fpiece = flag - 2
@@ -818,8 +963,8 @@ class LBoard:
 
         if flag in GATINGS:
             gpiece = HAWK if flag in (HAWK_GATE, HAWK_GATE_AT_ROOK) else ELEPHANT
-            self.holding[color][gpiece] -= 1
             self.hash ^= holdingHash[color][gpiece][self.holding[color][gpiece]]
+            self.holding[color][gpiece] -= 1
             self.pieceCount[color][gpiece] += 1
             self._addPiece(gcord if (kcastle or qcastle) else fcord, gpiece, color)
 
@@ -877,6 +1022,18 @@ class LBoard:
 
         self.setColor(opcolor)
         self.plyCount += 1
+        self.history = (
+            move,
+            tpiece,
+            hist_enpassant,
+            hist_castling,
+            hist_hash,
+            hist_fifty,
+            hist_checked,
+            hist_opchecked,
+            variantState,
+            self.history,
+        )
 
     def popMove(self):
         # Note that we remove the last made move, which was not made by boards
@@ -884,8 +1041,18 @@ class LBoard:
         color = 1 - self.color
         opcolor = self.color
 
-        move = self.hist_move.pop()
-        cpiece = self.hist_tpiece.pop()
+        (
+            move,
+            cpiece,
+            hist_enpassant,
+            hist_castling,
+            hist_hash,
+            hist_fifty,
+            hist_checked,
+            hist_opchecked,
+            variantState,
+            self.history,
+        ) = self.history
 
         flag = move >> 12
 
@@ -893,8 +1060,27 @@ class LBoard:
         tcord = move & 63
         tpiece = self.arBoard[tcord]
 
+        # null move
         if fcord == tcord and flag != DROP and flag != QUEEN_PROMOTION:
+            if self.variant in DROP_VARIANTS and self.variant != SCHESS:
+                self.capture_promoting = variantState
+            elif self.variant == CAMBODIANCHESS:
+                self.is_first_move = {
+                    KING: variantState[KING][:],
+                    QUEEN: variantState[QUEEN][:],
+                }
+            elif self.variant == SCHESS:
+                self.virgin = variantState[:]
+
             self.setColor(color)
+
+            self.checked = hist_checked
+            self.opchecked = hist_opchecked
+            self.enpassant = hist_enpassant
+            self.castling = hist_castling
+            self.hash = hist_hash
+            self.fifty = hist_fifty
+            self.plyCount -= 1
             return
 
         if flag in GATINGS:
@@ -959,7 +1145,7 @@ class LBoard:
                     self.holding[color][cpiece] -= 1
                     self.hash ^= holdingHash[color][cpiece][self.holding[color][cpiece]]
             elif self.variant == ATOMICCHESS:
-                apieces = self.hist_exploding_around.pop()
+                apieces = variantState
                 for acord, apiece, acolor in apieces:
                     self._addPiece(acord, apiece, acolor)
                     self.pieceCount[acolor][apiece] += 1
@@ -974,7 +1160,7 @@ class LBoard:
                 self.holding[color][PAWN] -= 1
                 self.hash ^= holdingHash[color][PAWN][self.holding[color][PAWN]]
             elif self.variant == ATOMICCHESS:
-                apieces = self.hist_exploding_around.pop()
+                apieces = variantState
                 for acord, apiece, acolor in apieces:
                     self._addPiece(acord, apiece, acolor)
                     self.pieceCount[acolor][apiece] += 1
@@ -1008,21 +1194,25 @@ class LBoard:
                     self.promoted[tcord] = 1
                 else:
                     self.promoted[tcord] = 0
-            self.capture_promoting = self.hist_capture_promoting.pop()
-
-        if self.variant == CAMBODIANCHESS:
-            self.is_first_move = self.hist_is_first_move.pop()
+            self.capture_promoting = variantState
+        elif self.variant == CAMBODIANCHESS:
+            # History records may be shared by clones, so they are never
+            # changed in place
+            self.is_first_move = {
+                KING: variantState[KING][:],
+                QUEEN: variantState[QUEEN][:],
+            }
         elif self.variant == SCHESS:
-            self.virgin = self.hist_virgin.pop()
+            self.virgin = variantState[:]
 
         self.setColor(color)
 
-        self.checked = self.hist_checked.pop()
-        self.opchecked = self.hist_opchecked.pop()
-        self.enpassant = self.hist_enpassant.pop()
-        self.castling = self.hist_castling.pop()
-        self.hash = self.hist_hash.pop()
-        self.fifty = self.hist_fifty.pop()
+        self.checked = hist_checked
+        self.opchecked = hist_opchecked
+        self.enpassant = hist_enpassant
+        self.castling = hist_castling
+        self.hash = hist_hash
+        self.fifty = hist_fifty
         self.plyCount -= 1
 
     def __eq__(self, other):
@@ -1254,18 +1444,14 @@ class LBoard:
         copy.castling = self.castling
         copy.hash = self.hash
         copy.pawnhash = self.pawnhash
+        copy.material = self.material[:]
+        copy.psq = self.psq[:]
         copy.fifty = self.fifty
         copy.checked = self.checked
         copy.opchecked = self.opchecked
 
-        copy.hist_move = self.hist_move[:]
-        copy.hist_tpiece = self.hist_tpiece[:]
-        copy.hist_enpassant = self.hist_enpassant[:]
-        copy.hist_castling = self.hist_castling[:]
-        copy.hist_hash = self.hist_hash[:]
-        copy.hist_fifty = self.hist_fifty[:]
-        copy.hist_checked = self.hist_checked[:]
-        copy.hist_opchecked = self.hist_opchecked[:]
+        # The history records are immutable, so the copy shares them
+        copy.history = self.history
 
         if self.variant == FISCHERRANDOMCHESS:
             copy.ini_kings = self.ini_kings[:]
@@ -1278,12 +1464,8 @@ class LBoard:
             copy.promoted = self.promoted[:]
             copy.holding = (self.holding[0].copy(), self.holding[1].copy())
             copy.capture_promoting = self.capture_promoting
-            copy.hist_capture_promoting = self.hist_capture_promoting[:]
             if self.variant == SCHESS:
                 copy.virgin = self.virgin[:]
-                copy.hist_virgin = self.hist_virgin[:]
-        elif self.variant == ATOMICCHESS:
-            copy.hist_exploding_around = [a[:] for a in self.hist_exploding_around]
         elif self.variant == THREECHECKCHESS:
             copy.remaining_checks = self.remaining_checks[:]
         elif self.variant == CAMBODIANCHESS:
@@ -1293,7 +1475,6 @@ class LBoard:
                 KING: self.is_first_move[KING][:],
                 QUEEN: self.is_first_move[QUEEN][:],
             }
-            copy.hist_is_first_move = self.hist_is_first_move[:]
 
         copy.fen_was_applied = self.fen_was_applied
         return copy
@@ -1,7 +1,10 @@
+import os
+import tempfile
 from ctypes import create_string_buffer, memset
+from multiprocessing.sharedctypes import RawArray
 from struct import Struct
 
-from pychess.Utils.const import hashfALPHA, hashfBETA, hashfEXACT, hashfBAD
+from pychess.Utils.const import NORMALCHESS, hashfALPHA, hashfBETA, hashfEXACT, hashfBAD
 from pychess.Utils.lutils.ldata import MATE_VALUE, MAXPLY
 
 # Store hash entries in buckets of 4. An entry consists of:
@@ -13,13 +16,28 @@ from pychess.Utils.lutils.ldata import MATE_VALUE, MAXPLY
 # move        best move (or cutoff move)
 entryType = Struct("=I B B H h H")
 
+# Header of saved table files: magic, entry size, number of buckets, search_id,
+# variant
+FILE_MAGIC = b"PCT2"
+fileHeader = Struct("<4s B I B H")
+
+# Number of entries sampled by hashfull()
+HASHFULL_SAMPLE = 1000
+
+
+def checksum(search_id, hashf, depth, score, move):
+    """The stored key is xored with the rest of the entry, so entries torn by
+    concurrent writers of a shared table don't match any position"""
+    return (depth << 16 | hashf << 8 | search_id) ^ (move << 16 | score & 0xFFFF)
+
 
 class TranspositionTable:
-    def __init__(self, maxSize):
-        assert maxSize > 0
-        self.buckets = maxSize // (4 * entryType.size)
-        self.data = create_string_buffer(self.buckets * 4 * entryType.size)
-        self.search_id = 0
+    def __init__(self, maxSize, shared=False, data=None):
+        """If shared is True the table is allocated in shared memory, so it
+        can be passed to helper processes, which create their table object
+        from it with the data param."""
+        self.shared = shared
+        self.resize(maxSize, data)
 
         self.killer1 = [-1] * 80
         self.killer2 = [-1] * 80
@@ -27,6 +45,21 @@ class TranspositionTable:
 
         self.butterfly = [0] * (64 * 64)
 
+    def resize(self, maxSize, data=None):
+        """Allocates a new empty table of maxSize bytes. Helper processes
+        sharing the old table have to be restarted with the new one."""
+        assert maxSize > 0
+        self.buckets = max(1, maxSize // (4 * entryType.size))
+        if data is not None:
+            self.data = data
+        elif self.shared:
+            self.data = RawArray("c", self.buckets * 4 * entryType.size)
+        else:
+            self.data = create_string_buffer(self.buckets * 4 * entryType.size)
+        self.size = maxSize
+        self.search_id = 0
+        self.resetStats()
+
     def clear(self):
         memset(self.data, 0, self.buckets * 4 * entryType.size)
         self.killer1 = [-1] * 80
@@ -38,14 +71,94 @@ class TranspositionTable:
         self.search_id = (self.search_id + 1) & 0xFF
         # TODO: consider clearing butterfly table
 
+    def resetStats(self):
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.collisions = 0
+
+    def hashfull(self):
+        """Permille of the sampled entries written by the current search"""
+        entries = min(HASHFULL_SAMPLE, self.buckets * 4)
+        used = 0
+        for i in range(entries):
+            tkey, search_id = entryType.unpack_from(self.data, i * entryType.size)[:2]
+            if tkey != 0 and search_id == self.search_id:
+                used += 1
+        return used * 1000 // entries
+
+    def stats(self):
+        """Returns (hashfull, hit rate, collision rate) permilles.
+        Rates are counted since the last resetStats()."""
+        return (
+            self.hashfull(),
+            self.hits * 1000 // self.probes if self.probes else 0,
+            self.collisions * 1000 // self.stores if self.stores else 0,
+        )
+
+    def save(self, path, variant=NORMALCHESS):
+        """Writes the table of variant to a file, so a later session can load
+        it. Other processes saving to the same file never see a partly
+        written one."""
+        fd, tmp_path = tempfile.mkstemp(
+            prefix=os.path.basename(path) + ".",
+            suffix=".tmp",
+            dir=os.path.dirname(path) or None,
+        )
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(
+                    fileHeader.pack(
+                        FILE_MAGIC,
+                        entryType.size,
+                        self.buckets,
+                        self.search_id,
+                        variant,
+                    )
+                )
+                f.write(memoryview(self.data).cast("B"))
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def load(self, path, variant=NORMALCHESS):
+        """Reads a table written by save(). Returns False and keeps the table
+        unchanged if the file is missing, has another table size or was saved
+        for another variant."""
+        try:
+            with open(path, "rb") as f:
+                header = f.read(fileHeader.size)
+                if len(header) != fileHeader.size:
+                    return False
+                magic, entry_size, buckets, search_id, file_variant = fileHeader.unpack(
+                    header
+                )
+                if (
+                    magic != FILE_MAGIC
+                    or entry_size != entryType.size
+                    or buckets != self.buckets
+                    or file_variant != variant
+                ):
+                    return False
+                if f.readinto(memoryview(self.data).cast("B")) != len(self.data):
+                    self.clear()
+                    return False
+        except OSError:
+            return False
+        self.search_id = search_id
+        return True
+
     def probe(self, board, depth, alpha, beta):
+        self.probes += 1
         baseIndex = (board.hash % self.buckets) * 4
         key = (board.hash // self.buckets) & 0xFFFFFFFF
         for i in range(baseIndex, baseIndex + 4):
             tkey, search_id, hashf, tdepth, score, move = entryType.unpack_from(
                 self.data, i * entryType.size
             )
-            if tkey == key:
+            if tkey ^ checksum(search_id, hashf, tdepth, score, move) == key:
+                self.hits += 1
                 # Mate score bounds are guaranteed to be accurate at any depth.
                 if tdepth < depth and abs(score) < MATE_VALUE - MAXPLY:
                     return move, score, hashfBAD
@@ -59,6 +172,7 @@ class TranspositionTable:
     def record(self, board, move, score, hashf, depth):
         baseIndex = (board.hash % self.buckets) * 4
         key = (board.hash // self.buckets) & 0xFFFFFFFF
+        self.stores += 1
         # We always overwrite *something*: an empty slot, this position's last entry, or else the least relevant.
         staleIndex = baseIndex
         staleRelevance = 0xFFFF
@@ -66,7 +180,10 @@ class TranspositionTable:
             tkey, search_id, thashf, tdepth, tscore, tmove = entryType.unpack_from(
                 self.data, i * entryType.size
             )
-            if tkey == 0 or tkey == key:
+            if (
+                tkey == 0
+                or tkey ^ checksum(search_id, thashf, tdepth, tscore, tmove) == key
+            ):
                 staleIndex = i
                 break
             relevance = (
@@ -77,10 +194,13 @@ class TranspositionTable:
             if relevance < staleRelevance:
                 staleIndex = i
                 staleRelevance = relevance
+        else:
+            # the entry of another position gets overwritten
+            self.collisions += 1
         entryType.pack_into(
             self.data,
             staleIndex * entryType.size,
-            key,
+            key ^ checksum(self.search_id, hashf, depth, score, move),
             self.search_id,
             hashf,
             depth,
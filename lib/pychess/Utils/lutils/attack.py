@@ -1,5 +1,21 @@
-from .bitboard import bitPosArray, notBitPosArray, lastBit, firstBit, clearBit, lsb
+from .bitboard import (
+    bitPosArray,
+    notBitPosArray,
+    lastBit,
+    firstBit,
+    clearBit,
+    iterBits,
+    lsb,
+)
 from .ldata import moveArray, rays, directions, fromToRay, PIECE_VALUES, PAWN_VALUE
+from .sliding import (
+    bishopAttacks,
+    bishopMask,
+    bishopTable,
+    rookAttacks,
+    rookMask,
+    rookTable,
+)
 from pychess.Utils.const import (
     ASEAN_VARIANTS,
     ASEAN_BBISHOP,
@@ -38,7 +54,6 @@ def isAttacked(board, cord, color, ischecked=False):
     if (pboards[KNIGHT] | pboards[HAWK] | pboards[ELEPHANT]) & _moveArray[KNIGHT][cord]:
         return True
 
-    rayto = fromToRay[cord]
     blocker = board.blocker
 
     # Bishops & Queens
@@ -52,16 +67,9 @@ def isAttacked(board, cord, color, ischecked=False):
         bitboard = (pboards[BISHOP] | pboards[HAWK] | pboards[QUEEN]) & _moveArray[
             BISHOP
         ][cord]
-        if bitboard:
-            others = ~bitboard & blocker
-            # inlined iterBits()
-            while bitboard:
-                bit = bitboard & -bitboard
-                ray = rayto[lsb[bit]]
-                # If there is a path and no other piece stand in our way
-                if ray and not ray & others:
-                    return True
-                bitboard -= bit
+        # inlined bishopAttacks()
+        if bitboard and bitboard & bishopTable[cord][blocker & bishopMask[cord]]:
+            return True
 
     # Rooks & Queens
     if board.variant in ASEAN_VARIANTS:
@@ -70,20 +78,13 @@ def isAttacked(board, cord, color, ischecked=False):
         bitboard = (pboards[ROOK] | pboards[QUEEN] | pboards[ELEPHANT]) & _moveArray[
             ROOK
         ][cord]
-    if bitboard:
-        others = ~bitboard & blocker
-        # inlined iterBits()
-        while bitboard:
-            bit = bitboard & -bitboard
-            ray = rayto[lsb[bit]]
-            # If there is a path and no other piece stand in our way
-            if ray and not ray & others:
-                return True
-            bitboard -= bit
-
-            # Pawns
-            # Would a pawn of the opposite color, standing at out kings cord, be able
-            # to attack any of our pawns?
+    # inlined rookAttacks()
+    if bitboard and bitboard & rookTable[cord][blocker & rookMask[cord]]:
+        return True
+
+    # Pawns
+    # Would a pawn of the opposite color, standing at out kings cord, be able
+    # to attack any of our pawns?
     ptype = color == WHITE and BPAWN or PAWN
     if pboards[PAWN] & _moveArray[ptype][cord]:
         return True
@@ -183,7 +184,6 @@ def getAttacks(board, cord, color):
     # Pawns, to test , bug possible with BPAWN
     bits |= pieces[PAWN] & _moveArray[color == WHITE and BPAWN or PAWN][cord]
 
-    rayto = fromToRay[cord]
     blocker = board.blocker
 
     # Bishops and Queens
@@ -193,36 +193,17 @@ def getAttacks(board, cord, color):
 
         bits |= pieces[QUEEN] & _moveArray[ASEAN_QUEEN][cord]
     else:
-        bitboard = (pieces[BISHOP] | pieces[QUEEN] | pieces[HAWK]) & _moveArray[BISHOP][
-            cord
-        ]
-        # inlined iterBits()
-        # check whether or not there is a piece blocking the path in diagonal
-        while bitboard:
-            bit = bitboard & -bitboard
-            c = lsb[bit]
-            ray = rayto[c]
-            if ray and not clearBit(ray & blocker, c):
-                bits |= bitPosArray[c]
-            bitboard -= bit
+        bits |= (pieces[BISHOP] | pieces[QUEEN] | pieces[HAWK]) & bishopAttacks(
+            cord, blocker
+        )
 
     # Rooks and queens
     if board.variant in ASEAN_VARIANTS:
-        bitboard = pieces[ROOK] & _moveArray[ROOK][cord]
+        bits |= pieces[ROOK] & rookAttacks(cord, blocker)
     else:
-        bitboard = (pieces[ROOK] | pieces[QUEEN] | pieces[ELEPHANT]) & _moveArray[ROOK][
-            cord
-        ]
-    # inlined iterBits()
-
-    # check whether or not there is a piece blocking the path in straight line
-    while bitboard:
-        bit = bitboard & -bitboard
-        c = lsb[bit]
-        ray = rayto[c]
-        if ray and not clearBit(ray & blocker, c):
-            bits |= bitPosArray[c]
-        bitboard -= bit
+        bits |= (pieces[ROOK] | pieces[QUEEN] | pieces[ELEPHANT]) & rookAttacks(
+            cord, blocker
+        )
 
     return bits
 
@@ -279,6 +260,37 @@ def pinnedOnKing(board, cord, color):
     return False
 
 
+def pinMasks(board, color):
+    """Finds all pieces of color pinned against their king at once. Returns a
+    dict mapping the cord of every pinned piece to the cords it may still
+    move to: the cords between the king and the pinner, and the pinner."""
+
+    kingCord = board.kings[color]
+    pins = {}
+    if kingCord == -1 or board.variant in ASEAN_VARIANTS:
+        return pins
+
+    opboards = board.boards[1 - color]
+    enemies = board.friends[1 - color]
+    friends = board.friends[color]
+
+    # Sliders which would attack the king if our own pieces weren't there
+    pinners = (opboards[BISHOP] | opboards[QUEEN] | opboards[HAWK]) & bishopAttacks(
+        kingCord, enemies
+    )
+    pinners |= (opboards[ROOK] | opboards[QUEEN] | opboards[ELEPHANT]) & rookAttacks(
+        kingCord, enemies
+    )
+
+    for cord in iterBits(pinners):
+        ray = fromToRay[kingCord][cord]
+        between = clearBit(ray, cord) & friends
+        # Exactly one of our pieces in between
+        if between and not between & (between - 1):
+            pins[firstBit(between)] = ray
+    return pins
+
+
 def staticExchangeEvaluate(board, moveOrTcord, color=None):
     """The GnuChess Static Exchange Evaluator (or SEE for short).
     First determine the target square.  Create a bitboard of all squares
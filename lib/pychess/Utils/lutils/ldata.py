@@ -1,5 +1,3 @@
-from functools import reduce
-from operator import or_
 from pychess.Utils.const import (
     WHITE,
     BLACK,
@@ -12,28 +10,14 @@ from pychess.Utils.const import (
     QUEEN,
     A1,
     A2,
-    A3,
-    A4,
-    A5,
-    A6,
     A7,
     A8,
     B2,
-    C3,
-    D4,
-    E5,
-    F6,
     G7,
     H8,
     B7,
-    C6,
-    D5,
-    E4,
-    F3,
     G2,
     H1,
-    B1,
-    B8,
     H2,
     H7,
     G3,
@@ -41,9 +25,15 @@ from pychess.Utils.const import (
     B3,
     B6,
     sliders,
+    ASEAN_VARIANTS,
+    ATOMICCHESS,
+    CRAZYHOUSECHESS,
+    GIVEAWAYCHESS,
+    LOSERSCHESS,
+    SUICIDECHESS,
 )
 
-from .bitboard import bitPosArray, iterBits, setBit
+from .bitboard import bitPosArray, setBit
 
 
 def RANK(cord):
@@ -80,6 +70,31 @@ ASEAN_PIECE_VALUES = (0, 100, 450, 300, 630, 180, 2000)
 CRAZY_PIECE_VALUES = (0, 100, 200, 240, 240, 380, 2000)
 ATOMIC_PIECE_VALUES = (0, 100, 90, 0, 220, 850, 2000)
 
+# The piece values summed up in LBoard.material, as leval.evalMaterial() counts
+# them. Losers and suicide count pieces, and the king is only counted where it
+# can be lost.
+MATERIAL_VALUES = tuple(PIECE_VALUES[:KING]) + (0, 0, 0)
+CRAZY_MATERIAL_VALUES = CRAZY_PIECE_VALUES[:KING] + (0, 0, 0)
+ATOMIC_MATERIAL_VALUES = ATOMIC_PIECE_VALUES + (0, 0)
+ASEAN_MATERIAL_VALUES = ASEAN_PIECE_VALUES + (0, 0)
+LOSERS_MATERIAL_VALUES = (0, 1, 1, 1, 1, 1, 0, 0, 0)
+SUICIDE_MATERIAL_VALUES = (0, 1, 1, 1, 1, 1, 1, 0, 0)
+
+
+def materialValues(variant):
+    if variant == CRAZYHOUSECHESS:
+        return CRAZY_MATERIAL_VALUES
+    elif variant == LOSERSCHESS:
+        return LOSERS_MATERIAL_VALUES
+    elif variant in (SUICIDECHESS, GIVEAWAYCHESS):
+        return SUICIDE_MATERIAL_VALUES
+    elif variant == ATOMICCHESS:
+        return ATOMIC_MATERIAL_VALUES
+    elif variant in ASEAN_VARIANTS:
+        return ASEAN_MATERIAL_VALUES
+    return MATERIAL_VALUES
+
+
 # Maximum possible search depth. The hash structure only allows 8-bit depths.
 MAXPLY = 10
 # Maximum possible score. Mate in n ply is +/- (MATE_VALUE-n).
@@ -1285,96 +1300,10 @@ for cord in range(A2, H2 + 1):
 for cord in range(A7, H7 + 1):
     squarePawnMask[BLACK][cord] = squarePawnMask[BLACK][cord - 8]
 
-# These tables are used to calculate rook, queen and bishop moves
+# The lines through each cord, used to find the lines a move opens or closes.
+# Sliding attacks are looked up in the tables of the sliding module.
 
 ray00 = [rays[cord][5] | rays[cord][6] | 1 << (63 - cord) for cord in range(64)]
 ray45 = [rays[cord][0] | rays[cord][3] | 1 << (63 - cord) for cord in range(64)]
 ray90 = [rays[cord][4] | rays[cord][7] | 1 << (63 - cord) for cord in range(64)]
 ray135 = [rays[cord][1] | rays[cord][2] | 1 << (63 - cord) for cord in range(64)]
-
-attack00 = [{} for a in range(64)]
-attack45 = [{} for a in range(64)]
-attack90 = [{} for a in range(64)]
-attack135 = [{} for a in range(64)]
-
-cmap = [128, 64, 32, 16, 8, 4, 2, 1]
-rot1 = [A1, A2, A3, A4, A5, A6, A7, A8]
-rot2 = [A1, B2, C3, D4, E5, F6, G7, H8]
-rot3 = [A8, B7, C6, D5, E4, F3, G2, H1]
-
-# To save time, we init a main line for each of the four directions, and next
-# we will translate it for each possible cord
-for cord in range(8):
-    for map in range(1, 256):
-        # Skip entries without cord set, as cord will always be set
-        if not map & cmap[cord]:
-            continue
-
-        # Find limits inclusive
-        cord1 = cord2 = cord
-        while cord1 > 0:
-            cord1 -= 1
-            if cmap[cord1] & map:
-                break
-        while cord2 < 7:
-            cord2 += 1
-            if cmap[cord2] & map:
-                break
-
-        # Remember A1 is the left most bit
-        map00 = map << 56
-
-        attack00[cord][map00] = fromToRay[cord][cord1] | fromToRay[cord][cord2]
-
-        map90 = reduce(or_, (1 << 63 - rot1[c] for c in iterBits(map00)))
-        attack90[rot1[cord]][map90] = (
-            fromToRay[rot1[cord]][rot1[cord1]] | fromToRay[rot1[cord]][rot1[cord2]]
-        )
-
-        map45 = reduce(or_, (1 << 63 - rot2[c] for c in iterBits(map00)))
-        attack45[rot2[cord]][map45] = (
-            fromToRay[rot2[cord]][rot2[cord1]] | fromToRay[rot2[cord]][rot2[cord2]]
-        )
-
-        map135 = reduce(or_, (1 << 63 - rot3[c] for c in iterBits(map00)))
-        attack135[rot3[cord]][map135] = (
-            fromToRay[rot3[cord]][rot3[cord1]] | fromToRay[rot3[cord]][rot3[cord2]]
-        )
-
-MAXBITBOARD = (1 << 64) - 1
-
-for r in range(A2, A8 + 1, 8):
-    for cord in iterBits(ray00[r]):
-        attack00[cord] = {map >> 8: ray >> 8 for map, ray in attack00[cord - 8].items()}
-
-for r in range(B1, H1 + 1):
-    for cord in iterBits(ray90[r]):
-        attack90[cord] = {map >> 1: ray >> 1 for map, ray in attack90[cord - 1].items()}
-
-# Bottom right
-for r in range(B1, H1 + 1):
-    for cord in iterBits(ray45[r]):
-        attack45[cord] = {
-            map << 8 & MAXBITBOARD: ray << 8 & MAXBITBOARD
-            for map, ray in attack45[cord + 8].items()
-        }
-
-# Top left
-for r in reversed(range(A8, H8)):
-    for cord in iterBits(ray45[r]):
-        attack45[cord] = {map >> 8: ray >> 8 for map, ray in attack45[cord - 8].items()}
-
-# Top right
-for r in range(B8, H8 + 1):
-    for cord in iterBits(ray135[r]):
-        attack135[cord] = {
-            map >> 8: ray >> 8 for map, ray in attack135[cord - 8].items()
-        }
-
-# Bottom left
-for r in reversed(range(A1, H1)):
-    for cord in iterBits(ray135[r]):
-        attack135[cord] = {
-            map << 8 & MAXBITBOARD: ray << 8 & MAXBITBOARD
-            for map, ray in attack135[cord + 8].items()
-        }
@@ -38,14 +38,11 @@ from .bitboard import iterBits, firstBit, lsb
 from .ldata import (
     fileBits,
     bitPosArray,
-    PIECE_VALUES,
     FILE,
     RANK,
     PAWN_VALUE,
     WHITE_SQUARES,
     BLACK_SQUARES,
-    ASEAN_PIECE_VALUES,
-    ATOMIC_PIECE_VALUES,
     CRAZY_PIECE_VALUES,
     kwingpawns1,
     kwingpawns2,
@@ -68,7 +65,6 @@ from .ldata import (
     isolani_weaker,
     passedPawnMask,
     fromToRay,
-    pawnScoreBoard,
     sdistance,
     taxicab,
     racingKing,
@@ -86,10 +82,107 @@ randomval = 0  # randint(8,12)/10.
 CHECK_BONUS = (0, 100, 500, 2000)
 
 
+################################################################################
+# Evaluation hash                                                              #
+################################################################################
+
+# Store evaluations in buckets of 4. An entry consists of:
+# key         32 bits derived from the board hash
+# age         counter of the search which stored the entry
+# flags       the color evaluated for and the state the evaluation depends on,
+#             which isn't part of the board hash
+# score       evaluation score
+evalEntryType = Struct("=I B B h")
+EVAL_TABLE_SIZE = 4 * 1024 * 1024
+
+
+class EvalHashTable:
+    def __init__(self, size):
+        self.resize(size)
+
+    def resize(self, size):
+        """Allocates a new empty table of size bytes. A table of less than
+        one bucket doesn't store anything."""
+        self.buckets = size // (4 * evalEntryType.size)
+        self.data = create_string_buffer(max(1, self.buckets) * 4 * evalEntryType.size)
+        self.size = size
+        self.age = 0
+        self.resetStats()
+
+    def clear(self):
+        memset(self.data, 0, len(self.data))
+
+    def newSearch(self):
+        """Entries of older searches are replaced first"""
+        self.age = (self.age + 1) & 0xFF
+
+    def resetStats(self):
+        self.probes = 0
+        self.hits = 0
+
+    def hitRate(self):
+        """Permille of probes since the last resetStats() which hit"""
+        return self.hits * 1000 // self.probes if self.probes else 0
+
+    def probe(self, board, flags):
+        self.probes += 1
+        baseIndex = (board.hash % self.buckets) * 4
+        key = (board.hash // self.buckets) & 0xFFFFFFFF
+        for i in range(baseIndex, baseIndex + 4):
+            tkey, age, tflags, score = evalEntryType.unpack_from(
+                self.data, i * evalEntryType.size
+            )
+            if tkey == key and tflags == flags:
+                self.hits += 1
+                return score
+
+    def record(self, board, flags, score):
+        baseIndex = (board.hash % self.buckets) * 4
+        key = (board.hash // self.buckets) & 0xFFFFFFFF
+        staleIndex = baseIndex
+        staleAge = -1
+        for i in range(baseIndex, baseIndex + 4):
+            tkey, age, tflags, tscore = evalEntryType.unpack_from(
+                self.data, i * evalEntryType.size
+            )
+            if tkey == 0:
+                staleIndex = i
+                break
+            # the entry of the oldest search gets overwritten
+            if (self.age - age) & 0xFF > staleAge:
+                staleIndex = i
+                staleAge = (self.age - age) & 0xFF
+        evalEntryType.pack_into(
+            self.data, staleIndex * evalEntryType.size, key, self.age, flags, score
+        )
+
+
+evaltable = EvalHashTable(EVAL_TABLE_SIZE)
+
+
 def evaluateComplete(board, color):
     """A detailed evaluation function, taking into account
     several positional factors"""
 
+    # Three-check scores depend on the checks given before
+    if not evaltable.buckets or board.variant == THREECHECKCHESS:
+        return _evaluateComplete(board, color)
+
+    flags = (
+        color
+        | board.hasCastled[WHITE] << 1
+        | board.hasCastled[BLACK] << 2
+        | (board.plyCount >= 38) << 3
+    )
+    score = evaltable.probe(board, flags)
+    if score is None:
+        score = _evaluateComplete(board, color)
+        if -0x8000 <= score < 0x8000:
+            evaltable.record(board, flags, score)
+    return score
+
+
+def _evaluateComplete(board, color):
     s, phase = evalMaterial(board, color)
     if board.variant in (LOSERSCHESS, SUICIDECHESS, GIVEAWAYCHESS):
         return s
@@ -108,6 +201,8 @@ def evaluateComplete(board, color):
     if board.variant == ATOMICCHESS:
         return s
     pawnScore, passed, weaked = cacheablePawnInfo(board, phase)
+    # The pawn square tables are summed up by LBoard
+    pawnScore += (board.psq[WHITE] - board.psq[BLACK]) * 2
     s += pawnScore if color == WHITE else -pawnScore
     s += evalPawnStructure(board, color, phase, passed, weaked) - evalPawnStructure(
         board, 1 - color, phase, passed, weaked
@@ -132,33 +227,13 @@ def evalMaterial(board, color):
 
     pieceCount = board.pieceCount
     opcolor = 1 - color
-    material = [0, 0]
+    # The pieces on the board are summed up by LBoard
+    material = board.material
     if board.variant == CRAZYHOUSECHESS:
+        material = material[:]
         for piece in range(PAWN, KING):
-            material[WHITE] += CRAZY_PIECE_VALUES[piece] * pieceCount[WHITE][piece]
-            material[BLACK] += CRAZY_PIECE_VALUES[piece] * pieceCount[BLACK][piece]
             material[WHITE] += CRAZY_PIECE_VALUES[piece] * board.holding[WHITE][piece]
             material[BLACK] += CRAZY_PIECE_VALUES[piece] * board.holding[BLACK][piece]
-    elif board.variant == LOSERSCHESS:
-        for piece in range(PAWN, KING):
-            material[WHITE] += pieceCount[WHITE][piece]
-            material[BLACK] += pieceCount[BLACK][piece]
-    elif board.variant == SUICIDECHESS or board.variant == GIVEAWAYCHESS:
-        for piece in range(PAWN, KING + 1):
-            material[WHITE] += pieceCount[WHITE][piece]
-            material[BLACK] += pieceCount[BLACK][piece]
-    elif board.variant == ATOMICCHESS:
-        for piece in range(PAWN, KING + 1):
-            material[WHITE] += ATOMIC_PIECE_VALUES[piece] * pieceCount[WHITE][piece]
-            material[BLACK] += ATOMIC_PIECE_VALUES[piece] * pieceCount[BLACK][piece]
-    elif board.variant in ASEAN_VARIANTS:
-        for piece in range(PAWN, KING + 1):
-            material[WHITE] += ASEAN_PIECE_VALUES[piece] * pieceCount[WHITE][piece]
-            material[BLACK] += ASEAN_PIECE_VALUES[piece] * pieceCount[BLACK][piece]
-    else:
-        for piece in range(PAWN, KING):
-            material[WHITE] += PIECE_VALUES[piece] * pieceCount[WHITE][piece]
-            material[BLACK] += PIECE_VALUES[piece] * pieceCount[BLACK][piece]
 
     phase = max(1, 8 - (material[WHITE] + material[BLACK]) // 1150)
 
@@ -263,33 +338,45 @@ def evalKingTropism(board, color, phase):
 ################################################################################
 
 # For pawn hash, don't use buckets. Store:
-# key         high 16 bits of pawn hash key
+# key         16 bits of pawn hash key above the index bits
 # score       score from white's point of view
 # passed      bitboard of passed pawns
 # weaked      bitboard of weak pawns
 pawnEntryType = Struct("=H h Q Q")
-PAWN_HASH_SIZE = 16384
+PAWN_TABLE_SIZE = 16384 * pawnEntryType.size
 PAWN_PHASE_KEY = (0x343D, 0x055D, 0x3D3C, 0x1A1C, 0x28AA, 0x19EE, 0x1538, 0x2A99)
-pawntable = create_string_buffer(PAWN_HASH_SIZE * pawnEntryType.size)
+
+
+def resizePawnTable(size):
+    """Allocates an empty pawn table of at most size bytes. The number of
+    entries is a power of two, so the index is a mask of the pawn hash."""
+    global pawntable, pawnHashMask, pawnKeyShift
+    entries = 1 << max(0, (size // pawnEntryType.size).bit_length() - 1)
+    pawntable = create_string_buffer(entries * pawnEntryType.size)
+    pawnHashMask = entries - 1
+    pawnKeyShift = entries.bit_length() - 1
+
+
+resizePawnTable(PAWN_TABLE_SIZE)
 
 
 def clearPawnTable():
-    memset(pawntable, 0, PAWN_HASH_SIZE * pawnEntryType.size)
+    memset(pawntable, 0, len(pawntable))
 
 
 def probePawns(board, phase):
-    index = (board.pawnhash % PAWN_HASH_SIZE) ^ PAWN_PHASE_KEY[phase - 1]
+    index = (board.pawnhash ^ PAWN_PHASE_KEY[phase - 1]) & pawnHashMask
     key, score, passed, weaked = pawnEntryType.unpack_from(
         pawntable, index * pawnEntryType.size
     )
-    if key == (board.pawnhash >> 14) & 0xFFFF:
+    if key == (board.pawnhash >> pawnKeyShift) & 0xFFFF:
         return score, passed, weaked
     return None
 
 
 def recordPawns(board, phase, score, passed, weaked):
-    index = (board.pawnhash % PAWN_HASH_SIZE) ^ PAWN_PHASE_KEY[phase - 1]
-    key = (board.pawnhash >> 14) & 0xFFFF
+    index = (board.pawnhash ^ PAWN_PHASE_KEY[phase - 1]) & pawnHashMask
+    key = (board.pawnhash >> pawnKeyShift) & 0xFFFF
     pawnEntryType.pack_into(
         pawntable, index * pawnEntryType.size, key, score, passed, weaked
     )
@@ -310,10 +397,7 @@ def cacheablePawnInfo(board, phase):
         oppawns = board.boards[opcolor][PAWN]
 
         nfile = [0] * 8
-        pScoreBoard = pawnScoreBoard[color]
         for cord in iterBits(pawns):
-            score += pScoreBoard[cord] * 2
-
             # Passed pawns
             if not oppawns & passedPawnMask[color][cord]:
                 if (color == WHITE and not fromToRay[cord][cord | 56] & pawns) or (
@@ -60,9 +60,11 @@ from pychess.Utils.const import (
 from pychess.Utils.repr import reprPiece, localReprSign
 from pychess.Utils.lutils.lmovegen import (
     genAllMoves,
+    genLegalMoves,
     genPieceMoves,
     newMove,
     gen_sittuyin_promotions,
+    LEGAL_MOVEGEN_VARIANTS,
 )
 
 
@@ -221,6 +223,10 @@ def toSAN(board, move, localRepr=False):
         board_clone.applyMove(move)
         sign = ""
         if board_clone.isChecked():
+            if board.variant in LEGAL_MOVEGEN_VARIANTS:
+                for altmove in genLegalMoves(board_clone):
+                    return "+"
+                return "#"
             for altmove in genAllMoves(board_clone):
                 if board.variant == ATOMICCHESS:
                     from pychess.Variants.atomic import kingExplode
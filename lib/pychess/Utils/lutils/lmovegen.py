@@ -1,19 +1,12 @@
 from .bitboard import bitPosArray, iterBits, clearBit, firstBit
-from .attack import isAttacked, pinnedOnKing, getAttacks
+from .attack import isAttacked, pinnedOnKing, pinMasks, getAttacks
+from .sliding import bishopTable, bishopMask, rookTable, rookMask
 from .ldata import (
     fromToRay,
     moveArray,
     directions,
     fileBits,
     rankBits,
-    ray45,
-    attack45,
-    ray135,
-    attack135,
-    ray90,
-    attack90,
-    ray00,
-    attack00,
     FILE,
     rays,
 )
@@ -29,6 +22,7 @@ from pychess.Utils.const import (
     ELEPHANT,
     WHITE,
     BLACK,
+    NORMALCHESS,
     SITTUYINCHESS,
     FISCHERRANDOMCHESS,
     SUICIDECHESS,
@@ -229,13 +223,7 @@ def genPieceMoves(board, piece, tcord):
         else:
             blocker = board.blocker
             for fcord in iterBits(bishops):
-                try:
-                    attackBoard = (
-                        attack45[fcord][ray45[fcord] & blocker]
-                        | attack135[fcord][ray135[fcord] & blocker]
-                    )
-                except KeyError:
-                    attackBoard = 0
+                attackBoard = bishopTable[fcord][blocker & bishopMask[fcord]]
                 if tcord in iterBits(attackBoard & notfriends):
                     moves.add(newMove(fcord, tcord))
             return moves
@@ -244,13 +232,7 @@ def genPieceMoves(board, piece, tcord):
         blocker = board.blocker
         rooks = board.boards[board.color][ROOK]
         for fcord in iterBits(rooks):
-            try:
-                attackBoard = (
-                    attack00[fcord][ray00[fcord] & blocker]
-                    | attack90[fcord][ray90[fcord] & blocker]
-                )
-            except KeyError:
-                attackBoard = 0
+            attackBoard = rookTable[fcord][blocker & rookMask[fcord]]
             if tcord in iterBits(attackBoard & notfriends):
                 moves.add(newMove(fcord, tcord))
         return moves
@@ -275,23 +257,11 @@ def genPieceMoves(board, piece, tcord):
         else:
             blocker = board.blocker
             for fcord in iterBits(queens):
-                try:
-                    attackBoard = (
-                        attack45[fcord][ray45[fcord] & blocker]
-                        | attack135[fcord][ray135[fcord] & blocker]
-                    )
-                except KeyError:
-                    attackBoard = 0
+                attackBoard = bishopTable[fcord][blocker & bishopMask[fcord]]
                 if tcord in iterBits(attackBoard & notfriends):
                     moves.add(newMove(fcord, tcord))
 
-                try:
-                    attackBoard = (
-                        attack00[fcord][ray00[fcord] & blocker]
-                        | attack90[fcord][ray90[fcord] & blocker]
-                    )
-                except KeyError:
-                    attackBoard = 0
+                attackBoard = rookTable[fcord][blocker & rookMask[fcord]]
                 if tcord in iterBits(attackBoard & notfriends):
                     moves.add(newMove(fcord, tcord))
             return moves
@@ -419,13 +389,7 @@ def genAllMoves(board, drops=True):
     if board.variant in ASEAN_VARIANTS:
         # Rooks
         for cord in iterBits(rooks):
-            try:
-                attackBoard = (
-                    attack00[cord][ray00[cord] & blocker]
-                    | attack90[cord][ray90[cord] & blocker]
-                )
-            except KeyError:
-                attackBoard = 0
+            attackBoard = rookTable[cord][blocker & rookMask[cord]]
             for c in iterBits(attackBoard & notfriends):
                 yield newMove(cord, c)
 
@@ -446,25 +410,13 @@ def genAllMoves(board, drops=True):
     else:
         # Rooks and Queens and Elephants
         for cord in iterBits(rooks | queens | elephants):
-            try:
-                attackBoard = (
-                    attack00[cord][ray00[cord] & blocker]
-                    | attack90[cord][ray90[cord] & blocker]
-                )
-            except KeyError:
-                attackBoard = 0
+            attackBoard = rookTable[cord][blocker & rookMask[cord]]
             for c in iterBits(attackBoard & notfriends):
                 yield newMove(cord, c)
 
         if board.variant == SCHESS and (holding[HAWK] > 0 or holding[ELEPHANT] > 0):
             for cord in iterBits((rooks | queens) & board.virgin[board.color]):
-                try:
-                    attackBoard = (
-                        attack00[cord][ray00[cord] & blocker]
-                        | attack90[cord][ray90[cord] & blocker]
-                    )
-                except KeyError:
-                    attackBoard = 0
+                attackBoard = rookTable[cord][blocker & rookMask[cord]]
                 for c in iterBits(attackBoard & notfriends):
                     if holding[HAWK] > 0:
                         yield newMove(cord, c, HAWK_GATE)
@@ -473,25 +425,13 @@ def genAllMoves(board, drops=True):
 
         # Bishops and Queens, Hawks
         for cord in iterBits(bishops | queens | hawks):
-            try:
-                attackBoard = (
-                    attack45[cord][ray45[cord] & blocker]
-                    | attack135[cord][ray135[cord] & blocker]
-                )
-            except KeyError:
-                attackBoard = 0
+            attackBoard = bishopTable[cord][blocker & bishopMask[cord]]
             for c in iterBits(attackBoard & notfriends):
                 yield newMove(cord, c)
 
         if board.variant == SCHESS and (holding[HAWK] > 0 or holding[ELEPHANT] > 0):
             for cord in iterBits((bishops | queens) & board.virgin[board.color]):
-                try:
-                    attackBoard = (
-                        attack45[cord][ray45[cord] & blocker]
-                        | attack135[cord][ray135[cord] & blocker]
-                    )
-                except KeyError:
-                    attackBoard = 0
+                attackBoard = bishopTable[cord][blocker & bishopMask[cord]]
                 for c in iterBits(attackBoard & notfriends):
                     if holding[HAWK] > 0:
                         yield newMove(cord, c, HAWK_GATE)
@@ -692,24 +632,12 @@ def genCaptures(board):
     # Rooks and Queens
     if board.variant in ASEAN_VARIANTS:
         for cord in iterBits(rooks):
-            try:
-                attackBoard = (
-                    attack00[cord][ray00[cord] & blocker]
-                    | attack90[cord][ray90[cord] & blocker]
-                )
-            except KeyError:
-                attackBoard = 0
+            attackBoard = rookTable[cord][blocker & rookMask[cord]]
             for c in iterBits(attackBoard & enemies):
                 yield newMove(cord, c)
     else:
         for cord in iterBits(rooks | queens | elephants):
-            try:
-                attackBoard = (
-                    attack00[cord][ray00[cord] & blocker]
-                    | attack90[cord][ray90[cord] & blocker]
-                )
-            except KeyError:
-                attackBoard = 0
+            attackBoard = rookTable[cord][blocker & rookMask[cord]]
             for c in iterBits(attackBoard & enemies):
                 yield newMove(cord, c)
 
@@ -727,13 +655,7 @@ def genCaptures(board):
                 yield newMove(cord, c)
     else:
         for cord in iterBits(bishops | queens | hawks):
-            try:
-                attackBoard = (
-                    attack45[cord][ray45[cord] & blocker]
-                    | attack135[cord][ray135[cord] & blocker]
-                )
-            except KeyError:
-                attackBoard = 0
+            attackBoard = bishopTable[cord][blocker & bishopMask[cord]]
             for c in iterBits(attackBoard & enemies):
                 yield newMove(cord, c)
 
@@ -928,6 +850,103 @@ def genCheckEvasions(board):
             yield newMove(kcord, cord)
 
 
+################################################################################
+#   Generate legal moves                                                       #
+################################################################################
+
+# Variants where the pins and checks decide which moves are legal. In the
+# others moves are tested by making them.
+LEGAL_MOVEGEN_VARIANTS = (NORMALCHESS, FISCHERRANDOMCHESS)
+
+ALL_CORDS = (1 << 64) - 1
+
+
+def legalMoveMasks(board):
+    """Returns the pieces checking the king of the side to move, the cords the
+    other pieces may move to, and the pin masks from attack.pinMasks()"""
+
+    color = board.color
+    kcord = board.kings[color]
+    checkers = getAttacks(board, kcord, 1 - color)
+    if not checkers:
+        checkMask = ALL_CORDS
+    elif checkers & (checkers - 1):
+        # Double check, only the king can move
+        checkMask = 0
+    else:
+        # Capture the checking piece or block its ray
+        checkMask = fromToRay[kcord][firstBit(checkers)] | checkers
+    return checkers, checkMask, pinMasks(board, color)
+
+
+def _isLegal(board, move, checkers, checkMask, pins):
+    fcord = (move >> 6) & 63
+    tcord = move & 63
+    flag = move >> 12
+
+    # Castling may uncover a check in FRC, and en passant can remove two
+    # pieces from a rank. Both are rare, so test them the slow way.
+    if flag == ENPASSANT or flag == QUEEN_CASTLE or flag == KING_CASTLE:
+        return not board.willLeaveInCheck(move)
+
+    kcord = board.kings[board.color]
+    if fcord == kcord:
+        if isAttacked(board, tcord, 1 - board.color):
+            return False
+        # The king can't step back on the ray of a slider checking it
+        arBoard = board.arBoard
+        for chkcord in iterBits(checkers):
+            if (
+                sliders[arBoard[chkcord]]
+                and bitPosArray[tcord] & rays[chkcord][directions[chkcord][kcord]]
+            ):
+                return False
+        return True
+
+    tbit = bitPosArray[tcord]
+    if not tbit & checkMask:
+        return False
+    pin = pins.get(fcord)
+    return pin is None or bool(pin & tbit)
+
+
+def genLegalMoves(board):
+    """Generates the moves of genAllMoves() which don't leave the own king
+    in check"""
+
+    if board.variant not in LEGAL_MOVEGEN_VARIANTS:
+        for move in genAllMoves(board):
+            board.applyMove(move)
+            legal = not board.opIsChecked()
+            board.popMove()
+            if legal:
+                yield move
+        return
+
+    checkers, checkMask, pins = legalMoveMasks(board)
+    kcord = board.kings[board.color]
+    for move in genAllMoves(board):
+        fcord = (move >> 6) & 63
+        if fcord == kcord or move >> 12 == ENPASSANT:
+            if _isLegal(board, move, checkers, checkMask, pins):
+                yield move
+        else:
+            # inlined _isLegal()
+            tbit = bitPosArray[move & 63]
+            if tbit & checkMask and (fcord not in pins or pins[fcord] & tbit):
+                yield move
+
+
+def isLegalMove(board, move):
+    """Tests if the pseudo legal move leaves the own king in check, without
+    making it in standard chess and FRC"""
+
+    if board.variant not in LEGAL_MOVEGEN_VARIANTS:
+        return not board.willLeaveInCheck(move)
+    checkers, checkMask, pins = legalMoveMasks(board)
+    return _isLegal(board, move, checkers, checkMask, pins)
+
+
 def genDrops(board):
     color = board.color
     arBoard = board.arBoard
@@ -1,10 +1,10 @@
 from time import time
 from random import random
-from heapq import heappush, heappop
 
 from .lmovegen import genAllMoves, genCheckEvasions, genCaptures
 from .egtb_gaviota import EgtbGaviota
 from pychess.Utils.const import (
+    ASEAN_VARIANTS,
     ATOMICCHESS,
     KINGOFTHEHILLCHESS,
     THREECHECKCHESS,
@@ -15,7 +15,11 @@ from pychess.Utils.const import (
     PROMOTIONS,
     DROP,
     KING,
+    NORMAL_MOVE,
+    PAWN,
+    PLACEMENTCHESS,
     RACINGKINGSCHESS,
+    SITTUYINCHESS,
     hashfALPHA,
     hashfBETA,
     hashfEXACT,
@@ -24,10 +28,12 @@ from pychess.Utils.const import (
     WHITE,
     WHITEWON,
 )
-from .leval import evaluateComplete
+from .leval import evaluateComplete, evaltable
 from .lsort import getCaptureValue, getMoveValue
-from .ldata import MATE_VALUE, VALUE_AT_PLY
+from .validator import validateQuietMove
+from .ldata import MATE_VALUE, MAXPLY, VALUE_AT_PLY, PIECE_VALUES, ASEAN_PIECE_VALUES
 from .TranspositionTable import TranspositionTable
+from .LBoard import HIST_MOVE
 from pychess.Variants.atomic import kingExplode
 from pychess.Variants.kingofthehill import testKingInCenter
 from pychess.Variants.suicide import pieceCount
@@ -43,6 +49,42 @@ nodes = 0
 endtime = 0
 timecheck_counter = TIMECHECK_FREQ
 egtb = None
+# Event set by the main process to stop the search of lsmp helper processes
+abort = None
+
+# Selective search features, which can be switched off to benchmark them
+nullMovePruning = True
+lateMoveReductions = True
+futilityPruning = True
+aspirationWindows = True
+SEARCH_OPTIONS = (
+    "nullMovePruning",
+    "lateMoveReductions",
+    "futilityPruning",
+    "aspirationWindows",
+)
+
+# Variants with zugzwang or forced captures, where we can't trust the static
+# evaluation to prune moves. They are evaluated without quiescent search too.
+UNSTABLE_VARIANTS = (
+    LOSERSCHESS,
+    SUICIDECHESS,
+    GIVEAWAYCHESS,
+    ATOMICCHESS,
+    RACINGKINGSCHESS,
+)
+
+# The null move passes the turn. Any move with equal from and to cords does.
+NULL_MOVE = 0
+NULL_MOVE_REDUCTION = 2
+
+# Only quiet moves after the first ones are searched with reduced depth
+LMR_MOVES = 3
+
+# Margins by depth of the moves which can't raise alpha
+FUTILITY_MARGIN = (0, 200, 500)
+
+ASPIRATION_WINDOW = 50
 
 
 def alphaBeta(board, depth, alpha=-MATE_VALUE, beta=MATE_VALUE, ply=0):
@@ -131,6 +173,7 @@ def alphaBeta(board, depth, alpha=-MATE_VALUE, beta=MATE_VALUE, ply=0):
     ############################################################################
     if ply == 0:
         table.newSearch()
+        evaltable.newSearch()
 
     table.setHashMove(depth, -1)
     probe = table.probe(board, depth, alpha, beta)
@@ -155,7 +198,7 @@ def alphaBeta(board, depth, alpha=-MATE_VALUE, beta=MATE_VALUE, ply=0):
 
     timecheck_counter -= 1
     if timecheck_counter == 0:
-        if time() > endtime:
+        if time() > endtime or (abort is not None and abort.is_set()):
             searching = False
         timecheck_counter = TIMECHECK_FREQ
 
@@ -176,18 +219,58 @@ def alphaBeta(board, depth, alpha=-MATE_VALUE, beta=MATE_VALUE, ply=0):
         if isCheck:
             # Being in check is that serious, that we want to take a deeper look
             depth += 1
-        elif board.variant in (
-            LOSERSCHESS,
-            SUICIDECHESS,
-            GIVEAWAYCHESS,
-            ATOMICCHESS,
-            RACINGKINGSCHESS,
-        ):
+        elif board.variant in UNSTABLE_VARIANTS:
             return [], evaluateComplete(board, board.color)
         else:
             mvs, val = quiescent(board, alpha, beta, ply)
             return mvs, val
 
+    selective = (
+        not isCheck
+        and ply > 0
+        and board.variant not in UNSTABLE_VARIANTS
+        and -MATE_VALUE + MAXPLY < alpha
+        and beta < MATE_VALUE - MAXPLY
+    )
+
+    ############################################################################
+    # Null move pruning                                                        #
+    ############################################################################
+
+    # If passing the turn still fails high, a move will do so as well. Not
+    # true in zugzwang, which is common without pieces and when placing them
+    if (
+        nullMovePruning
+        and selective
+        and depth > NULL_MOVE_REDUCTION
+        and (board.history is None or board.history[HIST_MOVE] != NULL_MOVE)
+        and board.friends[board.color]
+        & ~(board.boards[board.color][PAWN] | board.boards[board.color][KING])
+        and (
+            board.variant not in (SITTUYINCHESS, PLACEMENTCHESS) or board.plyCount >= 16
+        )
+    ):
+        board.applyMove(NULL_MOVE)
+        mvs, val = alphaBeta(
+            board, depth - 1 - NULL_MOVE_REDUCTION, -beta, -beta + 1, ply + 1
+        )
+        board.popMove()
+        if -val >= beta:
+            return [], beta
+
+    ############################################################################
+    # Futility pruning                                                         #
+    ############################################################################
+
+    # Near the leaves, quiet moves can't raise alpha when the static
+    # evaluation is far below it
+    futile = (
+        futilityPruning
+        and selective
+        and depth < len(FUTILITY_MARGIN)
+        and evaluateComplete(board, board.color) + FUTILITY_MARGIN[depth] <= alpha
+    )
+
     ############################################################################
     # Find and sort moves                                                      #
     ############################################################################
@@ -209,7 +292,7 @@ def alphaBeta(board, depth, alpha=-MATE_VALUE, beta=MATE_VALUE, ply=0):
                 mlist = valid_captures
         if not mlist and not isCheck:
             mlist = [m for m in genAllMoves(board)]
-        moves = [(-getMoveValue(board, table, depth, m), m) for m in mlist]
+        moves = sortMoves(board, depth, mlist)
     elif board.variant == ATOMICCHESS:
         if isCheck:
             mlist = [
@@ -217,25 +300,17 @@ def alphaBeta(board, depth, alpha=-MATE_VALUE, beta=MATE_VALUE, ply=0):
                 for m in genCheckEvasions(board)
                 if not kingExplode(board, m, board.color)
             ]
+            moves = sortMoves(board, depth, mlist)
         else:
-            mlist = [
-                m for m in genAllMoves(board) if not kingExplode(board, m, board.color)
-            ]
-        moves = [(-getMoveValue(board, table, depth, m), m) for m in mlist]
+            moves = genStagedMoves(
+                board, depth, lambda m: not kingExplode(board, m, board.color)
+            )
     elif board.variant == RACINGKINGSCHESS:
-        mlist = [m for m in genAllMoves(board) if not board.willGiveCheck(m)]
-        moves = [(-getMoveValue(board, table, depth, m), m) for m in mlist]
+        moves = genStagedMoves(board, depth, lambda m: not board.willGiveCheck(m))
+    elif isCheck:
+        moves = sortMoves(board, depth, genCheckEvasions(board))
     else:
-        if isCheck:
-            moves = [
-                (-getMoveValue(board, table, depth, m), m)
-                for m in genCheckEvasions(board)
-            ]
-        else:
-            moves = [
-                (-getMoveValue(board, table, depth, m), m) for m in genAllMoves(board)
-            ]
-    moves.sort()
+        moves = genStagedMoves(board, depth)
 
     # This is needed on checkmate
     catchFailLow = None
@@ -244,9 +319,11 @@ def alphaBeta(board, depth, alpha=-MATE_VALUE, beta=MATE_VALUE, ply=0):
     # Loop moves                                                               #
     ############################################################################
 
-    for moveValue, move in moves:
+    moveCount = 0
+    for move in moves:
         nodes += 1
 
+        quiet = move >> 12 == NORMAL_MOVE and board.arBoard[move & 63] == EMPTY
         board.applyMove(move)
         if not isCheck:
             if board.opIsChecked():
@@ -254,16 +331,36 @@ def alphaBeta(board, depth, alpha=-MATE_VALUE, beta=MATE_VALUE, ply=0):
                 continue
 
         catchFailLow = move
-
-        if foundPv:
-            mvs, val = alphaBeta(board, depth - 1, -alpha - 1, -alpha, ply + 1)
+        moveCount += 1
+
+        if futile and quiet and moveCount > 1 and not board.isChecked():
+            board.popMove()
+            continue
+
+        # Late move reductions: quiet moves ordered late are searched one ply
+        # shallower first, and fully only if they raise alpha
+        reduced = (
+            lateMoveReductions
+            and selective
+            and depth >= 3
+            and quiet
+            and moveCount > LMR_MOVES
+            and not board.isChecked()
+        )
+        if reduced:
+            mvs, val = alphaBeta(board, depth - 2, -alpha - 1, -alpha, ply + 1)
             val = -val
-            if val > alpha and val < beta:
+
+        if not reduced or val > alpha:
+            if foundPv:
+                mvs, val = alphaBeta(board, depth - 1, -alpha - 1, -alpha, ply + 1)
+                val = -val
+                if val > alpha and val < beta:
+                    mvs, val = alphaBeta(board, depth - 1, -beta, -alpha, ply + 1)
+                    val = -val
+            else:
                 mvs, val = alphaBeta(board, depth - 1, -beta, -alpha, ply + 1)
                 val = -val
-        else:
-            mvs, val = alphaBeta(board, depth - 1, -beta, -alpha, ply + 1)
-            val = -val
 
         board.popMove()
 
@@ -311,6 +408,116 @@ def alphaBeta(board, depth, alpha=-MATE_VALUE, beta=MATE_VALUE, ply=0):
     return [], 0
 
 
+def aspirationSearch(board, depth, score=None):
+    """Searches with a narrow window around the score of the previous
+    iteration, widening the failing side until the result falls inside"""
+
+    if not aspirationWindows or score is None or abs(score) >= MATE_VALUE - MAXPLY:
+        return alphaBeta(board, depth)
+
+    delta = ASPIRATION_WINDOW
+    alpha = score - delta
+    beta = score + delta
+    while True:
+        mvs, val = alphaBeta(board, depth, alpha, beta)
+        if not searching:
+            return mvs, val
+        if val <= alpha and alpha > -MATE_VALUE:
+            delta *= 4
+            alpha = max(score - delta, -MATE_VALUE)
+        elif val >= beta and beta < MATE_VALUE:
+            delta *= 4
+            beta = min(score + delta, MATE_VALUE)
+        else:
+            return mvs, val
+
+
+def sortMoves(board, depth, mlist):
+    """Returns the moves of mlist, best first"""
+    moves = [(-getMoveValue(board, table, depth, m), m) for m in mlist]
+    moves.sort()
+    return [m for v, m in moves]
+
+
+def genStagedMoves(board, depth, legal=None):
+    """Yields the moves of board in search order. As most cutoffs happen on
+    the first moves tried, each stage is only generated if the previous ones
+    didn't cut off:
+    1.  The hash move
+    2.  Captures
+    3.  Killers
+    4.  All the other moves
+    legal is an optional test of variant rules the generated moves don't
+    obey."""
+
+    tried = set()
+
+    hashmove = table.hashmove[depth]
+    if (
+        hashmove != -1
+        and validateQuietMove(board, hashmove)
+        and (legal is None or legal(hashmove))
+    ):
+        tried.add(hashmove)
+        yield hashmove
+
+    # In sittuyin and placement chess you have to place your pieces first
+    if board.variant not in (SITTUYINCHESS, PLACEMENTCHESS) or board.plyCount >= 16:
+        captures = [
+            m
+            for m in genCaptures(board)
+            if m not in tried and (legal is None or legal(m))
+        ]
+        for move in sortMoves(board, depth, captures):
+            tried.add(move)
+            yield move
+
+    for killer in (table.killer1[depth], table.killer2[depth]):
+        if (
+            killer != -1
+            and killer not in tried
+            and validateQuietMove(board, killer)
+            and (legal is None or legal(killer))
+        ):
+            tried.add(killer)
+            yield killer
+
+    mlist = [
+        m for m in genAllMoves(board) if m not in tried and (legal is None or legal(m))
+    ]
+    yield from sortMoves(board, depth, mlist)
+
+
+def genStagedCaptures(board):
+    """Yields the captures of board, best first. The captures of more valuable
+    pieces are tried first, and only if none of them cut off, the other
+    captures get their static exchange evaluated."""
+
+    if board.variant in ASEAN_VARIANTS:
+        values = ASEAN_PIECE_VALUES
+    else:
+        values = PIECE_VALUES
+    arBoard = board.arBoard
+
+    winning = []
+    others = []
+    for move in genCaptures(board):
+        gain = values[arBoard[move & 63]] - values[arBoard[move >> 6 & 63]]
+        if gain > 0:
+            winning.append((-gain, move))
+        else:
+            others.append(move)
+
+    winning.sort()
+    for v, move in winning:
+        yield move
+
+    others = [(-getCaptureValue(board, m), m) for m in others]
+    others.sort()
+    for v, move in others:
+        yield move
+
+
 def quiescent(board, alpha, beta, ply):
     if skipPruneChance and random() < skipPruneChance:
         return [], (alpha + beta) // 2
@@ -322,7 +529,7 @@ def quiescent(board, alpha, beta, ply):
 
     timecheck_counter -= 1
     if timecheck_counter == 0:
-        if time() > endtime:
+        if time() > endtime or (abort is not None and abort.is_set()):
             searching = False
         timecheck_counter = TIMECHECK_FREQ
 
@@ -345,25 +552,17 @@ def quiescent(board, alpha, beta, ply):
 
     amove = []
 
-    heap = []
-
     if isCheck:
-        someMove = False
-        for move in genCheckEvasions(board):
-            someMove = True
-            # Heap.append is fine, as we don't really do sorting on the few moves
-            heap.append((0, move))
-        if not someMove:
+        # We don't really do sorting on the few moves
+        moves = list(genCheckEvasions(board))
+        if not moves:
             return [], -MATE_VALUE + ply
     else:
-        for move in genCaptures(board):
-            heappush(heap, (-getCaptureValue(board, move), move))
+        moves = genStagedCaptures(board)
 
-    while heap:
+    for move in moves:
         nodes += 1
 
-        v, move = heappop(heap)
-
         board.applyMove(move)
         if not isCheck:
             if board.opIsChecked():
@@ -0,0 +1,113 @@
+# Lazy SMP search: helper processes search the same position as the main
+# search thread, sharing its transposition table. They don't report moves,
+# but the table entries they record make the main search faster.
+
+import multiprocessing
+import queue
+import sys
+
+from . import lsearch
+from .TranspositionTable import TranspositionTable
+
+
+def helper(index, table_size, table_data, jobs, done, abort, nodes):
+    lsearch.table = TranspositionTable(table_size, data=table_data)
+    lsearch.abort = abort
+    done.put(index)
+
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+        board, maxdepth, options = job
+        for name, value in options.items():
+            setattr(lsearch, name, value)
+
+        lsearch.searching = not abort.is_set()
+        lsearch.endtime = sys.maxsize
+        lsearch.timecheck_counter = lsearch.TIMECHECK_FREQ
+        lsearch.nodes = 0
+        # Every second helper searches one ply deeper than the main thread,
+        # so the helpers don't just repeat its work
+        for depth in range(1 + index % 2, maxdepth + 1):
+            if not lsearch.searching:
+                break
+            lsearch.alphaBeta(board, depth)
+            nodes[index] = lsearch.nodes
+        nodes[index] = lsearch.nodes
+        done.put(index)
+
+
+class SearchPool:
+    """Pool of cores - 1 helper processes sharing the transposition table
+    of the search running in the main process."""
+
+    def __init__(self, cores, table):
+        assert table.data is not None
+        ctx = multiprocessing.get_context("spawn")
+        self.helpers = cores - 1
+        self.abort = ctx.Event()
+        self.done = ctx.Queue()
+        self.jobs = [ctx.SimpleQueue() for i in range(self.helpers)]
+        self.node_counts = ctx.RawArray("q", self.helpers)
+        self.running = False
+
+        self.processes = []
+        for i in range(self.helpers):
+            process = ctx.Process(
+                target=helper,
+                args=(
+                    i,
+                    table.size,
+                    table.data,
+                    self.jobs[i],
+                    self.done,
+                    self.abort,
+                    self.node_counts,
+                ),
+                daemon=True,
+            )
+            process.start()
+            self.processes.append(process)
+        self.wait()
+
+    def start(self, board, maxdepth):
+        """Starts the helpers on a copy of the board. They search with the
+        selective search options of the main process."""
+        self.stop()
+        for i in range(self.helpers):
+            self.node_counts[i] = 0
+        options = {name: getattr(lsearch, name) for name in lsearch.SEARCH_OPTIONS}
+        for jobs in self.jobs:
+            jobs.put((board, maxdepth, options))
+        self.running = True
+
+    def stop(self):
+        """Stops the helpers and waits until all of them are idle"""
+        if not self.running:
+            return
+        self.abort.set()
+        self.wait()
+        self.abort.clear()
+        self.running = False
+
+    def wait(self):
+        """Waits until every living helper reported it's done"""
+        pending = set(range(self.helpers))
+        while pending:
+            try:
+                pending.discard(self.done.get(timeout=1))
+            except queue.Empty:
+                pending = {i for i in pending if self.processes[i].is_alive()}
+
+    @property
+    def nodes(self):
+        """Nodes searched by the helpers since the last start()"""
+        return sum(self.node_counts)
+
+    def close(self):
+        self.stop()
+        for jobs in self.jobs:
+            jobs.put(None)
+        for process in self.processes:
+            process.join()
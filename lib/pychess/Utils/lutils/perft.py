@@ -1,35 +1,315 @@
+import json
+import multiprocessing
+import sys
 from time import time
 
-from pychess.Utils.lutils.lmovegen import genAllMoves
+from pychess.Utils.const import (
+    NORMALCHESS,
+    FISCHERRANDOMCHESS,
+    CRAZYHOUSECHESS,
+    ATOMICCHESS,
+    SUICIDECHESS,
+    GIVEAWAYCHESS,
+    LOSERSCHESS,
+    THREECHECKCHESS,
+    SCHESS,
+    MAKRUKCHESS,
+    CAMBODIANCHESS,
+    SITTUYINCHESS,
+    PLACEMENTCHESS,
+    DROP_VARIANTS,
+    EMPTY,
+    ENPASSANT,
+    KING,
+    QUEEN,
+)
+from pychess.Utils.lutils.LBoard import LBoard
+from pychess.Utils.lutils.lmovegen import genLegalMoves
 from pychess.Utils.lutils.lmove import toLAN
 
+# Reference positions with their node counts by depth. The counts of the
+# standard chess, FRC, atomic, suicide and makruk start positions are the
+# published ones, the others were counted by the make/test/unmake move
+# generator perft used before.
+perftSuite = [
+    (
+        NORMALCHESS,
+        "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+        (20, 400, 8902, 197281, 4865609),
+    ),
+    (
+        NORMALCHESS,
+        "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+        (48, 2039, 97862, 4085603),
+    ),
+    (
+        NORMALCHESS,
+        "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+        (14, 191, 2812, 43238, 674624),
+    ),
+    (
+        FISCHERRANDOMCHESS,
+        "bqnb1rkr/pp3ppp/3ppn2/2p5/5P2/P2P4/NPP1P1PP/BQ1BNRKR w HFhf - 2 9",
+        (21, 528, 12189, 326672),
+    ),
+    (
+        FISCHERRANDOMCHESS,
+        "2rkr3/5PP1/8/5Q2/5q2/8/5pp1/2RKR3 w CEce - 0 1",
+        (51, 1904, 71005, 2583102),
+    ),
+    (
+        CRAZYHOUSECHESS,
+        "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR/ w KQkq - 0 1",
+        (20, 400, 8902, 197281),
+    ),
+    (
+        CRAZYHOUSECHESS,
+        "r1r5/pp3Nkp/5bp1/2pPp2n/4P1Q1/5P2/Pnp1R1PP/K2q1BNR/bbPPQ w - - 3 25",
+        (3, 230, 18007),
+    ),
+    (
+        ATOMICCHESS,
+        "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+        (20, 400, 8902, 197326),
+    ),
+    (
+        ATOMICCHESS,
+        "r4bn1/4p2r/2n2pp1/p2p2Pk/1p4Qp/2P1P3/PP1P3P/R1B1K2R b KQ - 0 1",
+        (1, 17, 474),
+    ),
+    (
+        SUICIDECHESS,
+        "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w - - 0 1",
+        (20, 400, 8067, 153299),
+    ),
+    (
+        THREECHECKCHESS,
+        "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 3+3 0 1",
+        (20, 400, 8902, 197281),
+    ),
+    (
+        THREECHECKCHESS,
+        "r1bqkbnr/pppp1ppp/2n5/4p3/2B1P3/5Q2/PPPP1PPP/RNB1K1NR w KQkq - 2+3 4 4",
+        (42, 1232, 49147),
+    ),
+    (
+        SCHESS,
+        "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR[heHE] w KQBCDFGkqbcdfg - 0 1",
+        (28, 784, 24830),
+    ),
+    (
+        SCHESS,
+        "r2qk2r/pppbbppp/4pn2/1N1p4/1n1P4/4PN2/PPPBBPPP/R2QK2R[heHE] w KQkq - 10 8",
+        (47, 2128, 88092),
+    ),
+    (
+        MAKRUKCHESS,
+        "rnsmksnr/8/pppppppp/8/8/PPPPPPPP/8/RNSKMSNR w - - 0 1",
+        (23, 529, 12012, 273026),
+    ),
+    (
+        CAMBODIANCHESS,
+        "rns2snr/2m1k3/ppp1pppp/3p4/4P3/PPPP1PPP/3K1M2/RNS2SNR w - - 4 4",
+        (23, 527, 12264),
+    ),
+    (
+        SITTUYINCHESS,
+        "8/6k1/6p1/3s2P1/3npR2/2r5/p2N2F1/3K4 b - - 0 49",
+        (33, 673, 19354),
+    ),
+]
+
+# Variants where capturing is compulsory
+FORCED_CAPTURE_VARIANTS = (SUICIDECHESS, GIVEAWAYCHESS, LOSERSCHESS)
+
+# Number of positions the node cache holds before it is cleared
+PERFT_CACHE_SIZE = 1 << 20
+
+
+def perftMoves(board):
+    """The moves perft counts: the legal moves, or only the legal captures
+    where capturing is compulsory and possible"""
+
+    if board.variant in FORCED_CAPTURE_VARIANTS:
+        moves = list(genLegalMoves(board))
+        arBoard = board.arBoard
+        captures = [
+            move
+            for move in moves
+            if arBoard[move & 63] != EMPTY or move >> 12 == ENPASSANT
+        ]
+        return captures or moves
+    return genLegalMoves(board)
+
+
+def cacheKey(board, depth):
+    """Node cache key of the position. Adds the state the zobrist hash
+    doesn't cover, but the moves of some variants depend on."""
+
+    variant = board.variant
+    if variant == SCHESS:
+        return board.hash, depth, tuple(board.virgin)
+    if variant in (SITTUYINCHESS, PLACEMENTCHESS):
+        return board.hash, depth, bytes(board.promoted), board.plyCount < 16
+    if variant in DROP_VARIANTS:
+        return board.hash, depth, bytes(board.promoted)
+    if variant == CAMBODIANCHESS:
+        is_first_move = board.is_first_move
+        return (
+            board.hash,
+            depth,
+            tuple(is_first_move[KING]) + tuple(is_first_move[QUEEN]),
+        )
+    return board.hash, depth
+
+
+def do_perft(board, depth, root, cache=None):
+    """Counts the leaf nodes of the tree of depth. The counts of the first
+    root plies are printed. Subtree counts are looked up in and stored to
+    the cache dict, if one is given."""
 
-def do_perft(board, depth, root):
-    nodes = 0
     if depth == 0:
         return 1
 
-    for move in genAllMoves(board):
-        board.applyMove(move)
-        if board.opIsChecked():
-            board.popMove()
-            continue
+    # Bulk counting: the leaf moves are counted without making them
+    if depth == 1 and root <= 0:
+        return sum(1 for move in perftMoves(board))
 
-        count = do_perft(board, depth - 1, root - 1)
+    if cache is not None and root <= 0:
+        key = cacheKey(board, depth)
+        nodes = cache.get(key)
+        if nodes is not None:
+            return nodes
+
+    nodes = 0
+    for move in perftMoves(board):
+        board.applyMove(move)
+        count = do_perft(board, depth - 1, root - 1, cache)
         nodes += count
         board.popMove()
         if root > 0:
             print("%8s %10d %10d" % (toLAN(board, move), count, nodes))
 
+    if cache is not None and root <= 0:
+        if len(cache) >= PERFT_CACHE_SIZE:
+            cache.clear()
+        cache[key] = nodes
     return nodes
 
 
 def perft(board, depth, root):
+    cache = {}
     for i in range(depth):
         start_time = time()
-        nodes = do_perft(board, i + 1, root)
+        nodes = do_perft(board, i + 1, root, cache)
         ttime = time() - start_time
         print(
             "%2d %10d %5.2f %12.2fnps"
             % (i + 1, nodes, ttime, nodes / ttime if ttime > 0 else nodes)
         )
+
+
+# Node cache of a pool process, kept while it counts the subtrees of the
+# same root position
+workerCache = {}
+workerRoot = None
+
+
+def _perftJob(job):
+    global workerRoot
+    board, depth, root = job
+    if root != workerRoot:
+        workerCache.clear()
+        workerRoot = root
+    return do_perft(board, depth, 0, workerCache)
+
+
+def newPerftPool(processes):
+    """A pool of processes for parallelPerft()"""
+    return multiprocessing.get_context("spawn").Pool(processes)
+
+
+def parallelPerft(board, depth, pool):
+    """Counts the leaf nodes like do_perft(), but distributes the subtrees of
+    the root moves over the pool. Returns the total count, and a dict of the
+    count of every root move."""
+
+    moves = list(perftMoves(board))
+    if depth <= 1:
+        return len(moves) if depth == 1 else 1, {move: 1 for move in moves}
+
+    jobs = []
+    for move in moves:
+        child = board.clone()
+        child.applyMove(move)
+        jobs.append((child, depth - 1, (board.hash, depth)))
+    counts = pool.map(_perftJob, jobs, chunksize=1)
+    return sum(counts), dict(zip(moves, counts))
+
+
+def runSuite(maxdepth=3, processes=1, only_variants=None):
+    """Runs perft on the reference positions of perftSuite up to maxdepth.
+    Returns a list of result dicts, ready to be written as JSON."""
+
+    from pychess.Variants import variants
+
+    pool = newPerftPool(processes) if processes > 1 else None
+    results = []
+    try:
+        for variant, fen, counts in perftSuite:
+            if only_variants is not None and variant not in only_variants:
+                continue
+            board = LBoard(variant)
+            board.applyFen(fen)
+            for depth, expected in enumerate(counts[:maxdepth], 1):
+                start_time = time()
+                if pool is None:
+                    nodes = do_perft(board, depth, 0, {})
+                else:
+                    nodes = parallelPerft(board, depth, pool)[0]
+                ttime = time() - start_time
+                results.append(
+                    {
+                        "variant": variants[variant].cecp_name,
+                        "fen": fen,
+                        "depth": depth,
+                        "nodes": nodes,
+                        "expected": expected,
+                        "ok": nodes == expected,
+                        "time": round(ttime, 3),
+                        "nps": int(nodes / ttime) if ttime > 0 else nodes,
+                    }
+                )
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return results
+
+
+if __name__ == "__main__":
+    # python -m pychess.Utils.lutils.perft [maxdepth [processes [jsonfile]]]
+    maxdepth = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    processes = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+
+    suite_time = time()
+    results = runSuite(maxdepth, processes)
+    suite_time = time() - suite_time
+    nodes = sum(result["nodes"] for result in results)
+    report = {
+        "timestamp": int(time()),
+        "maxdepth": maxdepth,
+        "processes": processes,
+        "nodes": nodes,
+        "time": round(suite_time, 3),
+        "nps": int(nodes / suite_time) if suite_time > 0 else nodes,
+        "failed": sum(1 for result in results if not result["ok"]),
+        "results": results,
+    }
+    if len(sys.argv) > 3:
+        with open(sys.argv[3], "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    sys.exit(1 if report["failed"] else 0)
@@ -0,0 +1,81 @@
+# Sliding piece attacks
+#
+# For every cord the blocker is masked with the cords on the bishop (or rook)
+# lines, leaving out the edges as pieces there can't block anything, and the
+# attacked cords are looked up keyed by that relevant occupancy. This is the
+# magic bitboards scheme, except that the perfect hashing done by the magic
+# multiplication in C is done by the dict here, which is faster in Python.
+#
+# The entries are computed the first time an occupancy is looked up, so
+# nothing is built at import, and only the occupancies met in play are kept.
+
+from .bitboard import bitPosArray, iterBits
+from .ldata import rays
+
+BISHOP_RAYS = (0, 1, 2, 3)
+ROOK_RAYS = (4, 5, 6, 7)
+
+
+def relevantMask(cord, directions):
+    """The cords on the rays of cord, which may block a sliding piece"""
+    mask = 0
+    for d in directions:
+        for c in iterBits(rays[cord][d]):
+            # The last cord of a ray doesn't block anything behind it
+            if rays[c][d]:
+                mask |= bitPosArray[c]
+    return mask
+
+
+def slidingAttacks(cord, blocker, directions):
+    """Computes attacks the slow way, by cutting off the rays behind blockers"""
+    attacks = 0
+    for d in directions:
+        ray = rays[cord][d]
+        for c in iterBits(ray & blocker):
+            ray &= ~rays[c][d]
+        attacks |= ray
+    return attacks
+
+
+class AttackTable(dict):
+    """The attacks of a sliding piece on cord, keyed by relevant occupancy"""
+
+    __slots__ = ("cord", "directions")
+
+    def __init__(self, cord, directions):
+        dict.__init__(self)
+        self.cord = cord
+        self.directions = directions
+
+    def __missing__(self, blocker):
+        attacks = self[blocker] = slidingAttacks(self.cord, blocker, self.directions)
+        return attacks
+
+
+bishopMask = [relevantMask(cord, BISHOP_RAYS) for cord in range(64)]
+rookMask = [relevantMask(cord, ROOK_RAYS) for cord in range(64)]
+
+bishopTable = [AttackTable(cord, BISHOP_RAYS) for cord in range(64)]
+rookTable = [AttackTable(cord, ROOK_RAYS) for cord in range(64)]
+
+
+# Move generation and isAttacked() inline these lookups in their hot loops
+
+
+def bishopAttacks(cord, blocker):
+    """The cords attacked by a bishop on cord"""
+    return bishopTable[cord][blocker & bishopMask[cord]]
+
+
+def rookAttacks(cord, blocker):
+    """The cords attacked by a rook on cord"""
+    return rookTable[cord][blocker & rookMask[cord]]
+
+
+def queenAttacks(cord, blocker):
+    """The cords attacked by a queen on cord"""
+    return (
+        bishopTable[cord][blocker & bishopMask[cord]]
+        | rookTable[cord][blocker & rookMask[cord]]
+    )
@@ -1,4 +1,26 @@
+from pychess.Utils.lutils.bitboard import bitPosArray
+from pychess.Utils.lutils.ldata import moveArray
 from pychess.Utils.lutils.lmovegen import genAllMoves
+from pychess.Utils.lutils.sliding import bishopAttacks, rookAttacks
+from pychess.Utils.const import (
+    ASEAN_VARIANTS,
+    ASEAN_BBISHOP,
+    ASEAN_QUEEN,
+    ASEAN_WBISHOP,
+    BISHOP,
+    ELEPHANT,
+    EMPTY,
+    HAWK,
+    KING,
+    KNIGHT,
+    NORMAL_MOVE,
+    PAWN,
+    PLACEMENTCHESS,
+    QUEEN,
+    ROOK,
+    SITTUYINCHESS,
+    WHITE,
+)
 
 ################################################################################
 #   Validate move                                                              #
@@ -7,3 +29,67 @@ from pychess.Utils.lutils.lmovegen import genAllMoves
 
 def validateMove(board, move):
     return move in genAllMoves(board)
+
+
+def validateQuietMove(board, move):
+    """Fast test of a normal, non capturing move, like the hash and killer
+    moves the search tries before generating any moves. It may reject a valid
+    move of a kind it doesn't handle, but never accepts an invalid one."""
+
+    if move >> 12 != NORMAL_MOVE:
+        return False
+
+    # In sittuyin and placement chess you have to place your pieces first
+    if board.variant in (SITTUYINCHESS, PLACEMENTCHESS) and board.plyCount < 16:
+        return False
+
+    fcord = move >> 6 & 63
+    tcord = move & 63
+    arBoard = board.arBoard
+    if arBoard[tcord] != EMPTY or not board.friends[board.color] & bitPosArray[fcord]:
+        return False
+
+    piece = arBoard[fcord]
+    tbit = bitPosArray[tcord]
+    blocker = board.blocker
+
+    if piece == PAWN:
+        if board.variant in ASEAN_VARIANTS:
+            return False
+        from pychess.Variants import variants
+
+        if tcord in variants[board.variant].PROMOTION_ZONE[board.color]:
+            return False
+        if board.color == WHITE:
+            return tcord == fcord + 8 or (
+                tcord == fcord + 16 and 8 <= fcord < 16 and arBoard[fcord + 8] == EMPTY
+            )
+        return tcord == fcord - 8 or (
+            tcord == fcord - 16 and 48 <= fcord < 56 and arBoard[fcord - 8] == EMPTY
+        )
+
+    if piece in (KNIGHT, HAWK, ELEPHANT) and moveArray[KNIGHT][fcord] & tbit:
+        return True
+
+    if piece == KING:
+        return bool(moveArray[KING][fcord] & tbit)
+
+    if board.variant in ASEAN_VARIANTS:
+        if piece == BISHOP:
+            bishopMoves = moveArray[
+                ASEAN_WBISHOP if board.color == WHITE else ASEAN_BBISHOP
+            ]
+            return bool(bishopMoves[fcord] & tbit)
+        if piece == QUEEN:
+            return bool(moveArray[ASEAN_QUEEN][fcord] & tbit)
+        if piece == ROOK:
+            return bool(rookAttacks(fcord, blocker) & tbit)
+        return False
+
+    if piece in (BISHOP, QUEEN, HAWK) and bishopAttacks(fcord, blocker) & tbit:
+        return True
+
+    if piece in (ROOK, QUEEN, ELEPHANT) and rookAttacks(fcord, blocker) & tbit:
+        return True
+
+    return False
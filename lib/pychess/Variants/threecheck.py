@@ -24,13 +24,13 @@ class ThreeCheckBoard(Board):
 
 def checkCount(board, color):
     lboard = board.clone()
-    if color != board.color and lboard.hist_move:
+    if color != board.color and lboard.history is not None:
         lboard.popMove()
     cc = 3 - board.remaining_checks[board.color]
-    while lboard.hist_move:
+    while lboard.history is not None:
         if lboard.isChecked():
             cc += 1
         lboard.popMove()
-        if lboard.hist_move:
+        if lboard.history is not None:
             lboard.popMove()
     return cc
@@ -22,7 +22,7 @@ class OpeningTreePanel(Gtk.TreeView):
 
         self.box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
 
-        self.liststore = Gtk.ListStore(int, str, int, int)
+        self.liststore = Gtk.ListStore(int, str, int, int, int, int)
         self.modelsort = Gtk.TreeModelSort(self.liststore)
 
         self.modelsort.set_sort_column_id(2, Gtk.SortType.DESCENDING)
@@ -46,6 +46,19 @@ class OpeningTreePanel(Gtk.TreeView):
         column.connect("clicked", self.column_clicked, 3)
         self.append_column(column)
 
+        # Elo and year are -1 when unknown
+        def known_value(column, cell, store, iter, data):
+            value = store[iter][data]
+            cell.set_property("text", "" if value < 0 else str(value))
+
+        for title, col in ((_("Elo"), 4), (_("Year"), 5)):
+            renderer = Gtk.CellRendererText()
+            column = Gtk.TreeViewColumn(title, renderer)
+            column.set_cell_data_func(renderer, known_value, col)
+            column.set_sort_column_id(col)
+            column.connect("clicked", self.column_clicked, col)
+            self.append_column(column)
+
         self.conid = self.connect_after("row-activated", self.row_activated)
 
         self.board = LBoard()
@@ -86,12 +99,12 @@ class OpeningTreePanel(Gtk.TreeView):
         self.update_tree()
 
     def on_first_clicked(self, widget):
-        while self.board.hist_move:
+        while self.board.history is not None:
             self.board.popMove()
         self.update_tree()
 
     def on_prev_clicked(self, widget):
-        if self.board.hist_move:
+        if self.board.history is not None:
             self.board.popMove()
         self.update_tree()
 
@@ -100,7 +113,7 @@ class OpeningTreePanel(Gtk.TreeView):
         if not self.filtered:
             self.persp.filter_panel.filterButton.set_sensitive(True)
             self.filtered = True
-            while self.board.hist_move:
+            while self.board.history is not None:
                 self.board.popMove()
             self.update_tree()
             self.filtered = False
@@ -119,15 +132,26 @@ class OpeningTreePanel(Gtk.TreeView):
     def update_tree(self, load_games=True):
         self.persp.gamelist.ply = self.board.plyCount
         if load_games and self.filtered:
-            self.persp.chessfile.set_fen_filter(self.board.asFen())
+            self.persp.chessfile.set_fen_filter(self.board.asFen(), self.board.variant)
             self.persp.gamelist.load_games()
 
-        result = self.persp.chessfile.get_book_moves(self.board.asFen())
+        result = self.persp.chessfile.get_book_moves(
+            self.board.asFen(), self.board.variant
+        )
         self.clear_tree()
-        for move, count, white_won, blackwon, draw in result:
+        for move, count, white_won, blackwon, draw, elo, year in result:
             lmove = parseAN(self.board, move)
             perf = 0 if not count else round((white_won * 100.0 + draw * 50.0) / count)
-            self.liststore.append([lmove, toSAN(self.board, lmove), count, perf])
+            self.liststore.append(
+                [
+                    lmove,
+                    toSAN(self.board, lmove),
+                    count,
+                    perf,
+                    -1 if elo is None else elo,
+                    -1 if year is None else year,
+                ]
+            )
 
     def clear_tree(self):
         selection = self.get_selection()
@@ -176,5 +176,5 @@ class PreviewPanel:
         self.board = self.gamemodel.boards[self.boardview.shown].board
 
         self.persp.gamelist.ply = self.board.plyCount
-        self.persp.chessfile.set_fen_filter(self.board.asFen())
+        self.persp.chessfile.set_fen_filter(self.board.asFen(), self.board.variant)
         self.persp.gamelist.load_games()
@@ -34,7 +34,6 @@ from pychess.widgets import (
     gtk_close,
 )
 from pychess.widgets import gamewidget
-from pychess.Database.model import create_indexes, drop_indexes
 from pychess.Database.PgnImport import PgnImport, download_file
 from pychess.Database.JvR import JvR
 from pychess.Savers import fen, epd, olv
@@ -230,6 +229,7 @@ class Database(GObject.GObject, Perspective):
         self.widgets["import_chessfile"].set_sensitive(on)
         self.widgets["database_save_as"].set_sensitive(on)
         self.widgets["create_book"].set_sensitive(on)
+        self.widgets["create_position_index"].set_sensitive(on)
         self.widgets["import_endgame_nl"].set_sensitive(on)
         self.widgets["import_twic"].set_sensitive(on)
 
@@ -256,7 +256,7 @@ class Database(GObject.GObject, Perspective):
         def opening():
             # Redirection of the PGN file
             nonlocal filename
-            for ext in [".sqlite", ".bin", ".scout"]:
+            for ext in [".sqlite", ".pos", ".bin", ".scout"]:
                 if filename.endswith(ext):
                     filename = filename[: len(filename) - len(ext)] + ".pgn"
 
@@ -272,6 +272,8 @@ class Database(GObject.GObject, Perspective):
                         os.remove(chessfile.sqlite_path)
                     chessfile = None
                 else:
+                    chessfile.init_position_index()
+                    chessfile.init_opening_tree()
                     chessfile.init_scoutfish()
                     chessfile.init_chess_db()
             elif filename.endswith(".epd"):
@@ -503,9 +505,7 @@ class Database(GObject.GObject, Perspective):
 
     # @profile_me
     def importing(self, filenames):
-        drop_indexes(self.chessfile.engine)
-
-        self.importer = PgnImport(self.chessfile, append_pgn=True)
+        self.importer = PgnImport(self.chessfile, append_pgn=True, bulk=True)
         self.importer.initialize()
         for i, filename in enumerate(filenames):
             if len(filenames) > 1:
@@ -523,8 +523,13 @@ class Database(GObject.GObject, Perspective):
         GLib.idle_add(self.progressbar.set_text, _("Recreating indexes..."))
 
         # .sqlite
-        drop_indexes(self.chessfile.engine)
-        create_indexes(self.chessfile.engine)
+        self.importer.finalize()
+
+        # .pos and opening tree in .sqlite, if they were created before
+        if os.path.isfile(self.chessfile.pos_path):
+            self.chessfile.create_position_index(self.importer)
+        else:
+            self.chessfile.init_opening_tree()
 
         # .scout
         self.chessfile.init_scoutfish()
@@ -623,6 +628,31 @@ class Database(GObject.GObject, Perspective):
             cancel_event.set()
         self.progress_dialog.hide()
 
+    def create_position_index(self):
+        chessfile = self.chessfile
+        if not isinstance(chessfile, PGNFile) or chessfile.pgn_is_string:
+            return
+
+        self.progress_dialog.set_title(_("Create Position Index"))
+        self.progressbar.show()
+        self.progressbar.set_text(_("Creating .pos index file..."))
+        # Only its cancel flag is used
+        self.importer = PgnImport(chessfile)
+
+        def creating_index(importer):
+            chessfile.create_position_index(importer)
+            GLib.idle_add(self.emit, "chessfile_imported", chessfile)
+            GLib.idle_add(self.progress_dialog.hide)
+
+        thread = threading.Thread(target=creating_index, args=(self.importer,))
+        thread.daemon = True
+        thread.start()
+
+        response = self.progress_dialog.run()
+        if response == Gtk.ResponseType.CANCEL:
+            self.importer.do_cancel()
+        self.progress_dialog.hide()
+
     def feed_book(self, records, positions):
         BOOK_DEPTH_MAX = conf.get("book_depth_max")
 
@@ -10,6 +10,7 @@ from pychess.Utils import prettyPrintScore
 from pychess.Utils.Move import listToMoves, parseAny
 from pychess.Utils.lutils.lmove import ParsingError
 from pychess.Players.engineNest import discoverer
+from pychess.Players.AnalysisScheduler import AnalysisScheduler, startAnalyzers
 from pychess.widgets.preferencesDialog import anal_combo_get_value, anal_combo_set_value
 from pychess.widgets.InfoBar import InfoBarMessage, InfoBarMessageButton
 from pychess.widgets import mainwindow
@@ -22,6 +23,7 @@ class AnalyzeGameDialog:
         self.widgets = uistuff.GladeWidgets("analyze_game.glade")
         self.widgets["analyze_game"].set_transient_for(mainwindow())
         self.stop_event = asyncio.Event()
+        self.schedulers = []
 
         uistuff.keep(self.widgets["fromCurrent"], "fromCurrent")
         uistuff.keep(self.widgets["shouldBlack"], "shouldBlack")
@@ -30,6 +32,7 @@ class AnalyzeGameDialog:
         uistuff.keep(self.widgets["showEval"], "showEval")
         uistuff.keep(self.widgets["showBlunder"], "showBlunder")
         uistuff.keep(self.widgets["max_analysis_spin"], "max_analysis_spin")
+        uistuff.keep(self.widgets["analyzer_pool_spin"], "analyzer_pool_spin")
         uistuff.keep(
             self.widgets["variation_threshold_spin"], "variation_threshold_spin"
         )
@@ -59,9 +62,8 @@ class AnalyzeGameDialog:
             self.widgets["analyze_game"].destroy()
 
         def abort():
-            self.analyzer.pause()
-            if self.threat_PV:
-                self.inv_analyzer.pause()
+            for scheduler in self.schedulers:
+                scheduler.stop()
             self.stop_event.set()
             self.widgets["analyze_game"].destroy()
 
@@ -73,116 +75,138 @@ class AnalyzeGameDialog:
 
                 old_check_value = conf.get("analyzer_check")
                 conf.set("analyzer_check", True)
-                if HINT not in gamemodel.spectators:
-                    try:
-                        await asyncio.wait_for(gamemodel.start_analyzer(HINT), 5.0)
-                    except asyncio.TimeoutError:
-                        log.error("Got timeout error while starting hint analyzer")
-                        return
-                    except Exception:
-                        log.error("Unknown error while starting hint analyzer")
-                        return
-                self.analyzer = gamemodel.spectators[HINT]
-                gmwidg.menuitems["hint_mode"].active = True
                 self.threat_PV = conf.get("ThreatPV")
                 if self.threat_PV:
                     old_inv_check_value = conf.get("inv_analyzer_check")
                     conf.set("inv_analyzer_check", True)
-                    if SPY not in gamemodel.spectators:
-                        try:
-                            await asyncio.wait_for(gamemodel.start_analyzer(SPY), 5.0)
-                        except asyncio.TimeoutError:
-                            log.error("Got timeout error while starting spy analyzer")
-                            return
-                        except Exception:
-                            log.error("Unknown error while starting spy analyzer")
-                            return
-                    inv_analyzer = gamemodel.spectators[SPY]
-                    gmwidg.menuitems["spy_mode"].active = True
-
-                title = _("Game analyzing in progress...")
-                text = _("Do you want to abort it?")
-                content = InfoBar.get_message_content(
-                    title, text, Gtk.STOCK_DIALOG_QUESTION
-                )
-
-                def response_cb(infobar, response, message):
+
+                def restore_conf():
                     conf.set("analyzer_check", old_check_value)
                     if self.threat_PV:
                         conf.set("inv_analyzer_check", old_inv_check_value)
-                    message.dismiss()
-                    abort()
-
-                message = InfoBarMessage(Gtk.MessageType.QUESTION, content, response_cb)
-                message.add_button(
-                    InfoBarMessageButton(_("Abort"), Gtk.ResponseType.CANCEL)
-                )
-                gmwidg.replaceMessages(message)
-
-                async def analyse_moves():
-                    should_black = conf.get("shouldBlack")
-                    should_white = conf.get("shouldWhite")
-                    from_current = conf.get("fromCurrent")
-                    start_ply = gmwidg.board.view.shown if from_current else 0
+
+                try:
+                    pool_size = int(conf.get("analyzer_pool_spin"))
+                    analyzers = await startAnalyzers(HINT, gamemodel, pool_size)
+                    if not analyzers:
+                        return
                     move_time = int(conf.get("max_analysis_spin"))
-                    threshold = int(conf.get("variation_threshold_spin"))
-                    for board in gamemodel.boards[start_ply:]:
-                        if self.stop_event.is_set():
-                            break
-
-                        gmwidg.board.view.setShownBoard(board)
-                        self.analyzer.setBoard(board)
-                        if self.threat_PV:
-                            inv_analyzer.setBoard(board)
-                        await asyncio.sleep(move_time + 0.1)
-
-                        ply = board.ply - gamemodel.lowply
-                        color = (ply - 1) % 2
-                        if (
-                            ply - 1 in gamemodel.scores
-                            and ply in gamemodel.scores
-                            and (
-                                (color == BLACK and should_black)
-                                or (color == WHITE and should_white)
+                    depth = (
+                        None
+                        if conf.get("infinite_depth")
+                        else int(conf.get("max_depth_spin"))
+                    )
+                    self.schedulers = [
+                        AnalysisScheduler(gamemodel, analyzers, move_time, depth)
+                    ]
+                    if self.threat_PV:
+                        inv_analyzers = await startAnalyzers(SPY, gamemodel, pool_size)
+                        self.schedulers.append(
+                            AnalysisScheduler(
+                                gamemodel, inv_analyzers, move_time, depth
                             )
-                        ):
-                            oldmoves, oldscore, olddepth = gamemodel.scores[ply - 1]
-                            oldscore = oldscore * -1 if color == BLACK else oldscore
-                            score_str = prettyPrintScore(oldscore, olddepth)
-                            moves, score, depth = gamemodel.scores[ply]
-                            score = score * -1 if color == WHITE else score
-                            diff = score - oldscore
+                        )
+
+                    title = _("Game analyzing in progress...")
+                    text = _("Do you want to abort it?")
+                    content = InfoBar.get_message_content(
+                        title, text, Gtk.STOCK_DIALOG_QUESTION
+                    )
+
+                    def response_cb(infobar, response, message):
+                        message.dismiss()
+                        abort()
+
+                    message = InfoBarMessage(
+                        Gtk.MessageType.QUESTION, content, response_cb
+                    )
+                    message.add_button(
+                        InfoBarMessageButton(_("Abort"), Gtk.ResponseType.CANCEL)
+                    )
+                    gmwidg.replaceMessages(message)
+
+                    async def analyse_moves():
+                        should_black = conf.get("shouldBlack")
+                        should_white = conf.get("shouldWhite")
+                        from_current = conf.get("fromCurrent")
+                        start_ply = gmwidg.board.view.shown if from_current else 0
+                        threshold = int(conf.get("variation_threshold_spin"))
+                        boards = gamemodel.boards[start_ply:]
+                        await asyncio.gather(
+                            *(scheduler.run(boards) for scheduler in self.schedulers)
+                        )
+
+                        for board in boards:
+                            if self.stop_event.is_set():
+                                break
+
+                            ply = board.ply - gamemodel.lowply
+                            color = (ply - 1) % 2
                             if (
-                                (diff > threshold and color == BLACK)
-                                or (diff < -1 * threshold and color == WHITE)
-                            ) and (
-                                gamemodel.moves[ply - 1]
-                                != parseAny(gamemodel.boards[ply - 1], oldmoves[0])
+                                ply - 1 in gamemodel.scores
+                                and ply in gamemodel.scores
+                                and (
+                                    (color == BLACK and should_black)
+                                    or (color == WHITE and should_white)
+                                )
                             ):
-                                if self.threat_PV:
-                                    try:
-                                        if ply - 1 in gamemodel.spy_scores:
-                                            (
-                                                oldmoves0,
-                                                oldscore0,
-                                                olddepth0,
-                                            ) = gamemodel.spy_scores[ply - 1]
-                                            score_str0 = prettyPrintScore(
-                                                oldscore0, olddepth0
-                                            )
-                                            pv0 = listToMoves(
-                                                gamemodel.boards[ply - 1],
-                                                ["--"] + oldmoves0,
-                                                validate=True,
-                                            )
-                                            if len(pv0) > 2:
-                                                gamemodel.add_variation(
+                                oldmoves, oldscore, olddepth = gamemodel.scores[ply - 1]
+                                oldscore = oldscore * -1 if color == BLACK else oldscore
+                                score_str = prettyPrintScore(oldscore, olddepth)
+                                moves, score, depth = gamemodel.scores[ply]
+                                score = score * -1 if color == WHITE else score
+                                diff = score - oldscore
+                                if (
+                                    (diff > threshold and color == BLACK)
+                                    or (diff < -1 * threshold and color == WHITE)
+                                ) and (
+                                    gamemodel.moves[ply - 1]
+                                    != parseAny(gamemodel.boards[ply - 1], oldmoves[0])
+                                ):
+                                    if self.threat_PV:
+                                        try:
+                                            if ply - 1 in gamemodel.spy_scores:
+                                                (
+                                                    oldmoves0,
+                                                    oldscore0,
+                                                    olddepth0,
+                                                ) = gamemodel.spy_scores[ply - 1]
+                                                score_str0 = prettyPrintScore(
+                                                    oldscore0, olddepth0
+                                                )
+                                                pv0 = listToMoves(
                                                     gamemodel.boards[ply - 1],
-                                                    pv0,
-                                                    comment="Threatening",
-                                                    score=score_str0,
-                                                    emit=False,
+                                                    ["--"] + oldmoves0,
+                                                    validate=True,
                                                 )
+                                                if len(pv0) > 2:
+                                                    gamemodel.add_variation(
+                                                        gamemodel.boards[ply - 1],
+                                                        pv0,
+                                                        comment="Threatening",
+                                                        score=score_str0,
+                                                        emit=False,
+                                                    )
+                                        except ParsingError as e:
+                                            # ParsingErrors may happen when parsing "old" lines from
+                                            # analyzing engines, which haven't yet noticed their new tasks
+                                            log.debug(
+                                                "__parseLine: Ignored (%s) from analyzer: ParsingError%s"
+                                                % (" ".join(oldmoves), e)
+                                            )
+                                    try:
+                                        pv = listToMoves(
+                                            gamemodel.boards[ply - 1],
+                                            oldmoves,
+                                            validate=True,
+                                        )
+                                        gamemodel.add_variation(
+                                            gamemodel.boards[ply - 1],
+                                            pv,
+                                            comment="Better is",
+                                            score=score_str,
+                                            emit=False,
+                                        )
                                     except ParsingError as e:
                                         # ParsingErrors may happen when parsing "old" lines from
                                         # analyzing engines, which haven't yet noticed their new tasks
@@ -190,40 +214,17 @@ class AnalyzeGameDialog:
                                             "__parseLine: Ignored (%s) from analyzer: ParsingError%s"
                                             % (" ".join(oldmoves), e)
                                         )
-                                try:
-                                    pv = listToMoves(
-                                        gamemodel.boards[ply - 1],
-                                        oldmoves,
-                                        validate=True,
-                                    )
-                                    gamemodel.add_variation(
-                                        gamemodel.boards[ply - 1],
-                                        pv,
-                                        comment="Better is",
-                                        score=score_str,
-                                        emit=False,
-                                    )
-                                except ParsingError as e:
-                                    # ParsingErrors may happen when parsing "old" lines from
-                                    # analyzing engines, which haven't yet noticed their new tasks
-                                    log.debug(
-                                        "__parseLine: Ignored (%s) from analyzer: ParsingError%s"
-                                        % (" ".join(oldmoves), e)
-                                    )
-
-                    self.widgets["analyze_game"].hide()
-                    self.widgets["analyze_ok_button"].set_sensitive(True)
-                    conf.set("analyzer_check", old_check_value)
-                    if self.threat_PV:
-                        conf.set("inv_analyzer_check", old_inv_check_value)
-                    message.dismiss()
 
-                    gamemodel.emit("analysis_finished")
+                        self.widgets["analyze_game"].hide()
+                        self.widgets["analyze_ok_button"].set_sensitive(True)
+                        message.dismiss()
 
-                asyncio.create_task(analyse_moves())
-                hide_window(None)
+                        gamemodel.emit("analysis_finished")
 
-                return True
+                    hide_window(None)
+                    await analyse_moves()
+                finally:
+                    restore_conf()
 
             asyncio.create_task(coro())
 
@@ -33,6 +33,7 @@ from pychess.Utils.const import (
     FAN_PIECES,
     TOOL_CHESSDB,
     TOOL_SCOUTFISH,
+    TOOL_POSITION_INDEX,
 )
 from pychess.Utils.GameModel import GameModel
 from pychess.Utils.Move import listToMoves
@@ -848,7 +849,7 @@ class GameWidget(GObject.GObject):
         shown_board = self.gamemodel.getBoardAtPly(view.shown, view.shown_variation_idx)
         fen = shown_board.asFen()
 
-        tool, found = persp.chessfile.has_position(fen)
+        tool, found = persp.chessfile.has_position(fen, shown_board.variant)
         if not found:
             dialogue = Gtk.MessageDialog(
                 pychess.widgets.mainwindow(),
@@ -859,8 +860,8 @@ class GameWidget(GObject.GObject):
             dialogue.run()
             dialogue.destroy()
         else:
-            if tool == TOOL_CHESSDB:
-                persp.chessfile.set_fen_filter(fen)
+            if tool in (TOOL_CHESSDB, TOOL_POSITION_INDEX):
+                persp.chessfile.set_fen_filter(fen, shown_board.variant)
             elif tool == TOOL_SCOUTFISH:
                 dialogue = Gtk.MessageDialog(
                     pychess.widgets.mainwindow(),
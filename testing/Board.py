@@ -19,6 +19,9 @@ from pychess.Utils.const import (
     E8,
     H8,
 )
+from pychess.Savers.pgn import load
+from pychess.System.protoopen import protoopen
+from pychess.Utils import Board as BoardModule
 from pychess.Utils.Cord import Cord
 from pychess.Utils.Board import Board
 from pychess.Utils.Move import Move
@@ -52,6 +55,68 @@ class BoardTestCase(unittest.TestCase):
         self.assertEqual(board[Cord(G8)].piece, Piece(BLACK, KING).piece)
         self.assertEqual(board[Cord(F8)].piece, Piece(BLACK, ROOK).piece)
 
+    def test_lazy_move(self):
+        """Testing lazy boards of loaded games have the same pieces as Board.move()"""
+
+        cache_size = BoardModule.LAZY_BOARD_CACHE_SIZE
+        # force dropping and recreating Piece objects of lazy boards
+        BoardModule.LAZY_BOARD_CACHE_SIZE = 8
+        try:
+            for name in ("atomic", "chess960rwch", "zh", "schess"):
+                pgnfile = load(protoopen("gamefiles/%s.pgn" % name))
+                pgnfile.limit = 20
+                pgnfile.init_tag_database()
+                games, plys = pgnfile.get_records()
+                for rec in games:
+                    model = pgnfile.loadToModel(rec)
+                    for boards in model.variations:
+                        board = boards[0]
+                        for lazy in boards[1:]:
+                            move = Move(lazy.board.lastMove)
+                            board = board.move(move, lboard=lazy.board.clone())
+                            self.assertEqual(pieces(lazy), pieces(board))
+                    # recreated after dropped
+                    self.assertEqual(pieces(model.boards[1]), pieces(model.boards[1]))
+                pgnfile.close()
+        finally:
+            BoardModule.LAZY_BOARD_CACHE_SIZE = cache_size
+
+    def test_lazy_move_identity(self):
+        """Testing recreated lazy boards share Piece objects with their next boards"""
+
+        cache_size = BoardModule.LAZY_BOARD_CACHE_SIZE
+        BoardModule.LAZY_BOARD_CACHE_SIZE = 8
+        try:
+            pgnfile = load(protoopen("gamefiles/zh.pgn"))
+            pgnfile.limit = 1
+            pgnfile.init_tag_database()
+            games, plys = pgnfile.get_records()
+            model = pgnfile.loadToModel(games[0])
+            boards = model.boards
+            # materialize every board, keeping the Piece objects of the last
+            last = [dict(row) for row in boards[-1].data]
+            before = [dict(row) for row in boards[-2].data]
+            # drop the Piece objects of the boards before the last ones
+            for board in boards[:8]:
+                board.data
+            self.assertIsNone(boards[-2]._data)
+            for row, old in zip(boards[-2].data, before):
+                for x, piece in row.items():
+                    self.assertIs(piece, old[x])
+            for row, old in zip(boards[-1].data, last):
+                for x, piece in row.items():
+                    self.assertIs(piece, old[x])
+            pgnfile.close()
+        finally:
+            BoardModule.LAZY_BOARD_CACHE_SIZE = cache_size
+
+
+def pieces(board):
+    return [
+        {x: (piece.color, piece.piece) for x, piece in row.items() if piece}
+        for row in board.data
+    ]
+
 
 if __name__ == "__main__":
     unittest.main()
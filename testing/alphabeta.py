@@ -1,8 +1,17 @@
+import os
+import tempfile
 import unittest
-from time import time
+from time import sleep, time
 
 from pychess.Variants.losers import LosersBoard
+from pychess.Utils.const import ATOMICCHESS, hashfEXACT
 from pychess.Utils.lutils import lsearch
+from pychess.Utils.lutils.LBoard import LBoard
+from pychess.Utils.lutils.ldata import MATE_VALUE
+from pychess.Utils.lutils.lmove import toSAN
+from pychess.Utils.lutils.lmovegen import genAllMoves
+from pychess.Utils.lutils.lsmp import SearchPool
+from pychess.Utils.lutils.TranspositionTable import TranspositionTable, entryType
 
 # ♜ ♞ ♝ ♛ ♚ . ♞ ♜
 # ♟ . ♟ . . ♟ ♟ ♟
@@ -14,6 +23,9 @@ from pychess.Utils.lutils import lsearch
 # ♖ . ♗ ♕ ♔ ♗ ♘ ♖
 FEN0 = "rnbqk1nr/p1p2ppp/1p2p3/3pP3/1b1P4/2N5/PPP2PPP/R1BQKBNR w KQkq - 0 5"
 
+# Back rank mate in 2: 1. Rd8+ Rxd8 2. Rxd8#
+FEN1 = "2r3k1/5ppp/8/8/8/8/3R1PPP/3R2K1 w - - 0 1"
+
 
 class alphabetaTests(unittest.TestCase):
     def test1(self):
@@ -29,6 +41,113 @@ class alphabetaTests(unittest.TestCase):
 
         self.assertNotEqual(mvs, [])
 
+    def test_selective(self):
+        """Testing lsearch.aspirationSearch() with and without selective search"""
+
+        board = LBoard()
+        board.applyFen(FEN1)
+
+        options = {name: getattr(lsearch, name) for name in lsearch.SEARCH_OPTIONS}
+        try:
+            for enabled in (True, False):
+                for name in lsearch.SEARCH_OPTIONS:
+                    setattr(lsearch, name, enabled)
+                lsearch.table.clear()
+                lsearch.searching = True
+                lsearch.timecheck_counter = lsearch.TIMECHECK_FREQ
+                lsearch.endtime = time() + 60
+
+                scr = None
+                for depth in range(1, 5):
+                    mvs, scr = lsearch.aspirationSearch(board, depth, scr)
+                self.assertEqual(toSAN(board, mvs[0]), "Rd8+")
+                self.assertEqual(scr, MATE_VALUE - 3)
+        finally:
+            for name, value in options.items():
+                setattr(lsearch, name, value)
+
+    def test_smp(self):
+        """Testing lsearch.alphaBeta() with Lazy SMP helper processes"""
+
+        board = LBoard()
+        board.applyFen(FEN0)
+
+        table = lsearch.table
+        lsearch.table = TranspositionTable(1024 * 1024, shared=True)
+        pool = SearchPool(2, lsearch.table)
+        try:
+            lsearch.searching = True
+            lsearch.timecheck_counter = lsearch.TIMECHECK_FREQ
+            lsearch.endtime = time() + 60
+
+            pool.start(board, 4)
+            for depth in range(1, 4):
+                mvs, scr = lsearch.alphaBeta(board, depth)
+            # give the helpers time to finish their first iteration
+            while pool.nodes == 0 and time() < lsearch.endtime:
+                sleep(0.01)
+            pool.stop()
+
+            self.assertIn(mvs[0], list(genAllMoves(board)))
+            self.assertTrue(pool.nodes > 0)
+        finally:
+            pool.close()
+            lsearch.table = table
+
+    def test_torn_entry(self):
+        """Testing transposition table ignores partially written entries"""
+
+        board = LBoard()
+        board.applyFen(FEN0)
+        move = next(genAllMoves(board))
+
+        table = TranspositionTable(1024 * 1024)
+        table.record(board, move, 100, hashfEXACT, 3)
+        self.assertEqual(table.probe(board, 3, -200, 200), (move, 100, hashfEXACT))
+
+        # overwrite the score of the entry, as another process would do
+        offset = (board.hash % table.buckets) * 4 * entryType.size
+        table.data[offset + 8 : offset + 10] = b"\x10\x00"
+        self.assertIsNone(table.probe(board, 3, -200, 200))
+
+    def test_table_file(self):
+        """Testing transposition table stats, resize, save and load"""
+
+        board = LBoard()
+        board.applyFen(FEN0)
+        move = next(genAllMoves(board))
+
+        table = TranspositionTable(1024 * 1024, shared=True)
+        table.newSearch()
+        self.assertIsNone(table.probe(board, 3, -200, 200))
+        table.record(board, move, 100, hashfEXACT, 3)
+        self.assertEqual(table.probe(board, 3, -200, 200), (move, 100, hashfEXACT))
+        self.assertEqual(table.stats()[1:], (500, 0))
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "table.hash")
+            table.save(path)
+
+            table.resize(2 * 1024 * 1024)
+            self.assertEqual(table.size, 2 * 1024 * 1024)
+            self.assertIsNone(table.probe(board, 3, -200, 200))
+            # saved with other size
+            self.assertFalse(table.load(path))
+
+            table = TranspositionTable(1024 * 1024)
+            # saved for other variant
+            self.assertFalse(table.load(path, ATOMICCHESS))
+            self.assertTrue(table.load(path))
+            self.assertEqual(table.search_id, 1)
+            self.assertEqual(table.probe(board, 3, -200, 200), (move, 100, hashfEXACT))
+            self.assertFalse(table.load(os.path.join(tmpdir, "missing.hash")))
+
+            table.save(path, ATOMICCHESS)
+            self.assertTrue(table.load(path, ATOMICCHESS))
+            self.assertFalse(table.load(path))
+            # no temporary files left
+            self.assertEqual(os.listdir(tmpdir), ["table.hash"])
+
 
 if __name__ == "__main__":
     unittest.main()
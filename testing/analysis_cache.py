@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+
+from pychess.Utils.AnalysisCache import AnalysisCache
+from pychess.Utils.Board import Board
+from pychess.Utils.Move import parseSAN
+from pychess.Variants.atomic import AtomicBoard
+
+
+class AnalysisCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".sqlite")
+        os.close(fd)
+        self.board = Board(setup=True)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_deepest_line(self):
+        """Testing the cache keeps the deepest line per position and engine"""
+
+        cache = AnalysisCache(self.path, size=10)
+        self.assertIsNone(cache.get(self.board, "md5"))
+
+        cache.put(self.board, "md5", 10, 30, ["e2e4", "e7e5"])
+        cache.put(self.board, "md5", 8, -20, ["d2d4"])
+        self.assertEqual(cache.get(self.board, "md5"), (10, 30, ["e2e4", "e7e5"]))
+        self.assertFalse(cache.wants(self.board, "md5", 10))
+        self.assertTrue(cache.wants(self.board, "md5", 11))
+
+        # Other engines and variants have their own lines
+        self.assertIsNone(cache.get(self.board, "other"))
+        self.assertIsNone(cache.get(AtomicBoard(setup=True), "md5"))
+
+        cache.put(self.board, "md5", 12, 25, ["g1f3"])
+        cache.close()
+
+        cache = AnalysisCache(self.path, size=10)
+        self.assertEqual(cache.get(self.board, "md5"), (12, 25, ["g1f3"]))
+        cache.close()
+
+    def test_eviction(self):
+        """Testing the least recently used lines are dropped when full"""
+
+        cache = AnalysisCache(self.path, size=10)
+        boards = [self.board]
+        for san in ("e4", "e5", "Nf3", "Nc6", "Bb5", "a6", "Ba4", "Nf6", "O-O"):
+            board = boards[-1]
+            boards.append(board.move(parseSAN(board, san)))
+
+        for board in boards[:5]:
+            cache.put(board, "md5", 5, 0, ["a2a3"])
+        cache.flush()
+        # Reading the first position keeps it
+        self.assertIsNotNone(cache.get(boards[0], "md5"))
+        cache.flush()
+        for board in boards[5:]:
+            cache.put(board, "md5", 5, 0, ["a2a3"])
+        cache.put(Board("8/8/8/8/8/8/K7/k7 w - - 0 1"), "md5", 5, 0, ["a2b3"])
+        cache.flush()
+
+        self.assertEqual(cache.count, 9)
+        self.assertIsNotNone(cache.get(boards[0], "md5"))
+        self.assertIsNotNone(cache.get(boards[-1], "md5"))
+        cache.close()
+
+    def test_disabled(self):
+        """Testing a cache of size 0 keeps nothing"""
+
+        cache = AnalysisCache(self.path, size=0)
+        cache.put(self.board, "md5", 10, 30, ["e2e4"])
+        self.assertIsNone(cache.get(self.board, "md5"))
+        cache.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
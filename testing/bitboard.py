@@ -4,6 +4,7 @@ import random
 import operator
 from functools import reduce
 
+from pychess.Utils.lutils import sliding
 from pychess.Utils.lutils.bitboard import setBit, clearBit, firstBit, lastBit, iterBits
 
 
@@ -51,6 +52,32 @@ class BitboardTestCase(unittest.TestCase):
             itered = sorted(iterBits(board))
             self.assertEqual(positions, itered)
 
+    def test4(self):
+        """Testing sliding attack lookups"""
+
+        for positions, board in self.positionSets:
+            for cord in range(64):
+                self.assertEqual(
+                    sliding.bishopAttacks(cord, board),
+                    sliding.slidingAttacks(cord, board, sliding.BISHOP_RAYS),
+                )
+                self.assertEqual(
+                    sliding.rookAttacks(cord, board),
+                    sliding.slidingAttacks(cord, board, sliding.ROOK_RAYS),
+                )
+
+    def test5(self):
+        """Testing sliding attack tables are filled on lookup"""
+
+        table = sliding.AttackTable(27, sliding.ROOK_RAYS)
+        self.assertEqual(len(table), 0)
+        blocker = setBit(setBit(0, 29), 43) & sliding.rookMask[27]
+        attacks = table[blocker]
+        self.assertEqual(
+            attacks, sliding.slidingAttacks(27, blocker, sliding.ROOK_RAYS)
+        )
+        self.assertEqual(dict(table), {blocker: attacks})
+
 
 if __name__ == "__main__":
     unittest.main()
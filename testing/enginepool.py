@@ -0,0 +1,203 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+
+from pychess.Players import EnginePool
+from pychess.Players.CECPEngine import CECPEngine
+
+
+class FakeSubProcess:
+    """Answers every command listed in answers with the given line"""
+
+    def __init__(self, answers=None):
+        self.answers = answers or {}
+        self.defname = "fake"
+        self.proc = SimpleNamespace(returncode=None)
+        self.terminated = False
+        self.written = []
+        self.handlers = {}
+        self.handler_ids = 0
+
+    def connect(self, signal, handler):
+        self.handler_ids += 1
+        self.handlers[self.handler_ids] = (signal, handler)
+        return self.handler_ids
+
+    def disconnect(self, handler_id):
+        del self.handlers[handler_id]
+
+    def emit(self, signal, *args):
+        for name, handler in list(self.handlers.values()):
+            if name == signal:
+                handler(self, *args)
+
+    def write(self, data):
+        self.written.append(data)
+        answer = self.answers.get(data.strip())
+        if answer is not None:
+            asyncio.get_running_loop().call_soon(self.emit, "line", answer)
+
+    def terminate(self):
+        self.terminated = True
+        self.proc.returncode = 0
+
+    def commands(self):
+        return [data for data in self.written if data.strip()]
+
+
+class FakeEngine:
+    def __init__(self, subprocess):
+        self.engine = subprocess
+        self.readyMoves = True
+        self.resets = []
+
+    def poolReset(self, options, ping):
+        self.resets.append(options)
+        return ["new", "ping %d" % ping], "pong %d" % ping
+
+
+ENGINE = {
+    "protocol": "xboard",
+    "command": "/usr/bin/fakeengine",
+    "md5": "0",
+    "options": [
+        {"name": "Style", "type": "combo", "default": "Normal", "value": "Wild"},
+        {"name": "Book", "type": "check", "default": False, "value": True},
+        {"name": "Hash", "type": "spin", "default": 16, "value": 16},
+    ],
+}
+
+
+class EnginePoolTestCase(unittest.TestCase):
+    def setUp(self):
+        self.pool = EnginePool.EnginePool(size=2)
+
+    def test_key(self):
+        """Testing the pool key of an engine"""
+
+        key, options = EnginePool.EnginePool.key(ENGINE, False)
+        self.assertEqual(options, {"Style": "Wild", "Book": 1})
+        self.assertNotEqual(key, EnginePool.EnginePool.key(ENGINE, True)[0])
+        self.assertNotEqual(key, EnginePool.EnginePool.key(ENGINE, False, "atomic")[0])
+        self.assertEqual(key, EnginePool.EnginePool.key(dict(ENGINE), False)[0])
+
+    def test_release_acquire(self):
+        """Testing a released engine is reset and reused"""
+
+        async def coro():
+            key, options = EnginePool.EnginePool.key(ENGINE, False)
+            subprocess = FakeSubProcess({"ping 1": "pong 1"})
+            engine = FakeEngine(subprocess)
+            self.pool.register(subprocess, key, options)
+
+            self.assertTrue(self.pool.release(engine))
+            self.assertEqual(engine.resets, [options])
+            await asyncio.gather(*self.pool.resetting.values())
+            self.assertEqual(subprocess.commands(), ["new", "ping 1"])
+            self.assertFalse(subprocess.terminated)
+
+            other_key = EnginePool.EnginePool.key(ENGINE, True)[0]
+            self.assertIsNone(self.pool.acquire(other_key))
+            self.assertIs(self.pool.acquire(key), subprocess)
+            self.assertIsNone(self.pool.acquire(key))
+            self.assertEqual(subprocess.handlers, {})
+
+            # Not registered again, so not taken back
+            self.assertFalse(self.pool.release(engine))
+
+        asyncio.run(coro())
+
+    def test_reset_timeout(self):
+        """Testing an engine not answering the reset is quit"""
+
+        async def coro():
+            key, options = EnginePool.EnginePool.key(ENGINE, False)
+            subprocess = FakeSubProcess()
+            self.pool.register(subprocess, key, options)
+            self.assertTrue(self.pool.release(FakeEngine(subprocess)))
+            await asyncio.gather(*self.pool.resetting.values())
+            self.assertTrue(subprocess.terminated)
+            self.assertIsNone(self.pool.acquire(key))
+
+        EnginePool.RESET_TIMEOUT, timeout = 0.05, EnginePool.RESET_TIMEOUT
+        try:
+            asyncio.run(coro())
+        finally:
+            EnginePool.RESET_TIMEOUT = timeout
+
+    def test_size(self):
+        """Testing the oldest idle engines are quit"""
+
+        async def coro():
+            key, options = EnginePool.EnginePool.key(ENGINE, False)
+            subprocesses = []
+            for ping in range(1, 4):
+                subprocess = FakeSubProcess({"ping %d" % ping: "pong %d" % ping})
+                self.pool.register(subprocess, key, options)
+                self.assertTrue(self.pool.release(FakeEngine(subprocess)))
+                await asyncio.gather(*self.pool.resetting.values())
+                subprocesses.append(subprocess)
+
+            self.assertEqual(
+                [subprocess.terminated for subprocess in subprocesses],
+                [True, False, False],
+            )
+
+            # An idle engine dying is dropped
+            subprocesses[2].terminate()
+            subprocesses[2].emit("died")
+            self.assertIs(self.pool.acquire(key), subprocesses[1])
+
+            self.assertEqual(len(self.pool.clear()), 0)
+
+        asyncio.run(coro())
+
+    def test_not_released(self):
+        """Testing engines which can't be reused aren't taken back"""
+
+        async def coro():
+            key, options = EnginePool.EnginePool.key(ENGINE, False)
+            subprocess = FakeSubProcess({"ping 1": "pong 1"})
+            engine = FakeEngine(subprocess)
+
+            engine.readyMoves = False
+            self.pool.register(subprocess, key, options)
+            self.assertFalse(self.pool.release(engine))
+
+            engine.readyMoves = True
+            self.pool.register(subprocess, key, options)
+            engine.poolReset = lambda options, ping: None
+            self.assertFalse(self.pool.release(engine))
+
+            pool = EnginePool.EnginePool(size=0)
+            pool.register(subprocess, key, options)
+            self.assertFalse(pool.release(engine))
+
+        asyncio.run(coro())
+        self.assertFalse(self.pool.resetting)
+
+    def test_cecp_reset(self):
+        """Testing CECP engines are only reused when their settings reset"""
+
+        engine = SimpleNamespace(
+            features={"ping": 1},
+            engineIsAnalyzing=True,
+            optionQueue=["option Style=Wild", "memory 64", "sd 5", "random"],
+        )
+        options = {"Style": "Wild", "memory": 64}
+        self.assertEqual(
+            CECPEngine.poolReset(engine, options, 7),
+            (["exit", "force", "new", "easy", "random", "ping 7"], "pong 7"),
+        )
+
+        for command in ("skill 50", "egtpath gaviota /tmp", "cores 2", "option a=1"):
+            engine.optionQueue.append(command)
+            self.assertIsNone(CECPEngine.poolReset(engine, options, 7))
+            engine.optionQueue.pop()
+
+        engine.features["ping"] = 0
+        self.assertIsNone(CECPEngine.poolReset(engine, options, 7))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,19 @@
+import random
 import unittest
 
-from pychess.Utils.const import WHITE, BLACK, NORMALCHESS
+from pychess.Utils.const import (
+    WHITE,
+    BLACK,
+    NORMALCHESS,
+    ATOMICCHESS,
+    CRAZYHOUSECHESS,
+    SCHESS,
+    SITTUYINCHESS,
+    SUICIDECHESS,
+)
 from pychess.Utils.lutils.LBoard import LBoard
+from pychess.Utils.lutils.lmovegen import genAllMoves
+from pychess.Variants import variants
 from pychess.Utils.lutils.leval import evaluateComplete
 from pychess.Utils.lutils import leval
 
@@ -59,6 +71,98 @@ class EvalTestCase(unittest.TestCase):
             # print func, sw, sb
             self.assertEqual(sw, sb)
 
+    def test4(self):
+        """Testing incremental material and pawn square sums"""
+        rand = random.Random(4)
+        for variant in (
+            NORMALCHESS,
+            ATOMICCHESS,
+            CRAZYHOUSECHESS,
+            SCHESS,
+            SITTUYINCHESS,
+            SUICIDECHESS,
+        ):
+            board = variants[variant](setup=True).board
+            plies = 0
+            for i in range(60):
+                moves = []
+                for move in genAllMoves(board):
+                    board.applyMove(move)
+                    if not board.opIsChecked():
+                        moves.append(move)
+                    board.popMove()
+                if not moves:
+                    break
+                board.applyMove(rand.choice(moves))
+                plies += 1
+
+                scratch = board.clone()
+                scratch.iniMaterial()
+                self.assertEqual(board.material, scratch.material)
+                self.assertEqual(board.psq, scratch.psq)
+
+                # The FEN doesn't tell the sittuyin placement phase is over
+                if variant == SITTUYINCHESS:
+                    continue
+                fresh = LBoard(variant)
+                fresh.applyFen(board.asFen())
+                for color in (WHITE, BLACK):
+                    self.assertEqual(
+                        evaluateComplete(board, color), evaluateComplete(fresh, color)
+                    )
+
+            for i in range(plies):
+                board.popMove()
+            scratch = board.clone()
+            scratch.iniMaterial()
+            self.assertEqual(board.material, scratch.material)
+            self.assertEqual(board.psq, scratch.psq)
+
+    def test5(self):
+        """Testing evaluation hash and pawn table sizes"""
+        board = LBoard(NORMALCHESS)
+        board.applyFen(
+            "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 10"
+        )
+
+        table = leval.EvalHashTable(1024)
+        self.assertIsNone(table.probe(board, WHITE))
+        table.record(board, WHITE, 42)
+        self.assertEqual(table.probe(board, WHITE), 42)
+        self.assertIsNone(table.probe(board, BLACK))
+        self.assertEqual(table.hitRate(), 333)
+
+        # entries of older searches are replaced first
+        for i in range(3):
+            table.newSearch()
+            table.record(board, BLACK + 2 * i, i)
+        table.newSearch()
+        table.record(board, 8, 100)
+        self.assertIsNone(table.probe(board, WHITE))
+        self.assertEqual(table.probe(board, BLACK), 0)
+        self.assertEqual(table.probe(board, 8), 100)
+
+        scores = [evaluateComplete(board, color) for color in (WHITE, BLACK)]
+        try:
+            leval.evaltable.clear()
+            self.assertEqual(
+                [evaluateComplete(board, color) for color in (WHITE, BLACK)], scores
+            )
+            leval.evaltable.resetStats()
+            self.assertEqual(evaluateComplete(board, WHITE), scores[WHITE])
+            self.assertEqual(leval.evaltable.hitRate(), 1000)
+
+            leval.evaltable.resize(0)
+            leval.resizePawnTable(1000)
+            self.assertEqual(len(leval.pawntable), 32 * leval.pawnEntryType.size)
+            self.assertEqual(
+                [evaluateComplete(board, color) for color in (WHITE, BLACK)], scores
+            )
+            self.assertEqual(leval.evaltable.probes, 0)
+        finally:
+            leval.evaltable.resize(leval.EVAL_TABLE_SIZE)
+            leval.resizePawnTable(leval.PAWN_TABLE_SIZE)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,80 @@
+import os
+import shutil
+import tempfile
+import unittest
+from io import StringIO
+
+from pychess.Savers import pgn
+from pychess.Savers.pgn import load
+from pychess.System.protoopen import protoopen
+
+FILES = ("annotated", "atomic", "chess960rwch", "world_matches", "zh", "schess")
+
+
+class OpenStringIO(StringIO):
+    """Keeps the saved text readable after pgn.save() closes the handle"""
+
+    def close(self):
+        pass
+
+
+def saved(model):
+    handle = OpenStringIO()
+    pgn.save(handle, model)
+    return handle.getvalue()
+
+
+class GameStoreTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def open_pgn(self, name):
+        path = os.path.join(self.tmpdir, "%s.pgn" % name)
+        shutil.copy("gamefiles/%s.pgn" % name, path)
+        pgnfile = load(protoopen(path))
+        pgnfile.limit = 100
+        pgnfile.init_tag_database()
+        return pgnfile
+
+    def test_round_trip(self):
+        """Testing games loaded from stored moves save the same .pgn"""
+
+        for name in FILES:
+            pgnfile = self.open_pgn(name)
+            games, plys = pgnfile.get_records()
+            for rec in games:
+                self.assertIsNone(pgnfile.tag_database.get_game_moves(rec["Offset"]))
+                try:
+                    parsed = pgnfile.loadToModel(rec)
+                except Exception:
+                    # invalid games are not stored
+                    self.assertIsNone(
+                        pgnfile.tag_database.get_game_moves(rec["Offset"])
+                    )
+                    continue
+                self.assertIsNotNone(pgnfile.tag_database.get_game_moves(rec["Offset"]))
+
+                stored = pgnfile.loadToModel(rec)
+                self.assertEqual(saved(stored), saved(parsed))
+                self.assertEqual(len(stored.variations), len(parsed.variations))
+            pgnfile.close()
+
+    def test_position(self):
+        """Testing loading stored games up to a given ply"""
+
+        pgnfile = self.open_pgn("world_matches")
+        games, plys = pgnfile.get_records()
+        rec = games[0]
+        parsed = pgnfile.loadToModel(rec, position=10)
+        pgnfile.loadToModel(rec)
+        stored = pgnfile.loadToModel(rec, position=10)
+        self.assertEqual(len(stored.moves), 10)
+        self.assertEqual(saved(stored), saved(parsed))
+        pgnfile.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
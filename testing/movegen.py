@@ -1,14 +1,31 @@
 import unittest
 
 from pychess import MSYS2
-from pychess.Utils.lutils.lmovegen import genAllMoves, genCheckEvasions
+from pychess.Utils.lutils.lmovegen import (
+    genAllMoves,
+    genCheckEvasions,
+    genLegalMoves,
+    isLegalMove,
+)
 from pychess.Utils.lutils.LBoard import LBoard
+from pychess.Utils.lutils.perft import (
+    do_perft,
+    newPerftPool,
+    parallelPerft,
+    runSuite,
+)
 
 # from pychess.Utils.lutils.ldata import *
-from pychess.Utils.lutils.validator import validateMove
+from pychess.Utils.lutils.validator import validateMove, validateQuietMove
 
 from pychess.Utils.lutils.lmove import toSAN, parseSAN, ParsingError
-from pychess.Utils.const import NORMALCHESS, SITTUYINCHESS, CAMBODIANCHESS, MAKRUKCHESS
+from pychess.Utils.const import (
+    NORMALCHESS,
+    FISCHERRANDOMCHESS,
+    SITTUYINCHESS,
+    CAMBODIANCHESS,
+    MAKRUKCHESS,
+)
 
 
 class FindMovesTestCase(unittest.TestCase):
@@ -194,6 +211,95 @@ class FindMovesTestCase(unittest.TestCase):
         self.MAXDEPTH = 3
         self.movegen(positions, MAKRUKCHESS)
 
+    def testValidateQuietMove(self):
+        """Testing validateQuietMove accepts generated moves only"""
+        positions = [
+            (SITTUYINCHESS, "8/6k1/6p1/3s2P1/3npR2/2r5/p2N2F1/3K4 b - - 0 49"),
+            (
+                CAMBODIANCHESS,
+                "rnsmksnr/8/ppp1pppp/3p4/4P3/PPPP1PPP/8/RNSKMSNR w - - 0 2",
+            ),
+            (MAKRUKCHESS, "rnsmksnr/8/ppppp1pp/2P5/5p2/PP1PPPPP/8/RNSKMSNR w - - 0 3"),
+        ]
+        with open("gamefiles/perftsuite.epd") as f:
+            for line in f:
+                if not line.startswith("#"):
+                    positions.append((NORMALCHESS, line.split(";")[0]))
+
+        for variant, fen in positions:
+            board = LBoard(variant)
+            board.applyFen(fen)
+            generated = set(genAllMoves(board))
+            for move in range(64 * 64):
+                if validateQuietMove(board, move):
+                    self.assertIn(move, generated)
+
+    def testLegalMoves(self):
+        """Testing genLegalMoves and isLegalMove against making the moves"""
+
+        def legalMoves(board):
+            moves = []
+            for move in genAllMoves(board):
+                board.applyMove(move)
+                if not board.opIsChecked():
+                    moves.append(move)
+                board.popMove()
+            return moves
+
+        def walk(board, depth):
+            moves = legalMoves(board)
+            self.assertEqual(sorted(genLegalMoves(board)), sorted(moves))
+            for move in genAllMoves(board):
+                self.assertEqual(isLegalMove(board, move), move in moves)
+            if depth > 1:
+                for move in moves:
+                    board.applyMove(move)
+                    walk(board, depth - 1)
+                    board.popMove()
+
+        positions = [
+            # Pinned en passant capturer
+            (NORMALCHESS, "8/8/8/KPp4r/8/8/8/6k1 w - c6 0 2"),
+            # FRC castling uncovering a check by the rook behind
+            (FISCHERRANDOMCHESS, "8/8/8/8/8/8/8/rRK3k1 w B - 0 1"),
+            (FISCHERRANDOMCHESS, "2rkr3/5PP1/8/5Q2/5q2/8/5pp1/2RKR3 w CEce - 0 1"),
+        ]
+        with open("gamefiles/perftsuite.epd") as f:
+            for line in f:
+                if not line.startswith("#"):
+                    positions.append((NORMALCHESS, line.split(";")[0]))
+
+        for variant, fen in positions:
+            board = LBoard(variant)
+            board.applyFen(fen)
+            walk(board, 2)
+
+    def testPerftSuite(self):
+        """Testing the perft reference suite, serial and over a process pool"""
+        failed = [
+            (result["variant"], result["fen"], result["depth"], result["nodes"])
+            for result in runSuite(maxdepth=3)
+            if not result["ok"]
+        ]
+        self.assertEqual(failed, [])
+
+        board = LBoard(NORMALCHESS)
+        board.applyFen(
+            "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+        )
+        pool = newPerftPool(2)
+        try:
+            nodes, counts = parallelPerft(board, 3, pool)
+        finally:
+            pool.close()
+            pool.join()
+        self.assertEqual(nodes, 97862)
+        self.assertEqual(len(counts), 48)
+        for move, count in counts.items():
+            board.applyMove(move)
+            self.assertEqual(do_perft(board, 2, 0), count)
+            board.popMove()
+
 
 if __name__ == "__main__":
     unittest.main()
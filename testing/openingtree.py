@@ -0,0 +1,147 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from pychess.Savers.pgn import load, OPENING_TREE_PLIES
+from pychess.System.protoopen import protoopen
+from pychess.Utils.const import FEN_START
+from pychess.Utils.lutils.LBoard import LBoard
+from pychess.Utils.lutils.lmove import parseAN
+
+E4_FEN = "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1"
+
+
+def open_pgn(path, importer=None):
+    pgnfile = load(protoopen(path))
+    pgnfile.init_tag_database()
+    pgnfile.create_position_index(importer)
+    return pgnfile
+
+
+def book_rows(path):
+    db = sqlite3.connect(path.replace(".pgn", ".sqlite"))
+    rows = db.execute("SELECT * FROM book_move ORDER BY hash, move").fetchall()
+    db.close()
+    return rows
+
+
+class OpeningTreeTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_book_moves(self):
+        """Testing opening tree gives the same stats as the position index"""
+
+        path = os.path.join(self.tmpdir, "world_matches.pgn")
+        shutil.copy("gamefiles/world_matches.pgn", path)
+        pgnfile = open_pgn(path)
+
+        for fen in (FEN_START, E4_FEN):
+            board = LBoard()
+            board.applyFen(fen)
+            rows = pgnfile.get_book_moves(fen)
+            self.assertTrue(len(rows) > 0)
+
+            stats = pgnfile.position_index.get_move_stats(board.hash)
+            for move, games, white_won, black_won, draw, elo, year in rows:
+                lmove = parseAN(board, move)
+                self.assertEqual(stats[lmove], [games, white_won, black_won, draw])
+                self.assertTrue(elo is None or 1000 < elo < 3000)
+                self.assertTrue(year is None or 1800 < year < 2100)
+            self.assertEqual(len(rows), len(stats))
+
+        # positions after the opening tree plies come from the position index
+        fen = FEN_START.replace(" 1", " %s" % (OPENING_TREE_PLIES // 2 + 1))
+        for row in pgnfile.get_book_moves(fen):
+            self.assertEqual(row[5:], (None, None))
+        pgnfile.close()
+
+    def test_append(self):
+        """Testing opening tree update of games appended to the .pgn"""
+
+        with open("gamefiles/world_matches.pgn", "rb") as f:
+            data = f.read()
+        # cut the file inside the movetext of a game
+        half = data.index(b"[Event", len(data) // 2) - 30
+
+        path = os.path.join(self.tmpdir, "append.pgn")
+        with open(path, "wb") as f:
+            f.write(data[:half])
+        open_pgn(path).close()
+        first_rows = book_rows(path)
+
+        with open(path, "ab") as f:
+            f.write(data[half:])
+        # make sure .pgn is newer than .sqlite
+        mtime = os.path.getmtime(path) + 10
+        os.utime(path, (mtime, mtime))
+        open_pgn(path).close()
+
+        full_path = os.path.join(self.tmpdir, "full.pgn")
+        with open(full_path, "wb") as f:
+            f.write(data)
+        open_pgn(full_path).close()
+
+        self.assertTrue(len(first_rows) < len(book_rows(full_path)))
+        self.assertEqual(book_rows(path), book_rows(full_path))
+
+    def test_one_replay(self):
+        """Testing the opening tree and the position index are built in one
+        replay of the games, on request only"""
+
+        path = os.path.join(self.tmpdir, "world_matches.pgn")
+        shutil.copy("gamefiles/world_matches.pgn", path)
+        pgnfile = load(protoopen(path))
+        pgnfile.init_tag_database()
+        pgnfile.init_position_index()
+        pgnfile.init_opening_tree()
+        self.assertIsNone(pgnfile.position_index)
+        self.assertFalse(pgnfile.opening_tree)
+        self.assertEqual(book_rows(path), [])
+
+        with patch.object(
+            pgnfile, "replay_games", wraps=pgnfile.replay_games
+        ) as replay_games:
+            self.assertTrue(pgnfile.create_position_index())
+            self.assertTrue(pgnfile.create_position_index())
+        self.assertEqual(replay_games.call_count, 1)
+        self.assertIsNotNone(pgnfile.position_index)
+        self.assertTrue(pgnfile.opening_tree)
+        pgnfile.close()
+
+    def test_cancel(self):
+        """Testing a cancelled opening tree is continued by the next update"""
+
+        class Importer:
+            # cancels after replaying some games
+            def __init__(self, games):
+                self.games = games
+
+            @property
+            def cancel(self):
+                self.games -= 1
+                return self.games < 0
+
+        path = os.path.join(self.tmpdir, "cancelled.pgn")
+        shutil.copy("gamefiles/world_matches.pgn", path)
+        pgnfile = open_pgn(path, Importer(20))
+        self.assertFalse(pgnfile.opening_tree)
+        self.assertEqual(pgnfile.get_book_moves(FEN_START), [])
+        self.assertTrue(pgnfile.create_position_index())
+        pgnfile.close()
+
+        full_path = os.path.join(self.tmpdir, "full.pgn")
+        shutil.copy("gamefiles/world_matches.pgn", full_path)
+        open_pgn(full_path).close()
+
+        self.assertEqual(book_rows(path), book_rows(full_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
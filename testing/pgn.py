@@ -1,7 +1,11 @@
 import unittest
+from io import StringIO
 
+from pychess.Savers.ChessFile import LoadingError
 from pychess.Savers.pgn import load, walk, pattern, MOVE
 from pychess.System.protoopen import protoopen
+from pychess.Utils.const import FEN_START
+from pychess.Utils.lutils.LBoard import LBoard
 
 
 def normalize(text):
@@ -76,6 +80,98 @@ class PgnTestCase(unittest.TestCase):
         self.pgn_test("sittuyin")
         self.pgn_test("schess")
 
+    def test_nested_variations(self):
+        """Testing nested variations parsed in one pass"""
+
+        pgn = (
+            '[Event "?"]\n[Site "?"]\n[Date "?"]\n[Round "?"]\n'
+            '[White "?"]\n[Black "?"]\n[Result "*"]\n\n'
+            "1. e4 {start} (1. d4 {queen pawn} d5 (1... Nf6 2. c4 (2. Nf3 g6) e6) "
+            "2. c4) (1. c4) 1... e5 2. Nf3 *\n"
+        )
+        pgnfile = load(StringIO(pgn))
+        model = pgnfile.loadToModel(None)
+
+        self.assertEqual(len(model.moves), 3)
+        self.assertEqual(
+            [len(variation) for variation in model.variations], [4, 4, 5, 5, 2]
+        )
+        self.assertEqual(model.boards[1].board.children[0], "start")
+
+        d4_line = model.boards[1].board.children[1]
+        self.assertEqual(d4_line[1].children[0], "queen pawn")
+        self.assertEqual(len(d4_line), 4)
+        nf6_line = d4_line[2].children[0]
+        self.assertEqual(len(nf6_line), 4)
+        self.assertEqual(len(nf6_line[2].children[0]), 3)
+
+    def test_variation_error(self):
+        """Testing an invalid move in a variation keeps the rest of the game"""
+
+        pgn = (
+            '[Event "?"]\n[Site "?"]\n[Date "?"]\n[Round "?"]\n'
+            '[White "?"]\n[Black "?"]\n[Result "*"]\n\n'
+            "1. e4 (1. d4 Nc4 (1... d5) 2. c4) e5 2. Nf3 *\n"
+        )
+        pgnfile = load(StringIO(pgn))
+        with self.assertRaises(LoadingError):
+            pgnfile.loadToModel(None)
+
+        lboard = LBoard()
+        lboard.applyFen(FEN_START)
+        movetext = pgnfile.get_movetext(pgnfile.games[0])
+        boards = pgnfile.parse_movetext(movetext, lboard, -1)
+        self.assertEqual(len(boards), 4)
+        # the variation stopped at the invalid move
+        self.assertEqual(len(boards[1].children[0]), 2)
+
+    def test_iter_games(self):
+        """Testing headless game iteration gives the moves of loadToModel"""
+
+        for name in ("world_matches", "zh", "chess960rwch"):
+            pgnfile = load(protoopen("gamefiles/%s.pgn" % name))
+            pgnfile.init_tag_database()
+            games, plys = pgnfile.get_records()
+            records = pgnfile.iter_games()
+            for rec in games:
+                record = next(records)
+                self.assertEqual(record.tags["Offset"], rec["Offset"])
+                model = pgnfile.loadToModel(rec)
+                self.assertEqual(record.board.asFen(), model.boards[0].asFen())
+                self.assertEqual(record.moves, [move.move for move in model.moves])
+            pgnfile.close()
+
+        pgnfile = load(protoopen("gamefiles/world_matches.pgn"))
+        pgnfile.init_tag_database()
+        count = 0
+        for record in pgnfile.iter_games({"white": "Kasparov"}, fields=()):
+            self.assertIn("Kasparov", record.tags["White"])
+            self.assertIsNone(record.moves)
+            count += 1
+        pgnfile.set_tag_filter({"white": "Kasparov"})
+        pgnfile.limit = 1000
+        self.assertEqual(count, len(pgnfile.get_records()[0]))
+        pgnfile.close()
+
+    def test_iter_games_comments(self):
+        """Testing mainline comments and evals of headless game iteration"""
+
+        pgn = (
+            '[Event "?"]\n[Site "?"]\n[Date "?"]\n[Round "?"]\n'
+            '[White "?"]\n[Black "?"]\n[Result "*"]\n\n'
+            "{start} 1. e4 {[%eval 0.25/12]} e5 (1... c5 {sicilian}) "
+            "2. Nf3 {[%eval -1.50]} {developing} *\n"
+        )
+        pgnfile = load(StringIO(pgn))
+        record = next(pgnfile.iter_games(fields=("moves", "comments", "evals")))
+        self.assertEqual(len(record.moves), 3)
+        self.assertEqual(record.board.asFen(), FEN_START)
+        self.assertEqual(
+            record.comments,
+            {0: ["start"], 1: ["[%eval 0.25/12]"], 3: ["[%eval -1.50]", "developing"]},
+        )
+        self.assertEqual(record.evals, {1: (25, "12"), 3: (-150, "")})
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,185 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from pychess.Database import PgnImport
+from pychess.Database.Benchmark import import_games
+from pychess.Database.PgnImport import (
+    parse_header,
+    pgn_digest,
+    pgn_digests,
+    read_games,
+    scan_games,
+    scan_headers,
+    scan_range,
+    split_games,
+)
+from pychess.Savers.pgn import load
+from pychess.System.protoopen import protoopen
+
+FILES = ("atomic", "chess960rwch", "world_matches", "zh", "sittuyin", "schess")
+
+
+class PgnImportTestCase(unittest.TestCase):
+    def serial_headers(self, path):
+        handle = protoopen(path)
+        basename = os.path.basename(path)
+        headers = [parse_header(tags, basename) for tags in read_games(handle)]
+        handle.close()
+        return headers
+
+    def test_scan_headers(self):
+        """Testing memory mapped scanner gives the same headers as read_games"""
+
+        for name in FILES + ("annotated", "badpgn", "promotion"):
+            path = "gamefiles/%s.pgn" % name
+            handle = protoopen(path)
+            games = list(read_games(handle))
+            handle.close()
+            self.assertEqual(list(scan_headers(path)), games)
+
+    def test_split_games(self):
+        """Testing byte ranges scanned separately give the same headers"""
+
+        for name in FILES:
+            path = "gamefiles/%s.pgn" % name
+            basename = os.path.basename(path)
+            serial = self.serial_headers(path)
+
+            for parts in (2, 5, 17):
+                ranges = split_games(path, parts)
+                self.assertTrue(len(ranges) <= parts)
+                self.assertEqual(ranges[0][0], 0)
+                self.assertEqual(ranges[-1][1], os.path.getsize(path))
+
+                headers = []
+                for start, end in ranges:
+                    headers += scan_range((path, start, end, basename, "latin_1", None))
+                self.assertEqual(headers, serial)
+
+    def test_scan_games(self):
+        """Testing parallel header scanning keeps games in file order"""
+
+        chunk_size = PgnImport.SCAN_CHUNK_SIZE
+        PgnImport.SCAN_CHUNK_SIZE = 4096
+        try:
+            for name in FILES:
+                path = "gamefiles/%s.pgn" % name
+                serial = self.serial_headers(path)
+                parallel = list(scan_games(path, os.path.basename(path), "latin_1", 2))
+                self.assertEqual(parallel, serial)
+        finally:
+            PgnImport.SCAN_CHUNK_SIZE = chunk_size
+
+    def test_bulk_load(self):
+        """Testing bulk load gives the same database as the default import"""
+
+        path = "gamefiles/world_matches.pgn"
+        with tempfile.TemporaryDirectory() as tmpdir:
+            default_path = os.path.join(tmpdir, "default.sqlite")
+            bulk_path = os.path.join(tmpdir, "bulk.sqlite")
+            import_games(path, default_path)
+            import_games(path, bulk_path, bulk=True)
+
+            default_db = sqlite3.connect(default_path)
+            bulk_db = sqlite3.connect(bulk_path)
+            for table in ("game", "event", "site", "player", "source", "tag_game"):
+                query = "SELECT * FROM %s ORDER BY id" % table
+                self.assertEqual(
+                    bulk_db.execute(query).fetchall(),
+                    default_db.execute(query).fetchall(),
+                )
+
+            query = "SELECT name FROM sqlite_master WHERE type='index' ORDER BY name"
+            self.assertEqual(
+                bulk_db.execute(query).fetchall(),
+                default_db.execute(query).fetchall(),
+            )
+            default_db.close()
+            bulk_db.close()
+
+    def test_append(self):
+        """Testing import of games appended to an already imported .pgn"""
+
+        def game_rows(pgn_path):
+            pgnfile = load(protoopen(pgn_path))
+            pgnfile.init_tag_database()
+            pgnfile.close()
+
+            db = sqlite3.connect(pgn_path.replace(".pgn", ".sqlite"))
+            rows = db.execute(
+                "SELECT offset, event_id, white_id, black_id, date FROM game "
+                "ORDER BY offset"
+            ).fetchall()
+            db.close()
+            return rows
+
+        with open("gamefiles/world_matches.pgn", "rb") as f:
+            data = f.read()
+        # cut the file inside the movetext of a game
+        half = data.index(b"[Event", len(data) // 2) - 30
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "append.pgn")
+            with open(path, "wb") as f:
+                f.write(data[:half])
+            first_rows = game_rows(path)
+
+            with open(path, "ab") as f:
+                f.write(data[half:])
+            # make sure .pgn is newer than .sqlite
+            mtime = os.path.getmtime(path) + 10
+            os.utime(path, (mtime, mtime))
+            appended_rows = game_rows(path)
+
+            full_path = os.path.join(tmpdir, "full.pgn")
+            with open(full_path, "wb") as f:
+                f.write(data)
+            full_rows = game_rows(full_path)
+
+            self.assertTrue(len(first_rows) < len(full_rows))
+            self.assertEqual(appended_rows[: len(first_rows) - 1], first_rows[:-1])
+            self.assertEqual(appended_rows, full_rows)
+
+    def test_append_digests(self):
+        """Testing the .pgn file is read once to check the appended states"""
+
+        path = "gamefiles/world_matches.pgn"
+        size = os.path.getsize(path)
+        sizes = (0, 1000, size // 2, size)
+        self.assertEqual(
+            pgn_digests(path, sizes), {s: pgn_digest(path, s) for s in sizes}
+        )
+
+        with open(path, "rb") as f:
+            data = f.read()
+        half = data.index(b"[Event", len(data) // 2) - 30
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "append.pgn")
+            with open(path, "wb") as f:
+                f.write(data[:half])
+            pgnfile = load(protoopen(path))
+            pgnfile.init_tag_database()
+            pgnfile.create_position_index()
+            pgnfile.close()
+
+            with open(path, "ab") as f:
+                f.write(data[half:])
+            mtime = os.path.getmtime(path) + 10
+            os.utime(path, (mtime, mtime))
+
+            with patch("pychess.Savers.pgn.pgn_digests", wraps=pgn_digests) as digests:
+                pgnfile = load(protoopen(path))
+                pgnfile.init_tag_database()
+                pgnfile.init_position_index()
+                pgnfile.init_opening_tree()
+                pgnfile.create_position_index()
+                pgnfile.close()
+            self.assertEqual(digests.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,245 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from pychess.Database import PositionIndex
+from pychess.Database.PositionIndex import read_state, write_index
+from pychess.Savers.pgn import load
+from pychess.System.protoopen import protoopen
+from pychess.Utils.const import (
+    CRAZYHOUSECHESS,
+    NORMALCHESS,
+    FEN_START,
+    WHITEWON,
+    BLACKWON,
+    DRAW,
+    FIRST_PAGE,
+    NEXT_PAGE,
+)
+from pychess.Utils.lutils.lmove import parseAN, toAN
+
+E4_FEN = "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1"
+
+
+class PositionIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        path = os.path.join(self.tmpdir, "world_matches.pgn")
+        shutil.copy("gamefiles/world_matches.pgn", path)
+        self.pgnfile = load(protoopen(path))
+        self.pgnfile.init_tag_database()
+        self.pgnfile.create_position_index()
+
+    def tearDown(self):
+        self.pgnfile.close()
+        shutil.rmtree(self.tmpdir)
+
+    def test_find(self):
+        """Testing every mainline position of a game is found in the index"""
+
+        index = self.pgnfile.position_index
+        for rec in self.pgnfile.get_records(FIRST_PAGE)[0][:10]:
+            model = self.pgnfile.loadToModel(rec)
+            for board in model.boards:
+                offs_ply = index.get_offsets(board.board.hash)
+                self.assertIn(rec["Offset"], offs_ply)
+                self.assertTrue(offs_ply[rec["Offset"]] <= board.ply)
+
+    def test_book_moves(self):
+        """Testing move stats of the starting position"""
+
+        expected = {}
+        records, offs_ply = self.pgnfile.get_records(FIRST_PAGE)
+        while records:
+            for rec in records:
+                if rec["FEN"]:
+                    continue
+                model = self.pgnfile.loadToModel(rec)
+                if not model.moves:
+                    continue
+                move = toAN(model.boards[0].board, model.moves[0].move)
+                stat = expected.setdefault(move, [0, 0, 0, 0])
+                stat[0] += 1
+                if rec["Result"] == WHITEWON:
+                    stat[1] += 1
+                elif rec["Result"] == BLACKWON:
+                    stat[2] += 1
+                elif rec["Result"] == DRAW:
+                    stat[3] += 1
+            records, offs_ply = self.pgnfile.get_records(NEXT_PAGE)
+
+        rows = self.pgnfile.get_book_moves(FEN_START)
+        self.assertEqual({row[0]: list(row[1:5]) for row in rows}, expected)
+        self.assertEqual(sorted(rows, key=lambda row: -row[1]), rows)
+
+        board = self.pgnfile.get_position_board(FEN_START)
+        for row in rows:
+            parseAN(board, row[0])
+
+        self.assertEqual(self.pgnfile.has_position(E4_FEN)[1], True)
+        self.assertEqual(
+            self.pgnfile.has_position("8/8/8/8/8/8/8/K6k w - - 0 1")[1], False
+        )
+
+    def test_fen_filter(self):
+        """Testing fen filter gives the games reaching the position"""
+
+        e4_games = [
+            row for row in self.pgnfile.get_book_moves(FEN_START) if row[0] == "e2e4"
+        ][0][1]
+
+        self.pgnfile.set_fen_filter(E4_FEN)
+        offsets = []
+        records, offs_ply = self.pgnfile.get_records(FIRST_PAGE)
+        while records:
+            for rec in records:
+                self.assertEqual(offs_ply[rec["Offset"]], 1)
+                offsets.append(rec["Offset"])
+            records, offs_ply = self.pgnfile.get_records(NEXT_PAGE)
+        self.assertEqual(len(set(offsets)), e4_games)
+
+        self.pgnfile.set_fen_filter("8/8/8/8/8/8/8/K6k w - - 0 1")
+        self.assertEqual(self.pgnfile.get_records(FIRST_PAGE), ([], {}))
+
+    def test_external_sort(self):
+        """Testing merge of sorted runs gives the same index file"""
+
+        records = list(self.pgnfile.iter_positions())
+        run_size = PositionIndex.RUN_SIZE
+        PositionIndex.RUN_SIZE = 1000
+        try:
+            path = os.path.join(self.tmpdir, "runs.pos")
+            state = read_state(self.pgnfile.position_index.path)
+            write_index(path, iter(records), state)
+        finally:
+            PositionIndex.RUN_SIZE = run_size
+
+        with open(path, "rb") as f1, open(self.pgnfile.position_index.path, "rb") as f2:
+            self.assertEqual(f1.read(), f2.read())
+
+    def test_append(self):
+        """Testing games appended to the .pgn are merged into the index"""
+
+        full_path = self.pgnfile.position_index.path
+        with open(full_path, "rb") as f:
+            full_index = f.read()
+        with open(self.pgnfile.path, "rb") as f:
+            content = f.read()
+        offsets = [rec.offset for rec in self.pgnfile.tag_database.get_index_games()]
+        half = offsets[len(offsets) // 2]
+
+        path = os.path.join(self.tmpdir, "appended.pgn")
+        with open(path, "wb") as f:
+            f.write(content[:half])
+        pgnfile = load(protoopen(path))
+        try:
+            pgnfile.init_tag_database()
+            pgnfile.create_position_index()
+
+            with open(path, "ab") as f:
+                f.write(content[half:])
+            mtime = os.path.getmtime(pgnfile.sqlite_path) + 10
+            os.utime(path, (mtime, mtime))
+            pgnfile.init_tag_database()
+            # Not updated when the file is opened
+            pgnfile.init_position_index()
+            self.assertIsNone(pgnfile.position_index)
+
+            starts = []
+            replay_games = pgnfile.replay_games
+
+            def recorded_replay_games(start=0, importer=None):
+                starts.append(start)
+                return replay_games(start, importer)
+
+            pgnfile.replay_games = recorded_replay_games
+            self.assertTrue(pgnfile.create_position_index())
+            with open(pgnfile.position_index.path, "rb") as f:
+                appended_index = f.read()
+        finally:
+            pgnfile.close()
+
+        # only the last game of the first half was replayed again
+        self.assertEqual(starts, [offsets[len(offsets) // 2 - 1]])
+        self.assertEqual(appended_index, full_index)
+
+    def test_cancel(self):
+        """Testing a cancelled index is continued by the next update"""
+
+        class Importer:
+            # cancels after replaying some games
+            def __init__(self, games):
+                self.games = games
+
+            @property
+            def cancel(self):
+                self.games -= 1
+                return self.games < 0
+
+        full_path = self.pgnfile.position_index.path
+        with open(full_path, "rb") as f:
+            full_index = f.read()
+        offsets = [rec.offset for rec in self.pgnfile.tag_database.get_index_games()]
+
+        path = os.path.join(self.tmpdir, "cancelled.pgn")
+        shutil.copy(self.pgnfile.path, path)
+        pgnfile = load(protoopen(path))
+        try:
+            pgnfile.init_tag_database()
+            self.assertFalse(pgnfile.create_position_index(Importer(0)))
+            self.assertIsNone(read_state(pgnfile.pos_path))
+
+            self.assertFalse(pgnfile.create_position_index(Importer(10)))
+            self.assertIsNone(pgnfile.position_index)
+            self.assertEqual(read_state(pgnfile.pos_path)[:2], tuple(offsets[10:8:-1]))
+
+            self.assertTrue(pgnfile.create_position_index())
+            with open(pgnfile.pos_path, "rb") as f:
+                index = f.read()
+        finally:
+            pgnfile.close()
+        self.assertEqual(index, full_index)
+
+    def test_chess_db(self):
+        """Testing chess_db is preferred for chess positions"""
+
+        self.assertTrue(self.pgnfile.use_position_index(NORMALCHESS))
+        self.pgnfile.chess_db = object()
+        self.assertFalse(self.pgnfile.use_position_index(NORMALCHESS))
+        self.assertTrue(self.pgnfile.use_position_index(CRAZYHOUSECHESS))
+        self.pgnfile.chess_db = None
+
+
+class VariantPositionIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        path = os.path.join(self.tmpdir, "zh.pgn")
+        shutil.copy("gamefiles/zh.pgn", path)
+        self.pgnfile = load(protoopen(path))
+        self.pgnfile.init_tag_database()
+        self.pgnfile.create_position_index()
+
+    def tearDown(self):
+        self.pgnfile.close()
+        shutil.rmtree(self.tmpdir)
+
+    def test_holdings(self):
+        """Testing positions with holdings are found by their variant"""
+
+        rec = self.pgnfile.get_records(FIRST_PAGE)[0][0]
+        model = self.pgnfile.loadToModel(rec)
+        board = model.boards[30]
+        fen = board.asFen()
+        self.assertTrue(self.pgnfile.has_position(fen, CRAZYHOUSECHESS)[1])
+        self.pgnfile.set_fen_filter(fen, CRAZYHOUSECHESS)
+        records, offs_ply = self.pgnfile.get_records(FIRST_PAGE)
+        self.assertIn(rec["Offset"], [r["Offset"] for r in records])
+
+        # Not a crash, just not found
+        self.assertFalse(self.pgnfile.has_position("not a fen", CRAZYHOUSECHESS)[1])
+        self.assertEqual(self.pgnfile.get_book_moves("not a fen"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
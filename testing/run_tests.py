@@ -13,6 +13,10 @@ modules_to_test = (
     "move",
     "movegen",
     "pgn",
+    "pgnimport",
+    "positionindex",
+    "openingtree",
+    "gamestore",
     "atomic",
     "crazyhouse",
     "losers",
@@ -28,8 +32,10 @@ modules_to_test = (
     "ficslecturebot",
     "ficspuzzlebot",
     "analysis",
+    "analysis_cache",
     "selfplay",
     "engine",
+    "enginepool",
     "savegame",
     "dialogs",
     "learn",
@@ -1,8 +1,11 @@
+import pickle
 import unittest
 
 from pychess.Utils.Board import Board
 from pychess.Utils.lutils.LBoard import LBoard
+from pychess.Utils.const import CRAZYHOUSECHESS, E1, E8
 from pychess.Utils.lutils.lmove import parseAN
+from pychess.Utils.lutils.lmovegen import newMove
 
 FEN = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
 
@@ -91,6 +94,56 @@ class ZobristTestCase(unittest.TestCase):
 
         self.assertEqual(hash1, hash2)
 
+    def testZobrist_5(self):
+        """Testing zobrist hashing with null move and take back"""
+
+        self.make_move("a2a4")
+        fen = self.board.asFen()
+        hash = self.board.hash
+        self.assertIsNotNone(self.board.enpassant)
+        self.board.applyMove(newMove(E8, E8))
+        self.assertIsNone(self.board.enpassant)
+        self.board.applyMove(newMove(E1, E1))
+
+        self.board.popMove()
+        self.board.popMove()
+        self.assertEqual(hash, self.board.hash)
+        self.assertEqual(fen, self.board.asFen())
+
+    def testZobrist_6(self):
+        """Testing take back on clones and pickled boards sharing history"""
+
+        moves = ("e1g1", "e8g8", "a1b1", "a8b8", "d5e6", "f7e6")
+        hashes = []
+        for move in moves:
+            hashes.append(self.board.hash)
+            self.make_move(move)
+
+        clone = self.board.clone()
+        pickled = pickle.loads(pickle.dumps(self.board))
+        self.board.popMove()
+        self.make_move("a6b5")
+        self.assertEqual(self.board.hist_hash, hashes)
+
+        for board in (clone, pickled):
+            self.assertEqual(board.hist_hash, hashes)
+            self.assertEqual(board.repetitionCount(), 1)
+            for hash in reversed(hashes):
+                board.popMove()
+                self.assertEqual(hash, board.hash)
+            self.assertEqual(board.asFen(), FEN)
+
+    def testZobrist_7(self):
+        """Testing hash of captures and drops matches the hash of the fen"""
+
+        board = LBoard(CRAZYHOUSECHESS)
+        board.applyFen("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR/ w KQkq - 0 1")
+        for move in ("e2e4", "d7d5", "e4d5", "d8d5", "b1c3", "d5a2", "a1a2", "P@e4"):
+            board.applyMove(parseAN(board, move))
+            fresh = LBoard(CRAZYHOUSECHESS)
+            fresh.applyFen(board.asFen())
+            self.assertEqual(board.hash, fresh.hash)
+
 
 if __name__ == "__main__":
     unittest.main()
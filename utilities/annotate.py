@@ -0,0 +1,341 @@
+#!/usr/bin/python
+
+"""
+    PyChess batch annotator script.
+    This script annotates every game of a pgn file with the evaluations of an
+    analyzing engine, without any user interface. The games are analyzed by a
+    pool of engine processes, and written to the output file as [%eval]
+    comments as soon as they are ready, in the order of the input file.
+
+    Progress is saved to a checkpoint file after every game, so a killed job
+    continues where it stopped when started again with the same arguments.
+
+    PYTHONPATH=lib/ python utilities/annotate.py -e stockfish -o out.pgn games.pgn
+    PYTHONPATH=lib/ python utilities/annotate.py -f white=Carlsen -f eco_from=B20 \\
+        -e /usr/games/stockfish -d 18 -t 2 -n 8 -o carlsen.pgn games.sqlite
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import textwrap
+
+from pychess.Players.AnalysisScheduler import AnalysisScheduler
+from pychess.Players.EnginePool import enginePool
+from pychess.Players.Player import PlayerIsDead
+from pychess.Players.engineNest import discoverer, is_cecp, is_uci, md5_sum
+from pychess.Savers import pgn
+from pychess.System.protoopen import protoopen
+from pychess.Utils.Move import Move
+from pychess.Utils.const import (
+    ANALYZING,
+    BLACK,
+    FEN_START,
+    KILLED,
+    NORMALCHESS,
+    RUNNING,
+    UNKNOWN_REASON,
+    WHITE,
+    reprResult,
+)
+from pychess.Utils.logic import legalMoveCount
+from pychess.Utils.lutils.lmove import toSAN
+from pychess.Variants import variants
+
+# The tags the header tag database knows, in the order we write them
+TAGS = (
+    "Event",
+    "Site",
+    "Date",
+    "Round",
+    "White",
+    "Black",
+    "Result",
+    "WhiteElo",
+    "BlackElo",
+    "ECO",
+    "TimeControl",
+    "Annotator",
+)
+
+
+###############################################################################
+# Engines
+async def findEngine(name):
+    """The engine dict of an engine binary path, or of an installed engine
+    name (looked up by the engine discoverer)"""
+
+    if os.path.isfile(name):
+        path = os.path.abspath(name)
+        if is_uci(path):
+            protocol = "uci"
+        elif is_cecp(path):
+            protocol = "xboard"
+        else:
+            sys.exit("%s is neither an UCI nor a CECP engine" % path)
+        return {
+            "name": os.path.basename(path),
+            "protocol": protocol,
+            "command": path,
+            "md5": md5_sum(path),
+            "workingDirectory": os.path.dirname(path),
+        }
+
+    discovered = asyncio.Event()
+    discoverer.connect("all_engines_discovered", lambda d: discovered.set())
+    discoverer.discover()
+    await discovered.wait()
+
+    if name:
+        engine = discoverer.getEngineByName(name, exactName=False)
+    else:
+        engine = discoverer.getEngineByName(discoverer.getEngineLearn())
+    if engine is None or not discoverer.is_analyzer(engine):
+        names = [discoverer.getName(engine) for engine in discoverer.getAnalyzers()]
+        sys.exit("No such analyzer. Installed analyzers: %s" % ", ".join(names))
+    return engine
+
+
+class Annotator:
+    """A pool of analyzer processes of the same engine. Every process
+    analyzes a whole game at a time."""
+
+    def __init__(self, engine, size, move_time, depth):
+        self.engine = engine
+        self.size = size
+        self.depth = depth
+        self.scheduler = AnalysisScheduler(None, [], move_time, depth)
+        self.idle = asyncio.Queue()
+        # Analyzers are started for the variant of the games
+        for i in range(size):
+            self.idle.put_nowait({})
+
+    async def analyzer(self, analyzers, variant):
+        analyzer = analyzers.get(variant)
+        if analyzer is None:
+            analyzer = await discoverer.initAnalyzerEngine(
+                self.engine, ANALYZING, variants[variant]
+            )
+            if self.depth is not None and hasattr(analyzer, "analysis_depth"):
+                analyzer.analysis_depth = self.depth
+            if not await self.scheduler.waitReady(analyzer):
+                analyzer.end(KILLED, UNKNOWN_REASON)
+                raise RuntimeError("%s didn't get ready" % self.engine["name"])
+            analyzers[variant] = analyzer
+        return analyzer
+
+    async def evaluate(self, record):
+        """Returns {n: (centipawns from white's point of view, depth)} of the
+        positions after n moves of the game record"""
+
+        variant = record.board.variant
+        if variant not in discoverer.getEngineVariants(self.engine):
+            return {}
+
+        analyzers = await self.idle.get()
+        try:
+            analyzer = await self.analyzer(analyzers, variant)
+            evals = {}
+            board = variants[variant](setup=record.board.asFen())
+            for n, lmove in enumerate(record.moves, 1):
+                board = board.move(Move(lmove))
+                if legalMoveCount(board) == 0:
+                    break
+                analysis = await self.scheduler.analyze(analyzer, board)
+                if analysis is not None:
+                    ply, pv, score, depth, nps = analysis
+                    evals[n] = (-score if board.color == BLACK else score, depth)
+            return evals
+        finally:
+            self.idle.put_nowait(analyzers)
+
+    async def close(self):
+        self.scheduler.stop()
+        processes = []
+        while not self.idle.empty():
+            for analyzer in self.idle.get_nowait().values():
+                analyzer.end(KILLED, UNKNOWN_REASON)
+                processes.append(analyzer.engine.proc)
+        # Ended engines may have been given to the engine pool
+        enginePool.clear()
+        # Let the engines exit before the event loop is closed
+        await asyncio.gather(*(process.wait() for process in processes))
+
+
+###############################################################################
+# Output
+def game_pgn(record, evals):
+    """The pgn text of a game record with the evals added to its mainline
+    comments. Variations and NAGs of the input game are not kept."""
+
+    tags = dict(record.tags)
+    tags["Result"] = reprResult[tags["Result"] or RUNNING]
+    lines = []
+    for tag in TAGS:
+        value = tags.get(tag)
+        if value is None or value == "":
+            if tag not in TAGS[:7]:
+                continue
+            value = "?"
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"')
+        lines.append(f'[{tag} "{value}"]')
+    if record.board.variant != NORMALCHESS:
+        lines.append(
+            '[Variant "%s"]' % variants[record.board.variant].cecp_name.capitalize()
+        )
+    fen = record.board.asFen()
+    if fen != FEN_START:
+        lines.append('[SetUp "1"]')
+        lines.append(f'[FEN "{fen}"]')
+    lines.append(f'[PlyCount "{len(record.moves)}"]')
+
+    result = ["{%s}" % text for text in record.comments.get(0, [])]
+    board = record.board.clone()
+    commented = True
+    for n, lmove in enumerate(record.moves, 1):
+        if board.color == WHITE:
+            result.append("%d." % (board.plyCount // 2 + 1))
+        elif commented:
+            result.append("%d..." % (board.plyCount // 2 + 1))
+        result.append(toSAN(board, lmove))
+        board.applyMove(lmove)
+
+        comments = [
+            pgn.move_eval_re.sub("", text).strip()
+            for text in record.comments.get(n, [])
+        ]
+        if n in evals:
+            score, depth = evals[n]
+            comments.insert(0, f"[%eval {score / 100.0:0.2f}/{depth}]")
+        comments = ["{%s}" % text for text in comments if text]
+        result.extend(comments)
+        # Black's move gets its number after a real comment
+        commented = any(not text.startswith("{[%") for text in comments)
+
+    movetext = textwrap.fill(" ".join(result + [tags["Result"]]), width=80)
+    return "\n".join(lines) + "\n\n" + movetext + "\n\n"
+
+
+class Checkpoint:
+    """Offset of the last game written to the output file, and the size of
+    the output file after it. Kept in a json file next to the output."""
+
+    def __init__(self, path, output):
+        self.path = path
+        self.offset = -1
+        self.games = 0
+        if os.path.isfile(path) and os.path.isfile(output):
+            with open(path) as f:
+                state = json.load(f)
+            self.offset = state["offset"]
+            self.games = state["games"]
+            # Drop whatever was written after the last checkpoint
+            with open(output, "r+b") as f:
+                f.truncate(state["size"])
+
+    def save(self, offset, size):
+        self.offset = offset
+        self.games += 1
+        with open(self.path + ".tmp", "w") as f:
+            json.dump({"offset": offset, "size": size, "games": self.games}, f)
+        os.replace(self.path + ".tmp", self.path)
+
+
+###############################################################################
+# Run
+async def annotate(args, query):
+    path = args.input
+    if path.endswith(".sqlite"):
+        path = os.path.splitext(path)[0] + ".pgn"
+    pgnfile = pgn.load(protoopen(path))
+    pgnfile.init_tag_database()
+
+    checkpoint = Checkpoint(args.checkpoint or args.output + ".checkpoint", args.output)
+    if checkpoint.games:
+        print("Resuming after %d annotated games" % checkpoint.games)
+
+    annotator = Annotator(
+        await findEngine(args.engine), args.engines, args.movetime, args.depth
+    )
+    output = open(args.output, "a" if checkpoint.games else "w", encoding="utf-8")
+    # Games in the order of the input file, annotated or being annotated
+    pending = asyncio.Queue(maxsize=2 * args.engines)
+
+    async def read_games():
+        records = pgnfile.iter_games(query, fields=("moves", "comments"))
+        for record in records:
+            if record.tags["Offset"] <= checkpoint.offset:
+                continue
+            task = asyncio.create_task(annotator.evaluate(record))
+            await pending.put((record, task))
+        await pending.put(None)
+
+    async def write_games():
+        while True:
+            item = await pending.get()
+            if item is None:
+                break
+            record, task = item
+            try:
+                evals = await task
+            except (RuntimeError, PlayerIsDead):
+                sys.exit("Couldn't start %s" % discoverer.getName(annotator.engine))
+            output.write(game_pgn(record, evals))
+            output.flush()
+            os.fsync(output.fileno())
+            checkpoint.save(record.tags["Offset"], output.tell())
+            print(
+                "%d: %s - %s"
+                % (checkpoint.games, record.tags["White"], record.tags["Black"])
+            )
+
+    try:
+        await asyncio.gather(read_games(), write_games())
+    finally:
+        await annotator.close()
+        output.close()
+        pgnfile.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Annotate the games of a pgn file with engine evaluations"
+    )
+    parser.add_argument("input", help="pgn file, or its .sqlite game index")
+    parser.add_argument("-o", "--output", required=True, help="annotated pgn file")
+    parser.add_argument(
+        "-e", "--engine", default="", help="engine binary, or installed engine name"
+    )
+    parser.add_argument(
+        "-n", "--engines", type=int, default=1, help="number of engine processes"
+    )
+    parser.add_argument(
+        "-t", "--movetime", type=float, default=3, help="seconds per position"
+    )
+    parser.add_argument("-d", "--depth", type=int, help="depth per position")
+    parser.add_argument(
+        "-f",
+        "--filter",
+        action="append",
+        default=[],
+        metavar="TAG=VALUE",
+        help="tag filter of the game database (white, black, event, site, "
+        "eco_from, eco_to, date_from, date_to, elo_from, elo_to, result...)",
+    )
+    parser.add_argument("-c", "--checkpoint", help="checkpoint file")
+    args = parser.parse_args()
+
+    query = None
+    if args.filter:
+        query = dict(item.split("=", 1) for item in args.filter)
+
+    try:
+        asyncio.run(annotate(args, query))
+    except KeyboardInterrupt:
+        print("Interrupted, run again to resume")
+
+
+if __name__ == "__main__":
+    main()